@@ -0,0 +1,126 @@
+"""Event loop responsiveness while large pages are cleaned and converted.
+
+Cleans and converts several generated pages concurrently on one loop, with
+a heartbeat task standing in for in-flight browser work. Compares running
+the stages on the loop, in worker threads and in the CPU process pool.
+"""
+
+import argparse
+import asyncio
+import time
+import typing
+
+import rich.console
+import rich.table
+
+from benchmarks.html_cleaner import generate_page
+from web_queue.utils import cpu_tasks
+from web_queue.utils.compression import compress_bytes
+from web_queue.utils.cpu_executor import CPUExecutor
+from web_queue.utils.html_backend import HTMLBackendName
+
+console = rich.console.Console()
+
+
+async def process_page(
+    executor: typing.Optional[CPUExecutor],
+    html: bytes,
+    backend_name: HTMLBackendName,
+    css_selector: str,
+) -> str:
+    async def run(
+        func: typing.Callable[..., typing.Any], *args: typing.Any
+    ) -> typing.Any:
+        if executor is None:
+            return func(*args)  # On the event loop
+        return await executor.run(func, *args, size=len(html))
+
+    cleaned_html, _ = await run(cpu_tasks.clean_html, html, backend_name)
+    cleaned_html_bytes = cleaned_html.encode("utf-8")
+    await run(compress_bytes, cleaned_html_bytes)
+    return await run(
+        cpu_tasks.select_markdown, cleaned_html_bytes, css_selector, backend_name
+    )
+
+
+async def measure(
+    executor: typing.Optional[CPUExecutor],
+    htmls: typing.List[bytes],
+    backend_name: HTMLBackendName,
+    css_selector: str,
+) -> typing.Tuple[float, float, typing.List[str]]:
+    max_lag = 0.0
+    done = asyncio.Event()
+
+    async def heartbeat(interval: float = 0.01) -> None:
+        nonlocal max_lag
+        while not done.is_set():
+            start = time.perf_counter()
+            await asyncio.sleep(interval)
+            max_lag = max(max_lag, time.perf_counter() - start - interval)
+
+    heartbeat_task = asyncio.create_task(heartbeat())
+    await asyncio.sleep(0.05)
+    start = time.perf_counter()
+    markdowns = await asyncio.gather(
+        *(process_page(executor, h, backend_name, css_selector) for h in htmls)
+    )
+    seconds = time.perf_counter() - start
+    done.set()
+    await heartbeat_task
+    return seconds, max_lag, list(markdowns)
+
+
+async def main(
+    *,
+    backend_name: HTMLBackendName = "html.parser",
+    css_selector: str = "main",
+    size_mb: float = 1.0,
+    pages: int = 4,
+    workers: int = 4,
+):
+    htmls = [generate_page(size_mb, seed=seed).encode("utf-8") for seed in range(pages)]
+    process_executor = CPUExecutor(max_workers=workers, inline_max_bytes=0)
+    # Start the workers outside the measurement
+    await process_executor.run(cpu_tasks.md5_hexdigest, b"", size=1)
+
+    table = rich.table.Table("Mode", "Seconds", "Max loop lag s", "Same")
+    reference: typing.Optional[typing.List[str]] = None
+    for mode, executor in (
+        ("event loop", None),
+        ("threads", CPUExecutor(max_workers=0, inline_max_bytes=0)),
+        ("processes", process_executor),
+    ):
+        seconds, max_lag, markdowns = await measure(
+            executor, htmls, backend_name, css_selector
+        )
+        reference = reference or markdowns
+        table.add_row(
+            mode,
+            f"{seconds:.2f}",
+            f"{max_lag:.3f}",
+            "yes" if markdowns == reference else "[red]NO[/red]",
+        )
+    process_executor.shutdown()
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--backend", default="html.parser")
+    parser.add_argument("--css-selector", default="main")
+    parser.add_argument("--size-mb", type=float, default=1.0)
+    parser.add_argument("--pages", type=int, default=4)
+    parser.add_argument("--workers", type=int, default=4)
+    args = parser.parse_args()
+
+    asyncio.run(
+        main(
+            backend_name=args.backend,
+            css_selector=args.css_selector,
+            size_mb=args.size_mb,
+            pages=args.pages,
+            workers=args.workers,
+        )
+    )
@@ -0,0 +1,91 @@
+"""Per-page CPU of the clean and extract stages for each HTML backend.
+
+Times `clean_html`, `select_html` and markdown conversion on generated pages,
+or a directory of HTML files with `--html-dir` and `--css-selector`.
+"""
+
+import argparse
+import pathlib
+import statistics
+import time
+import typing
+
+import rich.console
+import rich.table
+
+from benchmarks.html_cleaner import generate_page
+from web_queue.utils.html_backend import HTMLBackendName, get_html_backend
+from web_queue.utils.html_to_str import htmls_to_str
+
+console = rich.console.Console()
+
+
+def main(
+    html_dir: typing.Optional[pathlib.Path] = None,
+    *,
+    css_selector: str = "main",
+    size_mb: float = 2.0,
+    pages: int = 3,
+    rounds: int = 3,
+):
+    if html_dir is not None:
+        htmls = [p.read_text(errors="replace") for p in sorted(html_dir.glob("*.htm*"))]
+    else:
+        htmls = [generate_page(size_mb, seed=seed) for seed in range(pages)]
+
+    backend_names: typing.List[HTMLBackendName] = ["html.parser", "selectolax"]
+    table = rich.table.Table("Backend", "Clean s", "Select s", "Markdown s", "Total s")
+    markdowns: typing.Dict[str, typing.List[str]] = {}
+    for backend_name in backend_names:
+        backend = get_html_backend(backend_name)
+        stage_seconds: typing.Dict[str, typing.List[float]] = {
+            "clean": [],
+            "select": [],
+            "markdown": [],
+        }
+        markdowns[backend_name] = []
+        for html in htmls:
+            for _ in range(rounds):
+                start = time.perf_counter()
+                cleaned_html = backend.clean_html(html)
+                stage_seconds["clean"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                selected_htmls = backend.select_html(cleaned_html, css_selector)
+                stage_seconds["select"].append(time.perf_counter() - start)
+
+                start = time.perf_counter()
+                markdown = htmls_to_str(selected_htmls)
+                stage_seconds["markdown"].append(time.perf_counter() - start)
+            markdowns[backend_name].append(markdown)
+
+        medians = {k: statistics.median(v) for k, v in stage_seconds.items()}
+        table.add_row(
+            backend_name,
+            f"{medians['clean']:.3f}",
+            f"{medians['select']:.3f}",
+            f"{medians['markdown']:.3f}",
+            f"{sum(medians.values()):.3f}",
+        )
+
+    console.print(table)
+    identical = markdowns["html.parser"] == markdowns["selectolax"]
+    console.print(f"Identical markdown: {'yes' if identical else '[red]NO[/red]'}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--html-dir", type=pathlib.Path, default=None)
+    parser.add_argument("--css-selector", default="main")
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    main(
+        args.html_dir,
+        css_selector=args.css_selector,
+        size_mb=args.size_mb,
+        pages=args.pages,
+        rounds=args.rounds,
+    )
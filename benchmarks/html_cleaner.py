@@ -0,0 +1,113 @@
+"""Compare the one-pass HTMLCleaner with the former five-pass pipeline.
+
+Pages come from a directory of HTML files, or are generated novel-like pages
+of about `--size-mb` each. Only cleaning is timed, parsing is shared by both.
+Both cleaners must produce identical output.
+"""
+
+import argparse
+import pathlib
+import random
+import statistics
+import time
+import typing
+
+import bs4
+import rich.console
+import rich.table
+
+from web_queue.utils.html_cleaner import HTMLCleaner
+
+console = rich.console.Console()
+
+
+def clean_multi_pass(soup: bs4.BeautifulSoup) -> bs4.BeautifulSoup:
+    soup = HTMLCleaner.clean_all_comments(soup)
+    soup = HTMLCleaner.keep_only_tags(soup)
+    soup = HTMLCleaner.clean_tags(soup)
+    soup = HTMLCleaner.clean_attributes(soup)
+    soup = HTMLCleaner.keep_first_class_name(soup)
+    return soup
+
+
+def clean_one_pass(soup: bs4.BeautifulSoup) -> bs4.BeautifulSoup:
+    return HTMLCleaner.clean_in_one_pass(soup)
+
+
+def generate_page(size_mb: float, *, seed: int) -> str:
+    rng = random.Random(seed)
+    words = "the night rain fell over quiet streets while she read on".split()
+    nav = "".join(
+        f'<li class="nav-item item-{i}" data-id="{i}"><a href="/c/{i}" '
+        + f'style="color:red"><span class="icon">*</span>Link {i}</a></li>'
+        for i in range(50)
+    )
+    parts = [
+        "<!DOCTYPE html><html><head><title>Chapter</title>"
+        + "<script>var x = 1;</script><style>p{}</style></head><body>"
+        + f'<header class="site header"><nav><ul>{nav}</ul></nav></header>'
+        + '<main id="main" class="content main-content" role="main">'
+    ]
+    size = len(parts[0])
+    while size < size_mb * 1024 * 1024:
+        text = " ".join(rng.choice(words) for _ in range(60))
+        block = (
+            f'<div class="para block-{rng.randint(0, 9)}" data-line="{size}">'
+            + f"<!-- ad slot --><p>{text}<br><em>{text[:20]}</em></p>"
+            + '<img src="x.png"><iframe src="/ad"></iframe></div>\n'
+        )
+        parts.append(block)
+        size += len(block)
+    parts.append("</main><footer>Copyright</footer></body></html>")
+    return "".join(parts)
+
+
+def main(
+    html_dir: typing.Optional[pathlib.Path] = None,
+    *,
+    size_mb: float = 2.0,
+    pages: int = 3,
+    rounds: int = 3,
+):
+    if html_dir is not None:
+        htmls = [p.read_text(errors="replace") for p in sorted(html_dir.glob("*.htm*"))]
+    else:
+        htmls = [generate_page(size_mb, seed=seed) for seed in range(pages)]
+
+    table = rich.table.Table(
+        "Page", "Size MB", "Multi-pass s", "One-pass s", "Speedup", "Identical"
+    )
+    for index, html in enumerate(htmls):
+        timings: typing.Dict[str, typing.List[float]] = {"multi": [], "one": []}
+        outputs: typing.Dict[str, str] = {}
+        for _ in range(rounds):
+            for name, clean in (("multi", clean_multi_pass), ("one", clean_one_pass)):
+                soup = bs4.BeautifulSoup(html, "html.parser")  # Not timed
+                start = time.perf_counter()
+                soup = clean(soup)
+                timings[name].append(time.perf_counter() - start)
+                outputs[name] = str(soup)
+
+        multi_seconds = statistics.median(timings["multi"])
+        one_seconds = statistics.median(timings["one"])
+        table.add_row(
+            str(index),
+            f"{len(html) / 1024 / 1024:.2f}",
+            f"{multi_seconds:.3f}",
+            f"{one_seconds:.3f}",
+            f"{multi_seconds / one_seconds:.2f}x",
+            "yes" if outputs["multi"] == outputs["one"] else "[red]NO[/red]",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--html-dir", type=pathlib.Path, default=None)
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--pages", type=int, default=3)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    main(args.html_dir, size_mb=args.size_mb, pages=args.pages, rounds=args.rounds)
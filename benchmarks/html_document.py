@@ -0,0 +1,91 @@
+"""Peak memory and CPU of the re-parse pipeline against `HTMLDocument`.
+
+The re-parse pipeline cleans to a string, hashes it and parses it again to
+select the content body. The document pipeline parses once and selects on
+the cleaned tree. Both end in the same markdown.
+"""
+
+import argparse
+import hashlib
+import statistics
+import time
+import tracemalloc
+import typing
+
+import rich.console
+import rich.table
+
+from benchmarks.html_cleaner import generate_page
+from web_queue.utils.html_backend import HTMLBackend, HTMLBackendName, get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_to_str import htmls_to_str
+
+console = rich.console.Console()
+
+
+def reparse_pipeline(backend: HTMLBackend, html: str, css_selector: str) -> str:
+    cleaned_html = backend.clean_html(html)
+    hashlib.md5(cleaned_html.encode("utf-8")).hexdigest()
+    return htmls_to_str(backend.select_html(cleaned_html, css_selector))
+
+
+def document_pipeline(backend: HTMLBackend, html: str, css_selector: str) -> str:
+    document = HTMLDocument(html, backend=backend).prepare()
+    return htmls_to_str(document.select_html(css_selector))
+
+
+def measure(
+    pipeline: typing.Callable[[HTMLBackend, str, str], str],
+    backend: HTMLBackend,
+    html: str,
+    css_selector: str,
+    rounds: int,
+) -> typing.Tuple[float, int, str]:
+    seconds: typing.List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        markdown = pipeline(backend, html, css_selector)
+        seconds.append(time.perf_counter() - start)
+
+    tracemalloc.start()
+    pipeline(backend, html, css_selector)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return statistics.median(seconds), peak, markdown
+
+
+def main(*, css_selector: str = "main", size_mb: float = 2.0, rounds: int = 3):
+    html = generate_page(size_mb, seed=0)
+    backend_names: typing.List[HTMLBackendName] = ["html.parser", "selectolax"]
+
+    table = rich.table.Table("Backend", "Pipeline", "Seconds", "Peak MB", "Same")
+    for backend_name in backend_names:
+        try:
+            backend = get_html_backend(backend_name)
+        except ImportError:
+            continue
+        reparse = measure(reparse_pipeline, backend, html, css_selector, rounds)
+        document = measure(document_pipeline, backend, html, css_selector, rounds)
+        for pipeline_name, (seconds, peak, markdown) in (
+            ("re-parse", reparse),
+            ("document", document),
+        ):
+            table.add_row(
+                backend_name,
+                pipeline_name,
+                f"{seconds:.3f}",
+                f"{peak / 1024 / 1024:.1f}",
+                "yes" if markdown == reparse[2] else "[red]NO[/red]",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--css-selector", default="main")
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    main(css_selector=args.css_selector, size_mb=args.size_mb, rounds=args.rounds)
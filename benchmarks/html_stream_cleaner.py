@@ -0,0 +1,77 @@
+"""Peak memory and CPU of the tree cleaner against the streaming cleaner.
+
+Cleans one generated page, or each file of `--html-dir`, with
+`BeautifulSoupBackend.clean_html` and `clean_html_streaming`. Peak memory
+is measured with tracemalloc and excludes the input itself.
+"""
+
+import argparse
+import pathlib
+import time
+import tracemalloc
+import typing
+
+import rich.console
+import rich.table
+
+from benchmarks.html_cleaner import generate_page
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_stream_cleaner import clean_html_streaming
+
+console = rich.console.Console()
+
+
+def measure(
+    clean: typing.Callable[[str], str], html: str
+) -> typing.Tuple[float, int, str]:
+    start = time.perf_counter()
+    cleaned_html = clean(html)
+    seconds = time.perf_counter() - start
+
+    # Tracing slows allocation down, time and trace separate runs
+    tracemalloc.start()
+    clean(html)
+    _, peak = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    return seconds, peak, cleaned_html
+
+
+def main(html_dir: typing.Optional[pathlib.Path] = None, *, size_mb: float = 8.0):
+    if html_dir is not None:
+        htmls = {
+            p.name: p.read_text(errors="replace")
+            for p in sorted(html_dir.glob("*.htm*"))
+        }
+    else:
+        htmls = {"generated": generate_page(size_mb, seed=0)}
+    backend = get_html_backend("html.parser")
+
+    table = rich.table.Table(
+        "Page", "Size MB", "Cleaner", "Seconds", "Peak MB", "Identical"
+    )
+    for name, html in htmls.items():
+        tree = measure(backend.clean_html, html)
+        streaming = measure(clean_html_streaming, html)
+        for cleaner_name, (seconds, peak, cleaned_html) in (
+            ("tree", tree),
+            ("streaming", streaming),
+        ):
+            table.add_row(
+                name,
+                f"{len(html) / 1024 / 1024:.2f}",
+                cleaner_name,
+                f"{seconds:.2f}",
+                f"{peak / 1024 / 1024:.1f}",
+                "yes" if cleaned_html == tree[2] else "[red]NO[/red]",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--html-dir", type=pathlib.Path, default=None)
+    parser.add_argument("--size-mb", type=float, default=8.0)
+    args = parser.parse_args()
+
+    main(args.html_dir, size_mb=args.size_mb)
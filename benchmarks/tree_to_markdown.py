@@ -0,0 +1,74 @@
+"""Markdown of selected nodes, serialized and re-parsed against walked directly.
+
+The re-parse path serializes each selected `bs4` tag and converts the HTML
+with `html_to_markdown`. The direct path is `tree_to_markdown` on the tags.
+Both must give the same markdown.
+"""
+
+import argparse
+import statistics
+import time
+import typing
+
+import bs4
+import rich.console
+import rich.table
+
+from benchmarks.html_cleaner import generate_page
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_to_str import htmls_to_str
+from web_queue.utils.tree_to_markdown import tree_to_markdown
+
+console = rich.console.Console()
+
+
+def reparse_markdown(nodes: typing.List[bs4.Tag]) -> str:
+    return htmls_to_str([str(node) for node in nodes])
+
+
+def direct_markdown(nodes: typing.List[bs4.Tag]) -> str:
+    return "\n\n".join(tree_to_markdown(node) for node in nodes)
+
+
+def measure(
+    convert: typing.Callable[[typing.List[bs4.Tag]], str],
+    nodes: typing.List[bs4.Tag],
+    rounds: int,
+) -> typing.Tuple[float, str]:
+    seconds: typing.List[float] = []
+    for _ in range(rounds):
+        start = time.perf_counter()
+        markdown = convert(nodes)
+        seconds.append(time.perf_counter() - start)
+    return statistics.median(seconds), markdown
+
+
+def main(*, size_mb: float = 2.0, rounds: int = 3):
+    backend = get_html_backend("html.parser")
+    document = HTMLDocument(generate_page(size_mb, seed=0), backend=backend)
+    document.prepare()
+
+    table = rich.table.Table("Selector", "Nodes", "Re-parse s", "Direct s", "Same")
+    for css_selector in ("main", "div.para"):
+        nodes = backend.select(document.cleaned_tree, css_selector)
+        reparse_seconds, reparse = measure(reparse_markdown, nodes, rounds)
+        direct_seconds, direct = measure(direct_markdown, nodes, rounds)
+        table.add_row(
+            css_selector,
+            str(len(nodes)),
+            f"{reparse_seconds:.3f}",
+            f"{direct_seconds:.3f}",
+            "yes" if direct == reparse else "[red]NO[/red]",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--size-mb", type=float, default=2.0)
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    main(size_mb=args.size_mb, rounds=args.rounds)
@@ -0,0 +1,146 @@
+"""Compare plain and dictionary zstd compression of cached pages.
+
+Samples come from the web cache, or from a directory of HTML files grouped
+by subdirectory. Each group is split into a training and a held-out set,
+ratios and throughput are measured on the held-out set only.
+"""
+
+import argparse
+import pathlib
+import time
+import typing
+
+import rich.console
+import rich.table
+import zstandard
+
+from web_queue.client import Settings, WebQueueClient
+from web_queue.types.web_cache_entry import WebCacheEntry
+
+console = rich.console.Console()
+
+
+class Measurement(typing.NamedTuple):
+    raw_bytes: int
+    compressed_bytes: int
+    compress_seconds: float
+    decompress_seconds: float
+
+    @property
+    def ratio(self) -> float:
+        return self.raw_bytes / max(self.compressed_bytes, 1)
+
+    def compress_mb_s(self) -> float:
+        return self.raw_bytes / 1e6 / max(self.compress_seconds, 1e-9)
+
+    def decompress_mb_s(self) -> float:
+        return self.raw_bytes / 1e6 / max(self.decompress_seconds, 1e-9)
+
+
+def measure(
+    samples: typing.List[bytes],
+    *,
+    level: int,
+    dictionary: typing.Optional[zstandard.ZstdCompressionDict] = None,
+    rounds: int = 3,
+) -> Measurement:
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        frames = [compressor.compress(sample) for sample in samples]
+    compress_seconds = (time.perf_counter() - start) / rounds
+
+    start = time.perf_counter()
+    for _ in range(rounds):
+        for frame in frames:
+            decompressor.decompress(frame)
+    decompress_seconds = (time.perf_counter() - start) / rounds
+
+    return Measurement(
+        raw_bytes=sum(len(sample) for sample in samples),
+        compressed_bytes=sum(len(frame) for frame in frames),
+        compress_seconds=compress_seconds,
+        decompress_seconds=decompress_seconds,
+    )
+
+
+def load_html_dir(html_dir: pathlib.Path) -> typing.Dict[str, typing.List[bytes]]:
+    samples: typing.Dict[str, typing.List[bytes]] = {}
+    for group_dir in sorted(p for p in html_dir.iterdir() if p.is_dir()):
+        samples[group_dir.name] = [
+            WebCacheEntry(html=path.read_text(errors="replace"))
+            .model_dump_json()
+            .encode("utf-8")
+            for path in sorted(group_dir.glob("*.htm*"))
+        ]
+    return samples
+
+
+def main(
+    html_dir: typing.Optional[pathlib.Path] = None,
+    *,
+    level: int = 9,
+    holdout: float = 0.2,
+):
+    settings = Settings()
+    if html_dir is not None:
+        samples = load_html_dir(html_dir)
+    else:
+        samples = WebQueueClient(settings).zstd_dictionaries.collect_samples()
+
+    table = rich.table.Table(
+        "Group",
+        "Held out",
+        "Mode",
+        "Ratio",
+        "Compress MB/s",
+        "Decompress MB/s",
+    )
+    for group, group_samples in sorted(samples.items()):
+        test_count = max(int(len(group_samples) * holdout), 1)
+        train_samples = group_samples[test_count:]
+        test_samples = group_samples[:test_count]
+        if len(train_samples) < settings.WEB_CACHE_ZSTD_DICTIONARY_MIN_SAMPLES:
+            console.print(
+                f"[yellow]Skipping '{group}', {len(train_samples)} "
+                + "training samples[/yellow]"
+            )
+            continue
+
+        try:
+            dictionary = zstandard.train_dictionary(
+                settings.WEB_CACHE_ZSTD_DICTIONARY_SIZE, train_samples
+            )
+        except zstandard.ZstdError as e:
+            console.print(f"[red]Failed to train '{group}': {e}[/red]")
+            continue
+
+        for mode, mode_dictionary in (("plain", None), ("dictionary", dictionary)):
+            result = measure(test_samples, level=level, dictionary=mode_dictionary)
+            table.add_row(
+                group,
+                str(len(test_samples)),
+                mode,
+                f"{result.ratio:.2f}",
+                f"{result.compress_mb_s():.1f}",
+                f"{result.decompress_mb_s():.1f}",
+            )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument(
+        "--html-dir",
+        type=pathlib.Path,
+        default=None,
+        help="Directory with one subdirectory of HTML files per group",
+    )
+    parser.add_argument("--level", type=int, default=9)
+    parser.add_argument("--holdout", type=float, default=0.2)
+    args = parser.parse_args()
+
+    main(args.html_dir, level=args.level, holdout=args.holdout)
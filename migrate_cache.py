@@ -0,0 +1,200 @@
+"""Rewrite legacy base64 text cache entries as raw zstd frames.
+
+Reports the footprint of each cache before and after the migration. Works
+on local disk caches, on the shared backends of `SHARED_CACHE_BACKEND`
+(through their shared store, local copies on other nodes stay readable),
+and on Redis caches with a key prefix. A Redis cache without a prefix is
+refused, it shares the database with the queue.
+"""
+
+import argparse
+import functools
+import time
+import typing
+
+import cachetic
+import diskcache
+import redis
+import rich.console
+import rich.table
+
+from web_queue.client import Settings
+from web_queue.utils.compression import (
+    ZSTD_MAGIC_NUMBER,
+    compress_bytes,
+    decompress_bytes,
+)
+from web_queue.utils.shared_cache import (
+    ChunkedRedisCache,
+    ContentAddressedDirectoryCache,
+    ReadThroughCache,
+)
+from web_queue.utils.web_cache_codec import (
+    decode_web_cache_entry,
+    encode_web_cache_entry,
+)
+
+console = rich.console.Console()
+
+
+class Footprint(typing.NamedTuple):
+    entries: int
+    value_bytes: int
+    storage_bytes: typing.Optional[int]  # Disk volume or Redis memory usage
+
+
+def migrate(
+    cache: "cachetic.Cachetic[bytes]",
+    convert: typing.Callable[[bytes, typing.Optional[int]], bytes],
+    *,
+    dry_run: bool = False,
+) -> typing.Tuple[Footprint, Footprint]:
+    """Convert the legacy values of `cache`, `convert` gets the value and TTL."""
+    backend = cache.cache
+    before_entries = before_bytes = after_bytes = 0
+    before_storage = _storage_bytes(backend, cache.prefix)
+
+    for key, value, ttl in _iter_entries(backend, cache.prefix):
+        before_entries += 1
+        before_bytes += len(value)
+        if value.startswith(ZSTD_MAGIC_NUMBER):
+            after_bytes += len(value)
+            continue
+
+        new_value = convert(value, ttl)
+        after_bytes += len(new_value)
+        if not dry_run:
+            backend.set(key, new_value, ttl)
+
+    after_storage = None if dry_run else _storage_bytes(backend, cache.prefix)
+    return (
+        Footprint(before_entries, before_bytes, before_storage),
+        Footprint(before_entries, after_bytes, after_storage),
+    )
+
+
+def convert_web_cache_entry(
+    value: bytes, ttl: typing.Optional[int], *, expire_seconds: int
+) -> bytes:
+    cache_entry = decode_web_cache_entry(value)
+    if "fetched_at" not in cache_entry.model_fields_set:
+        cache_entry.fetched_at = _get_legacy_fetched_at(ttl, expire_seconds)
+    return encode_web_cache_entry(cache_entry)
+
+
+def _get_legacy_fetched_at(ttl: typing.Optional[int], expire_seconds: int) -> float:
+    """When a legacy entry was fetched, from the TTL it has used up.
+
+    Legacy entries were written with `WEB_CACHE_EXPIRE_SECONDS` as their TTL.
+    Entries without one were never stale, they keep counting as fetched now.
+    """
+    if ttl is None or expire_seconds <= 0:
+        return time.time()
+    return time.time() - max(expire_seconds - ttl, 0)
+
+
+def _iter_entries(
+    backend: typing.Any, prefix: str
+) -> typing.Iterator[typing.Tuple[typing.Any, bytes, typing.Optional[int]]]:
+    if isinstance(backend, ReadThroughCache):
+        for key in backend.shared.iterkeys():
+            value = backend.shared.get(key)
+            if value is None:
+                continue
+            yield key, value, backend.shared.get_ttl(key)
+    elif isinstance(backend, diskcache.Cache):
+        for key in backend.iterkeys():
+            value, expire_time = backend.get(key, expire_time=True)
+            if value is None:
+                continue
+            ttl = None if expire_time is None else int(expire_time - time.time())
+            if ttl is not None and ttl <= 0:
+                continue
+            yield key, value, ttl
+    elif isinstance(backend, redis.Redis):
+        for key in backend.scan_iter(match=_get_redis_match(prefix)):
+            if backend.type(key) != b"string":
+                continue
+            value = backend.get(key)
+            if value is None:
+                continue
+            ttl = backend.ttl(key)
+            yield key, value, None if ttl < 0 else ttl
+    else:
+        raise ValueError(f"Unsupported cache backend: {type(backend)}")
+
+
+def _get_redis_match(prefix: str) -> str:
+    if not prefix:
+        raise ValueError("Refusing to scan a Redis cache without a key prefix")
+    return f"{prefix}:*"
+
+
+def _storage_bytes(backend: typing.Any, prefix: str) -> typing.Optional[int]:
+    if isinstance(backend, ReadThroughCache):
+        return _storage_bytes(backend.shared, prefix)
+    if isinstance(backend, ChunkedRedisCache):
+        return _redis_memory_usage(backend.redis_client, f"{backend.namespace}:*")
+    if isinstance(backend, ContentAddressedDirectoryCache):
+        return sum(
+            path.stat().st_size for path in backend.root.rglob("*") if path.is_file()
+        )
+    if isinstance(backend, diskcache.Cache):
+        return backend.volume()
+    if isinstance(backend, redis.Redis):
+        return _redis_memory_usage(backend, _get_redis_match(prefix))
+    return None
+
+
+def _redis_memory_usage(redis_client: redis.Redis, match: str) -> int:
+    return sum(
+        redis_client.memory_usage(key) or 0
+        for key in redis_client.scan_iter(match=match)
+    )
+
+
+def main(dry_run: bool = False):
+    settings = Settings()
+    table = rich.table.Table(
+        "Cache",
+        "Entries",
+        "Values before",
+        "Values after",
+        "Storage before",
+        "Storage after",
+    )
+
+    for name, cache, convert in (
+        (
+            "web_cache",
+            settings.web_cache,
+            functools.partial(
+                convert_web_cache_entry,
+                expire_seconds=settings.WEB_CACHE_EXPIRE_SECONDS,
+            ),
+        ),
+        (
+            "compressed_base64_cache",
+            settings.compressed_base64_cache,
+            lambda v, ttl: compress_bytes(decompress_bytes(v)),
+        ),
+    ):
+        before, after = migrate(cache, convert, dry_run=dry_run)
+        table.add_row(
+            name,
+            str(before.entries),
+            f"{before.value_bytes:,}",
+            f"{after.value_bytes:,}",
+            f"{before.storage_bytes:,}" if before.storage_bytes is not None else "-",
+            f"{after.storage_bytes:,}" if after.storage_bytes is not None else "-",
+        )
+
+    console.print(table)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--dry-run", action="store_true")
+    args = parser.parse_args()
+
+    main(dry_run=args.dry_run)
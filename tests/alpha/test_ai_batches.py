@@ -0,0 +1,162 @@
+import asyncio
+import json
+import pathlib
+
+import httpx
+import openai
+
+from web_queue.client import WebQueueClient
+from web_queue.types.web_fetch_result import WebFetchResult
+
+GOLDEN_PATH = pathlib.Path(__file__).parent / "golden"
+
+
+class StandInBatchAPI:
+    """The Batch API endpoints used, completing each batch when first checked."""
+
+    def __init__(self):
+        self.files: dict[str, bytes] = {}
+        self.batches: dict[str, dict] = {}
+        self.requests: list[dict] = []
+
+    def __call__(self, request: httpx.Request) -> httpx.Response:
+        path = request.url.path
+        if request.method == "POST" and path == "/v1/files":
+            part = request.content.split(b'filename="', 1)[1]
+            content = part.split(b"\r\n\r\n", 1)[1].rsplit(b"\r\n--", 1)[0]
+            file_id = f"file-{len(self.files)}"
+            self.files[file_id] = content
+            return httpx.Response(200, json=self.file_object(file_id, "batch"))
+
+        if request.method == "POST" and path == "/v1/batches":
+            body = json.loads(request.content)
+            batch_id = f"batch_{len(self.batches)}"
+            self.batches[batch_id] = self.batch_object(
+                batch_id, body["input_file_id"], status="validating"
+            )
+            return httpx.Response(200, json=self.batches[batch_id])
+
+        if request.method == "GET" and path.startswith("/v1/batches/"):
+            batch = self.batches[path.rsplit("/", 1)[1]]
+            if batch["status"] != "completed":
+                batch["status"] = "completed"
+                batch["output_file_id"] = self.complete(batch["input_file_id"])
+            return httpx.Response(200, json=batch)
+
+        if request.method == "GET" and path.endswith("/content"):
+            return httpx.Response(200, content=self.files[path.split("/")[3]])
+        return httpx.Response(404, json={"error": {"message": path}})
+
+    def complete(self, input_file_id: str) -> str:
+        lines = []
+        for line in self.files[input_file_id].decode("utf-8").splitlines():
+            request = json.loads(line)
+            self.requests.append(request)
+            content = json.dumps(
+                {
+                    "title": "第5話 雨の夜",
+                    "author": "山田",
+                    "chapter_id": "",
+                    "chapter_number": "",
+                    "content_body_css_selector": "div#novel_honbun",
+                    "created_date": "",
+                    "updated_date": "",
+                }
+            )
+            body = {
+                "id": "chatcmpl-1",
+                "object": "chat.completion",
+                "choices": [
+                    {
+                        "index": 0,
+                        "message": {"role": "assistant", "content": content},
+                        "finish_reason": "stop",
+                    }
+                ],
+            }
+            lines.append(
+                json.dumps(
+                    {
+                        "id": f"batch_req_{len(lines)}",
+                        "custom_id": request["custom_id"],
+                        "response": {"status_code": 200, "body": body},
+                        "error": None,
+                    }
+                )
+            )
+        output_file_id = f"file-{len(self.files)}"
+        self.files[output_file_id] = "\n".join(lines).encode("utf-8")
+        return output_file_id
+
+    def file_object(self, file_id: str, purpose: str) -> dict:
+        return {
+            "id": file_id,
+            "object": "file",
+            "bytes": len(self.files[file_id]),
+            "created_at": 0,
+            "filename": "web-queue-batch.jsonl",
+            "purpose": purpose,
+            "status": "processed",
+        }
+
+    def batch_object(self, batch_id: str, input_file_id: str, status: str) -> dict:
+        return {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": "/v1/chat/completions",
+            "input_file_id": input_file_id,
+            "completion_window": "24h",
+            "status": status,
+            "created_at": 0,
+        }
+
+
+def test_ai_batches_submit_and_resolve(make_settings):
+    settings = make_settings()
+    stand_in = StandInBatchAPI()
+    settings.__dict__["openai_client"] = openai.AsyncOpenAI(
+        api_key="test",
+        base_url="http://stand-in/v1",
+        http_client=httpx.AsyncClient(transport=httpx.MockTransport(stand_in)),
+    )
+    client = WebQueueClient(settings)
+    html = (GOLDEN_PATH / "novel.html").read_text()
+    pages = {
+        "https://example.com/n1234/5/": html,
+        "https://example.com/n1234/5/?copy": html,  # Same cleaned HTML
+    }
+
+    fetched_urls: list[str] = []
+
+    async def fetch_page(url, **kwargs) -> WebFetchResult:
+        fetched_urls.append(str(url))
+        return WebFetchResult(url=str(url), html=pages[str(url)])
+
+    async def extract_html_metadata(html: str, **kwargs):
+        raise AssertionError("Batch pages never use the online AI")
+
+    client.web.fetch_page = fetch_page  # type: ignore[method-assign]
+    client.ai._extract_html_metadata = extract_html_metadata  # type: ignore
+
+    async def main():
+        submission = await client.ai_batches.submit(pages)
+        resolved = await client.ai_batches.resolve_pending()
+        return submission, resolved
+
+    submission, resolved = asyncio.run(main())
+
+    assert sorted(fetched_urls) == sorted(pages)  # Finished without a re-fetch
+    assert submission.results == []
+    assert [len(job.items) for job in submission.jobs] == [2]
+    assert len(stand_in.requests) == 1
+    assert stand_in.requests[0]["body"]["response_format"]["type"] == "json_schema"
+    batch_id = submission.jobs[0].batch_id
+    assert list(resolved) == [batch_id]
+    assert [r.error for r in resolved[batch_id]] == [None, None]
+    html_content = resolved[batch_id][0].html_content
+    assert html_content is not None
+    assert html_content.title == "第5話 雨の夜"
+    assert html_content.content.startswith("その夜、雨は静かに降り続いていた。")
+    assert client.ai_batches.get_pending_batch_ids() == []
+    job = client.ai_batches.get_job(batch_id)
+    assert job is not None and job.status == "completed" and job.resolved_at
@@ -0,0 +1,31 @@
+from web_queue.types.url_canonical_rule import URLCanonicalRule
+from web_queue.utils.canonicalize_url import canonicalize_url
+
+
+def test_canonicalize_url_keeps_raw_encoding():
+    assert canonicalize_url("https://example.com/a%2Fb") == "https://example.com/a%2Fb"
+    assert canonicalize_url("https://example.com/s?q=a%20b") == (
+        "https://example.com/s?q=a%20b"
+    )
+    assert canonicalize_url("https://example.com/s?flag") == (
+        "https://example.com/s?flag"
+    )
+
+
+def test_canonicalize_url_trailing_slash():
+    assert canonicalize_url("https://example.com/dir/") == "https://example.com/dir/"
+    assert canonicalize_url(
+        "https://example.com/dir/", rule=URLCanonicalRule(strip_trailing_slash=True)
+    ) == ("https://example.com/dir")
+    assert canonicalize_url("https://example.com") == "https://example.com/"
+
+
+def test_canonicalize_url_normalizes():
+    assert canonicalize_url(
+        "HTTPS://Example.COM:443/Path?b=2&utm_source=x&a=1&b=1&fbclid=y#top"
+    ) == ("https://example.com/Path?a=1&b=2&b=1")
+    assert canonicalize_url(
+        "https://example.com/p?id=1&ref=home&sort=new",
+        rule=URLCanonicalRule(keep_params=["id", "sort"], drop_params=["sort"]),
+    ) == ("https://example.com/p?id=1")
+    assert canonicalize_url("http://example.com:8080/") == "http://example.com:8080/"
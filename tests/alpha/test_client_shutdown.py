@@ -0,0 +1,19 @@
+import pathlib
+
+import pytest
+
+from web_queue.client import WebQueueClient
+
+
+def test_shutdown_flushes_artifacts(make_settings, tmp_path: pathlib.Path):
+    client = WebQueueClient(make_settings())
+    client.shutdown()  # Nothing started yet
+    assert "web" not in vars(client)
+
+    path = tmp_path / "artifacts" / "page.png"
+    client.web.artifact_writer.submit(path, b"png")
+    client.shutdown()
+
+    assert path.read_bytes() == b"png"
+    with pytest.raises(RuntimeError):
+        client.web.artifact_writer.submit(path, b"png")
@@ -0,0 +1,53 @@
+import time
+
+from web_queue.client import WebQueueClient
+from web_queue.types.domain_rate_limit import DomainRateLimit
+
+URL = "https://example.com/n1234/5/"
+
+
+def make_client(make_settings, **rate_limit) -> WebQueueClient:
+    return WebQueueClient(
+        make_settings(
+            WEB_DOMAIN_RATE_LIMITS={"example.com": DomainRateLimit(**rate_limit)},
+            WEB_DOMAIN_LEASE_SECONDS=1,
+        )
+    )
+
+
+def test_domain_scheduler_token_bucket(make_settings):
+    scheduler = make_client(
+        make_settings, requests_per_second=1.0, burst=2, max_in_flight=0
+    ).domain_scheduler
+
+    assert scheduler.get_wait_seconds(URL) == 0  # Never takes a token
+    assert scheduler.try_acquire(URL, "a") == 0
+    assert scheduler.try_acquire(URL, "b") == 0
+    wait = scheduler.try_acquire(URL, "c")
+    assert 0.9 < wait <= 1.0
+    assert scheduler.get_wait_seconds("https://other.example.com/") == 0
+
+
+def test_domain_scheduler_in_flight_cap(make_settings):
+    scheduler = make_client(
+        make_settings, requests_per_second=0, max_in_flight=1
+    ).domain_scheduler
+
+    assert scheduler.try_acquire(URL, "a") == 0
+    assert scheduler.try_acquire(URL, "b") > 0
+    assert scheduler.get_wait_seconds(URL) > 0
+
+    scheduler.release(URL, "a")
+    assert scheduler.try_acquire(URL, "b") == 0
+
+
+def test_domain_scheduler_lease_expiry(make_settings):
+    scheduler = make_client(
+        make_settings, requests_per_second=0, max_in_flight=1
+    ).domain_scheduler
+
+    assert scheduler.try_acquire(URL, "crashed") == 0  # Never released
+    assert scheduler.try_acquire(URL, "b") > 0
+
+    time.sleep(1.1)
+    assert scheduler.try_acquire(URL, "b") == 0
@@ -0,0 +1,86 @@
+import pathlib
+
+import pytest
+
+from web_queue.utils import cpu_tasks
+from web_queue.utils.html_backend import HTMLBackendName, get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_to_str import htmls_to_str
+
+GOLDEN_PATH = pathlib.Path(__file__).parent / "golden"
+
+GOLDEN_CASES = [
+    ("novel", "div#novel_honbun"),
+    ("article", "div.article-body"),
+]
+
+BACKENDS: list[HTMLBackendName] = ["html.parser", "selectolax"]
+
+
+@pytest.mark.parametrize("backend_name", BACKENDS)
+@pytest.mark.parametrize("name,css_selector", GOLDEN_CASES)
+def test_backend_matches_golden_markdown(
+    backend_name: HTMLBackendName, name: str, css_selector: str
+):
+    if backend_name == "selectolax":
+        pytest.importorskip("selectolax")
+    backend = get_html_backend(backend_name)
+
+    html = (GOLDEN_PATH / f"{name}.html").read_text()
+    cleaned_html = backend.clean_html(html)
+    markdown = htmls_to_str(backend.select_html(cleaned_html, css_selector))
+
+    assert markdown + "\n" == (GOLDEN_PATH / f"{name}.md").read_text()
+
+
+@pytest.mark.parametrize("backend_name", BACKENDS)
+@pytest.mark.parametrize("name,css_selector", GOLDEN_CASES)
+def test_document_matches_reparse_pipeline(
+    backend_name: HTMLBackendName, name: str, css_selector: str
+):
+    if backend_name == "selectolax":
+        pytest.importorskip("selectolax")
+    backend = get_html_backend(backend_name)
+
+    html = (GOLDEN_PATH / f"{name}.html").read_text()
+    document = HTMLDocument(html, backend=backend).prepare()
+
+    assert document.cleaned_html == backend.clean_html(html)
+    assert document.select_html(css_selector) == backend.select_html(
+        document.cleaned_html, css_selector
+    )
+
+
+@pytest.mark.parametrize("backend_name", BACKENDS)
+@pytest.mark.parametrize("name,css_selector", GOLDEN_CASES)
+def test_worker_selections_match_document(
+    backend_name: HTMLBackendName, name: str, css_selector: str
+):
+    if backend_name == "selectolax":
+        pytest.importorskip("selectolax")
+    backend = get_html_backend(backend_name)
+
+    html = (GOLDEN_PATH / f"{name}.html").read_text()
+    cleaned_html, cleaned_html_md5, texts, markdowns = cpu_tasks.clean_html(
+        html.encode("utf-8"),
+        backend_name,
+        css_selectors=[css_selector, "title"],
+        markdown_css_selectors=[css_selector],
+    )
+    document = HTMLDocument.from_cleaned_html(
+        cleaned_html,
+        backend=backend,
+        cleaned_html_md5=cleaned_html_md5,
+        texts=texts,
+        markdowns=markdowns,
+    )
+    reparsed = HTMLDocument.from_cleaned_html(cleaned_html, backend=backend)
+
+    assert document.has_texts([css_selector, "title"])
+    assert document.has_markdown(css_selector)
+    assert not document.has_markdown("title")
+    assert document.select_text("title") == reparsed.select_text("title")
+    assert document.select_markdown(css_selector) == (
+        reparsed.select_markdown(css_selector)
+    )
+    assert "cleaned_tree" not in vars(document)  # Never re-parsed
@@ -0,0 +1,68 @@
+import bs4
+import pytest
+
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_cleaner import HTMLCleaner
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_stream_cleaner import clean_html_streaming
+
+HTMLS = [
+    "<html><body><p>Hello</p><!-- comment --></body></html>",
+    '<div class="a b c" id="x" style="color: red" data-x="1"><p class="d">Hi</p></div>',
+    "<body><span><p>gone with its parent</p></span><p>kept</p></body>",
+    "<div><script>var a = 1;</script><style>p {}</style><iframe></iframe>Text</div>",
+    '<!DOCTYPE html><html><head><title>T</title></head><body class="">'
+    + "<ul><li><a href='/x' class='link active'>A</a></li></ul>"
+    + "<table><tr><td><b>bold</b> plain</td></tr></table></body></html>",
+    "<article><h1>Title</h1><!--a--><p>One<br>Two</p><img src='x.png'></article>",
+    "Loose text <p>and a paragraph</p><![CDATA[data]]>",
+]
+
+
+def clean_multi_pass(html: str) -> str:
+    soup = bs4.BeautifulSoup(html, "html.parser")
+    soup = HTMLCleaner.clean_all_comments(soup)
+    soup = HTMLCleaner.keep_only_tags(soup)
+    soup = HTMLCleaner.clean_tags(soup)
+    soup = HTMLCleaner.clean_attributes(soup)
+    soup = HTMLCleaner.keep_first_class_name(soup)
+    return str(soup)
+
+
+@pytest.mark.parametrize("html", HTMLS)
+def test_clean_in_one_pass_matches_multi_pass(html: str):
+    assert str(HTMLCleaner.clean_in_one_pass(html)) == clean_multi_pass(html)
+
+
+STREAMING_HTMLS = HTMLS + [
+    "\n <!doctype html>\n<html><body><p> a &amp; b &#150; &nbsp; &bogus; </p>"
+    + "<br/><br><br/>x<br></br></body></html>\n",
+    "<p>a<!--c-->   <!--d-->b</p><p>\xa0</p><div class='  x  '>y</div>",
+    "<div><p>unclosed<div>nested</p>after</div></div></div>"
+    + "<p id=\"q\" id='r' CLASS='b'>t</p>",
+    "<p id='a\"b'>c</p><p id>g</p><pre>  </pre><p>   </p><![CDATA[a> <b]]>",
+]
+
+
+@pytest.mark.parametrize("chunk_size", [1, 7, 64 * 1024])
+@pytest.mark.parametrize("html", STREAMING_HTMLS)
+def test_streaming_cleaner_matches_tree_cleaner(html: str, chunk_size: int):
+    assert clean_html_streaming(
+        html, chunk_size=chunk_size
+    ) == HTMLCleaner.clean_as_main_content_html_str(html)
+
+
+def test_streaming_cleaner_buffer_ceiling():
+    with pytest.raises(ValueError):
+        clean_html_streaming("<p>a</p><!--" + "x" * 2048, max_buffer_length=1024)
+
+
+def test_streaming_clean_falls_back_to_tree():
+    html = "<p>a</p><!--" + "x" * 2048
+    document = HTMLDocument.from_html(
+        html,
+        backend=get_html_backend("html.parser"),
+        streaming_min_length=1,
+        streaming_max_buffer_length=1024,
+    )
+    assert document.cleaned_html == HTMLCleaner.clean_as_main_content_html_str(html)
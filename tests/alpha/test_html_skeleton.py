@@ -0,0 +1,42 @@
+import pathlib
+
+import bs4
+
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_skeleton import count_tokens, skeletonize_html
+
+GOLDEN_PATH = pathlib.Path(__file__).parent / "golden"
+MODEL_NAME = "gpt-4.1-nano"
+
+
+def long_novel_html() -> str:
+    html = (GOLDEN_PATH / "novel.html").read_text()
+    line = "<p>" + "雨は静かに降り続いていた。" * 40 + "</p>\n"
+    return html.replace('<p id="L1">', line * 2000 + '<p id="L1">')
+
+
+def test_skeleton_fits_budget_and_keeps_structure():
+    cleaned_html = get_html_backend("html.parser").clean_html(long_novel_html())
+
+    skeleton = skeletonize_html(cleaned_html, model_name=MODEL_NAME, token_budget=1000)
+
+    assert skeleton.tokens_before == count_tokens(cleaned_html, MODEL_NAME)
+    assert skeleton.tokens_after == count_tokens(skeleton.html, MODEL_NAME)
+    assert skeleton.tokens_after <= 1000 < skeleton.tokens_before
+    soup = bs4.BeautifulSoup(skeleton.html, "html.parser")
+    assert soup.select_one("h1.p-novel__title").text == "第5話 雨の夜"
+    assert soup.select_one("div.p-novel__author").text == "作者: 山田"
+    assert soup.select_one("div#novel_honbun p#L4") is not None
+    assert "<!-- 1998 more <p> -->" in skeleton.html
+    assert "…" in soup.select_one("div#novel_honbun p").text
+
+
+def test_skeleton_keeps_html_within_budget():
+    cleaned_html = get_html_backend("html.parser").clean_html(long_novel_html())
+
+    for token_budget in (0, count_tokens(cleaned_html, MODEL_NAME)):
+        skeleton = skeletonize_html(
+            cleaned_html, model_name=MODEL_NAME, token_budget=token_budget
+        )
+        assert skeleton.html == cleaned_html
+        assert skeleton.tokens_after == skeleton.tokens_before
@@ -0,0 +1,62 @@
+import time
+
+from web_queue.utils.memory_cache import MemoryCache
+
+
+def test_memory_cache_lru_eviction():
+    cache: MemoryCache[str] = MemoryCache(max_bytes=30, ttl=-1)
+    cache.set("a", "A", size=10)
+    cache.set("b", "B", size=10)
+    cache.set("c", "C", size=10)
+    assert cache.get("a") == "A"  # Now the most recently used
+
+    cache.set("d", "D", size=10)
+
+    assert cache.get("b") is None
+    assert [cache.get(key) for key in "acd"] == ["A", "C", "D"]
+    assert cache.stats.evictions == 1
+
+
+def test_memory_cache_ttl():
+    cache: MemoryCache[str] = MemoryCache(max_bytes=100, ttl=0.05)
+    cache.set("a", "A", size=1)
+    cache.set("b", "B", size=1, ttl=60)  # Capped by the cache's ttl
+    cache.set("c", "C", size=1, ttl=-1)  # Backing entry never expires
+    assert cache.get("a") == "A"
+
+    time.sleep(0.1)
+
+    assert [cache.get(key) for key in "abc"] == [None, None, None]
+    stats = cache.stats
+    assert stats.expirations == 3
+    assert stats.entries == 0 and stats.size_bytes == 0
+
+    never_expiring: MemoryCache[str] = MemoryCache(max_bytes=100, ttl=-1)
+    never_expiring.set("a", "A", size=1, ttl=0.05)  # Expires with the backing entry
+    time.sleep(0.1)
+    assert never_expiring.get("a") is None
+
+
+def test_memory_cache_byte_accounting():
+    cache: MemoryCache[str] = MemoryCache(max_bytes=100, ttl=-1)
+    cache.set("a", "A", size=40)
+    cache.set("b", "B", size=30)
+    assert cache.stats.size_bytes == 70
+
+    cache.set("a", "AA", size=10)  # Replaced, not added
+    assert cache.stats.size_bytes == 40
+
+    cache.set("huge", "H", size=101)  # Larger than the whole cache
+    assert cache.get("huge") is None
+    assert cache.stats.size_bytes == 40
+
+    cache.delete("b")
+    stats = cache.stats
+    assert stats.entries == 1 and stats.size_bytes == 10
+
+
+def test_memory_cache_disabled():
+    for cache in (MemoryCache(max_bytes=0, ttl=60), MemoryCache(max_bytes=100, ttl=0)):
+        cache.set("a", "A", size=1)
+        assert not cache.enabled
+        assert cache.get("a") is None
@@ -0,0 +1,42 @@
+import asyncio
+import types
+
+from web_queue.utils.page_readiness import PageReadiness
+
+
+class StandInPage:
+    """A page whose DOM keeps changing, it never settles by mutations."""
+
+    def __init__(self, *, mutation_idle_ms: float = 0.0):
+        self.mutation_idle_ms = mutation_idle_ms
+
+    async def evaluate(self, script: str):
+        return [self.mutation_idle_ms, 100]
+
+
+def request(resource_type: str):
+    return types.SimpleNamespace(resource_type=resource_type)
+
+
+def test_page_readiness_wait_capped_at_base_delay():
+    readiness = PageReadiness(StandInPage(), poll_interval=0.01)  # type: ignore
+
+    waited = asyncio.run(readiness.wait(0.4))
+
+    assert 0.4 <= waited < 0.55  # Not the jitter ratio's 0.6
+    assert readiness.waited_seconds == waited
+
+
+def test_page_readiness_ignores_long_lived_requests():
+    page = StandInPage(mutation_idle_ms=10_000)
+    readiness = PageReadiness(
+        page, quiet_seconds=0.05, poll_interval=0.01  # type: ignore[arg-type]
+    )
+    readiness._on_request_started(request("eventsource"))  # type: ignore
+    readiness._on_request_started(request("websocket"))  # type: ignore
+    readiness._last_network_at -= 1
+
+    assert asyncio.run(readiness.wait(2.0)) < 1.0
+
+    readiness._on_request_started(request("fetch"))  # type: ignore
+    assert asyncio.run(readiness.wait(0.2)) >= 0.2  # Busy until the cap
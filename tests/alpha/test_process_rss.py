@@ -0,0 +1,39 @@
+import os
+import signal
+import subprocess
+import sys
+import time
+import uuid
+
+import pytest
+
+from web_queue.utils.process_rss import (
+    PROC_PATH,
+    find_pid_by_arg,
+    get_process_tree_rss,
+)
+
+
+@pytest.mark.skipif(not PROC_PATH.is_dir(), reason="Needs procfs")
+def test_process_tree_found_by_arg():
+    arg = f"--web-queue-test={uuid.uuid4().hex}"
+    # The child inherits the argument, its parent is still the one found
+    code = "import os, sys, time; os.fork(); time.sleep(30)"
+    process = subprocess.Popen(
+        [sys.executable, "-c", code, arg], start_new_session=True
+    )
+    try:
+        pid = None
+        for _ in range(50):
+            if (pid := find_pid_by_arg(arg)) is not None:
+                break
+            time.sleep(0.1)
+        assert pid == process.pid
+
+        rss = get_process_tree_rss(process.pid)
+        assert rss is not None and rss > 0
+        assert find_pid_by_arg(f"--web-queue-test={uuid.uuid4().hex}") is None
+    finally:
+        os.killpg(process.pid, signal.SIGKILL)
+        process.wait()
+    assert get_process_tree_rss(process.pid) is None
@@ -0,0 +1,33 @@
+import asyncio
+
+from web_queue.client import WebQueueClient
+from web_queue.types.html_content import HTMLContent
+from web_queue.types.web_fetch_result import FetchSource
+
+
+def test_result_cache_skipped_for_artifacts(make_settings):
+    client = WebQueueClient(make_settings())
+    url = "https://example.com/n1234/5/"
+    fetched: list[str] = []
+
+    async def _fetch(url, **kwargs) -> HTMLContent:
+        fetched.append(kwargs["artifact_capture"])
+        return HTMLContent(title="fetched")
+
+    client._fetch = _fetch  # type: ignore[method-assign]
+
+    async def main():
+        await client.set_cached_result(
+            client.get_result_cache_key(url, http_first=False),
+            HTMLContent(title="cached"),
+        )
+        cached = await client.fetch(url)
+        rendered = await client.fetch(url, artifact_capture="screenshot")
+        return cached, rendered
+
+    cached, rendered = asyncio.run(main())
+
+    assert cached.title == "cached"
+    assert cached.fetch_stats.source == FetchSource.RESULT_CACHE
+    assert rendered.title == "fetched"
+    assert fetched == ["screenshot"]
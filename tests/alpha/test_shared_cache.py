@@ -0,0 +1,87 @@
+import pathlib
+import random
+
+import diskcache
+import fakeredis
+import redis.exceptions
+
+from web_queue.utils.shared_cache import (
+    ChunkedRedisCache,
+    ContentAddressedDirectoryCache,
+    ReadThroughCache,
+)
+
+VALUE = random.Random(0).randbytes(5 * 1024)  # Five distinct 1 KiB chunks
+
+
+class UnavailableRedis(fakeredis.FakeRedis):
+    def execute_command(self, *args, **kwargs):
+        raise redis.exceptions.ConnectionError("Redis is down")
+
+
+def test_chunked_redis_cache_split_and_reassembly():
+    redis_client = fakeredis.FakeRedis()
+    cache = ChunkedRedisCache(redis_client, namespace="test", chunk_bytes=1024)
+
+    cache.set("small", b"inline", ex=60)
+    cache.set("large", VALUE, ex=60)
+
+    assert cache.get("small") == b"inline"
+    assert cache.get("large") == VALUE
+    assert len(list(redis_client.scan_iter(match="test:chunk:*"))) == 5
+    assert sorted(cache.iterkeys()) == ["large", "small"]
+    assert 0 < (cache.get_ttl("large") or 0) <= 60
+
+    cache.set("large", VALUE[:2048])  # Previous chunks expire shortly
+    assert cache.get("large") == VALUE[:2048]
+    assert cache.get_ttl("large") is None
+
+    cache.set("torn", VALUE)
+    redis_client.delete(next(redis_client.scan_iter(match="test:chunk:*:1:torn")))
+    assert cache.get("torn") is None  # A chunk expired, never a partial value
+
+
+def test_content_addressed_directory_cache_split_and_reassembly(
+    tmp_path: pathlib.Path,
+):
+    cache = ContentAddressedDirectoryCache(tmp_path, chunk_bytes=1024)
+
+    cache.set("a", VALUE, ex=60)
+    cache.set("b", VALUE[:1024])  # Shares its only chunk with "a"
+
+    assert cache.get("a") == VALUE
+    assert cache.get("b") == VALUE[:1024]
+    assert len(list(cache.objects_path.glob("*/*"))) == 5
+    assert sorted(cache.iterkeys()) == ["a", "b"]
+    assert cache.get_ttl("b") is None
+
+    cache.delete("a")
+    assert cache.get("a") is None
+    assert cache.prune(grace_seconds=0) == 4
+    assert cache.get("b") == VALUE[:1024]
+
+
+def test_read_through_cache(tmp_path: pathlib.Path):
+    shared = ChunkedRedisCache(
+        fakeredis.FakeRedis(), namespace="test", chunk_bytes=1024
+    )
+    shared.set("a", VALUE)
+    cache = ReadThroughCache(
+        local=diskcache.Cache(str(tmp_path / "local")), shared=shared, local_ttl=60
+    )
+
+    assert cache.get("a") == VALUE  # Kept locally
+    shared.delete("a")
+    assert cache.get("a") == VALUE
+
+    cache.set("b", b"both")
+    assert shared.get("b") == b"both"
+
+    cache.shared = ChunkedRedisCache(
+        UnavailableRedis(), namespace="test", chunk_bytes=1024
+    )
+    cache.set("c", b"local only")  # Fails open to the local copy
+    assert cache.get("c") == b"local only"
+    assert cache.get("missing") is None
+    cache.delete("b")
+    assert cache.local.get("b") is None
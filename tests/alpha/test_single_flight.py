@@ -0,0 +1,45 @@
+import asyncio
+
+from web_queue.client import WebQueueClient
+
+
+def test_single_flight_coalesces_in_process(make_settings):
+    single_flight = WebQueueClient(make_settings()).single_flight
+    calls: list[str] = []
+
+    async def work() -> str:
+        calls.append("work")
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        return await asyncio.gather(*(single_flight.run("key", work) for _ in range(3)))
+
+    assert asyncio.run(main()) == ["result"] * 3
+    assert calls == ["work"]
+    assert single_flight.hits["in_process"] == 2
+
+
+def test_single_flight_leader_cancellation_spares_followers(make_settings):
+    single_flight = WebQueueClient(make_settings()).single_flight
+    calls: list[str] = []
+
+    async def work() -> str:
+        calls.append("work")
+        await asyncio.sleep(0.05)
+        return "result"
+
+    async def main():
+        leader = asyncio.create_task(single_flight.run("key", work))
+        await asyncio.sleep(0.01)
+        follower = asyncio.create_task(single_flight.run("key", work))
+        await asyncio.sleep(0.01)
+        leader.cancel()
+        await asyncio.gather(leader, return_exceptions=True)
+        return leader, await follower
+
+    leader, result = asyncio.run(main())
+
+    assert leader.cancelled()
+    assert result == "result"
+    assert calls == ["work", "work"]  # The follower took over
@@ -0,0 +1,131 @@
+import asyncio
+import pathlib
+
+from web_queue.client import WebQueueClient
+from web_queue.types.html_metadata_response import HTMLMetadataResponse
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.site_template import get_url_pattern, learn_site_template
+
+GOLDEN_PATH = pathlib.Path(__file__).parent / "golden"
+NOVEL_METADATA = HTMLMetadataResponse(
+    title="第5話 雨の夜",
+    author="山田",
+    chapter_id="n1234",
+    chapter_number="5",
+    content_body_css_selector="div#novel_honbun",
+)
+
+
+def novel_html(chapter_number: int = 5) -> str:
+    html = (GOLDEN_PATH / "novel.html").read_text()
+    return html.replace("第5話", f"第{chapter_number}話")
+
+
+def test_learn_site_template():
+    cleaned_html = get_html_backend("html.parser").clean_html(novel_html())
+
+    template = learn_site_template(
+        cleaned_html, "https://www.example.com/n1234/5/", NOVEL_METADATA
+    )
+
+    assert template is not None
+    assert (template.domain, template.url_pattern) == ("example.com", "/*/*/")
+    assert template.title and template.title.css_selector == "h1.p-novel__title"
+    assert template.author and template.author.css_selector == (
+        "div.p-novel__author > a"
+    )
+    assert template.author.pattern == r"^作者:\ (.+)$"
+    assert template.chapter_id and template.chapter_id.url_segment == 0
+    assert template.chapter_number and template.chapter_number.url_segment == 1
+    assert get_url_pattern("https://example.com/n1234/") == ("example.com", "/*/")
+
+
+def test_site_template_extracts_next_pages(make_settings):
+    settings = make_settings(
+        WEB_SITE_TEMPLATES_ENABLED=True, WEB_SITE_TEMPLATE_MIN_BODY_LENGTH=20
+    )
+    client = WebQueueClient(settings)
+    ai_calls: list[str] = []
+
+    async def extract_html_metadata(html: str, **kwargs) -> HTMLMetadataResponse:
+        ai_calls.append(html)
+        return NOVEL_METADATA
+
+    client.ai._extract_html_metadata = extract_html_metadata  # type: ignore
+
+    def document(html: str) -> HTMLDocument:
+        return HTMLDocument.from_html(html, backend=settings.html_backend)
+
+    async def main():
+        # Learned from the AI's answer
+        await client.ai.as_html_metadata(
+            document(novel_html()), url="https://example.com/n1234/5/"
+        )
+        metadata = await client.ai.as_html_metadata(
+            document(novel_html(6)), url="https://example.com/n1234/6/"
+        )
+        missing_body = await client.site_templates.extract(
+            "https://example.com/n1234/7/",
+            document(novel_html(7).replace('id="novel_honbun"', "")),
+        )
+        return metadata, missing_body
+
+    metadata, missing_body = asyncio.run(main())
+
+    assert len(ai_calls) == 1
+    assert metadata is not None
+    assert metadata.title == "第6話 雨の夜"
+    assert metadata.author == "山田"
+    assert (metadata.chapter_id, metadata.chapter_number) == ("n1234", "6")
+    assert metadata.content_body_css_selector == "div#novel_honbun"
+    assert missing_body is None
+    stats = client.site_templates.get_stats("https://example.com/n1234/8/")
+    assert (stats.hits, stats.failures) == (1, 1)
+
+
+def test_structure_cache_rederives_values(make_settings):
+    settings = make_settings(
+        OPENAI_STRUCTURE_CACHE_ENABLED=True, WEB_SITE_TEMPLATE_MIN_BODY_LENGTH=20
+    )
+    ai = WebQueueClient(settings).ai
+    ai_calls: list[str] = []
+
+    async def extract_html_metadata(html: str, **kwargs) -> HTMLMetadataResponse:
+        ai_calls.append(html)
+        return HTMLMetadataResponse(
+            title="Faster HTML parsing",
+            author="Ada",
+            created_date="2024-05-01T00:00:00+08:00",
+            content_body_css_selector="div.article-body",
+        )
+
+    ai._extract_html_metadata = extract_html_metadata  # type: ignore[method-assign]
+    html = (GOLDEN_PATH / "article.html").read_text()
+    next_html = (
+        html.replace("Faster HTML parsing", "Slower XML parsing")
+        .replace(">Ada<", ">Grace<")
+        .replace("2024-05-01", "2024/06/02 09:30")
+        .replace("First!", "Second!")
+        .replace("<li>Less CPU per page</li>", "<li>One</li><li>Two</li>")
+    )
+
+    async def main():
+        outputs = []
+        for url, page_html in (
+            ("https://example.com/posts/1", html),
+            ("https://example.com/posts/2", next_html),
+            ("https://example.org/posts/2", next_html),  # Another site
+        ):
+            document = HTMLDocument.from_html(page_html, backend=settings.html_backend)
+            outputs.append(await ai.as_html_metadata(document, url=url))
+        return outputs
+
+    output, next_output, _ = asyncio.run(main())
+
+    assert len(ai_calls) == 2
+    assert output is not None and next_output is not None
+    assert next_output.title == "Slower XML parsing"
+    assert next_output.author == "Grace"
+    assert next_output.created_date == "2024-06-02T09:30:00+08:00"
+    assert next_output.content_body_css_selector == "div.article-body"
@@ -0,0 +1,73 @@
+import pathlib
+
+import bs4
+import html_to_markdown
+import pytest
+
+from web_queue.utils.html_backend import get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.tree_to_markdown import UnsupportedMarkup, tree_to_markdown
+
+GOLDEN_PATH = pathlib.Path(__file__).parent / "golden"
+
+HTMLS = [
+    "<div><p>One  two\tthree</p><p> Four &amp; <a>five</a> </p>tail</div>",
+    "<div>a<br/>b<br/><br/> c<p>d<br/></p><p></p>e<div></div>f</div>",
+    "<div><h1>\n  Title x\n  </h1><h3>a<br/>b</h3>x<h2><br/></h2>y</div>",
+    "<div><ul><li>a</li><li> b <a>c</a></li><li>d<ul><li>e<ol><li>f</li>"
+    + "<li>g<ul><li>h</li></ul></li></ol></li></ul></li><li></li></ul>after</div>",
+    "<div><ol><li><p>a</p><p>b</p></li><li><div>c</div></li></ol><p>d</p></div>",
+    "<div><p>a</p><hr/><p>b</p>c<hr/><h2>d</h2><hr/></div>",
+    "<div>x<table><tbody><tr><th>A</th><th> B </th></tr><tr><td>1</td><td></td>"
+    + "</tr></tbody></table><table><tr><td>2</td></tr></table>y</div>",
+    "<article><section>a<main>b</main></section><article> c</article></article>",
+    "<div>\xa0n\xa0<a>m</a>　o\r\np\n\nq</div>",
+]
+
+UNSUPPORTED_HTMLS = [
+    "<div><p>a<div>block in a paragraph</div></p></div>",
+    '<div><a href="/x">link</a></div>',
+    "<div><ul>text<li>a</li></ul></div>",
+    "<div><table><tr><td>a<br/>b</td></tr></table></div>",
+    "<div><section>a\nb</section></div>",
+]
+
+
+def convert(html: str) -> str:
+    content = html_to_markdown.convert(html).strip()
+    return "\n".join(line.rstrip() for line in content.splitlines())
+
+
+def parse_tag(html: str) -> bs4.Tag:
+    tag = bs4.BeautifulSoup(html, "html.parser").contents[0]
+    assert isinstance(tag, bs4.Tag)
+    return tag
+
+
+@pytest.mark.parametrize("html", HTMLS)
+def test_tree_to_markdown_matches_converter(html: str):
+    tag = parse_tag(html)
+    assert tree_to_markdown(tag) == convert(str(tag))
+
+
+@pytest.mark.parametrize("html", UNSUPPORTED_HTMLS)
+def test_tree_to_markdown_rejects_unsupported_markup(html: str):
+    with pytest.raises(UnsupportedMarkup):
+        tree_to_markdown(parse_tag(html))
+
+
+@pytest.mark.parametrize(
+    "name,css_selector",
+    [("novel", "div#novel_honbun"), ("article", "div.article-body")],
+)
+def test_document_markdown_matches_golden(name: str, css_selector: str):
+    backend = get_html_backend("html.parser")
+    html = (GOLDEN_PATH / f"{name}.html").read_text()
+    document = HTMLDocument(html, backend=backend).prepare()
+
+    for node in backend.select(document.cleaned_tree, css_selector):
+        tree_to_markdown(node)  # Converted directly, not through the fallback
+    markdown = document.select_markdown(css_selector)
+
+    assert markdown is not None
+    assert markdown + "\n" == (GOLDEN_PATH / f"{name}.md").read_text()
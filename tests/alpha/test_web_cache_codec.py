@@ -0,0 +1,53 @@
+import json
+
+import pytest
+import zstandard
+
+from web_queue.types.web_cache_entry import WebCacheEntry
+from web_queue.utils.compression import compress
+from web_queue.utils.web_cache_codec import (
+    decode_web_cache_entry,
+    encode_web_cache_entry,
+)
+
+HTML = (
+    "<html><body><h1>第5話 雨の夜</h1>"
+    + "<p>その夜、雨は静かに降り続いていた。</p></body></html>"
+)
+
+
+def test_web_cache_codec_round_trip():
+    cache_entry = WebCacheEntry(html=HTML, etag='"abc"', fetched_at=1.0)
+
+    assert decode_web_cache_entry(encode_web_cache_entry(cache_entry)) == cache_entry
+
+
+def test_web_cache_codec_dictionary():
+    samples = [
+        f"<html><head><title>Page {i}</title></head><body><div id='main'>"
+        f"<p>Paragraph {i * 7} of the chapter</p></div></body></html>".encode()
+        for i in range(512)
+    ]
+    dictionary = zstandard.train_dictionary(1024, samples)
+    cache_entry = WebCacheEntry(html=HTML, fetched_at=1.0)
+
+    data = encode_web_cache_entry(cache_entry, dictionary=dictionary)
+
+    assert (
+        decode_web_cache_entry(
+            data, get_dictionary={dictionary.dict_id(): dictionary}.get
+        )
+        == cache_entry
+    )
+    with pytest.raises(ValueError):
+        decode_web_cache_entry(data)
+
+
+def test_web_cache_codec_legacy_base64():
+    legacy_data = json.dumps(compress(HTML, format="zstd")).encode("utf-8")
+
+    cache_entry = decode_web_cache_entry(legacy_data)
+
+    assert cache_entry.html == HTML
+    assert not cache_entry.can_revalidate
+    assert "fetched_at" not in cache_entry.model_fields_set  # Left to estimate
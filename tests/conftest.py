@@ -1,7 +1,13 @@
+import pathlib
+import typing
+
 import agents
+import fakeredis
 import openai
 import pytest
 
+from web_queue.client.config import Settings
+
 
 @pytest.fixture(scope="module")
 def model_name():
@@ -31,3 +37,25 @@ def agent():
 @pytest.fixture(scope="module")
 def agents_run_config():
     return agents.RunConfig(tracing_disabled=True)
+
+
+@pytest.fixture
+def make_settings(tmp_path: pathlib.Path) -> typing.Callable[..., Settings]:
+    """Settings on a fake Redis, with caches in `tmp_path` and no process pool."""
+
+    def _make_settings(**kwargs: typing.Any) -> Settings:
+        settings = Settings(
+            **{
+                "CPU_PROCESS_POOL_SIZE": 0,
+                "WEB_CACHE_PATH": str(tmp_path / "web.cache"),
+                "RESULT_CACHE_PATH": str(tmp_path / "result.cache"),
+                "COMPRESSED_BASE64_CACHE_PATH": str(
+                    tmp_path / "compressed_base64.cache"
+                ),
+                **kwargs,
+            }
+        )
+        settings.__dict__["redis_client"] = fakeredis.FakeRedis()
+        return settings
+
+    return _make_settings
@@ -0,0 +1,40 @@
+"""Train per-domain zstd dictionaries from the cached pages."""
+
+import argparse
+import typing
+
+import rich.console
+import rich.table
+
+from web_queue.client import Settings, WebQueueClient
+
+console = rich.console.Console()
+
+
+def main(groups: typing.Optional[typing.List[str]] = None):
+    wq_client = WebQueueClient(Settings())
+    infos = wq_client.zstd_dictionaries.train_from_cache(groups or None)
+
+    table = rich.table.Table("Group", "Dict ID", "Version", "Samples", "Sample bytes")
+    for info in infos:
+        table.add_row(
+            info.group,
+            str(info.dict_id),
+            str(info.version),
+            str(info.sample_count),
+            f"{info.sample_bytes:,}",
+        )
+    console.print(table)
+    if not wq_client.settings.WEB_CACHE_ZSTD_DICTIONARY_ENABLED:
+        console.print(
+            "[yellow]Set WEB_CACHE_ZSTD_DICTIONARY_ENABLED=true "
+            + "to compress new entries with these dictionaries[/yellow]"
+        )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser()
+    parser.add_argument("groups", nargs="*", help="Domain groups, default all")
+    args = parser.parse_args()
+
+    main(args.groups)
@@ -1,5 +1,6 @@
 import asyncio
 import logging
+import threading
 import typing
 
 import fastapi
@@ -7,10 +8,13 @@ import huey
 import huey.exceptions
 import logfire
 import logging_bullet_train as lbt
+import pydantic
 from huey.api import Task
 
 from web_queue.client import Settings, WebQueueClient
-from web_queue.types.fetch_html_message import FetchHTMLMessage
+from web_queue.types.artifact_capture import ArtifactCapture
+from web_queue.types.fetch_html_message import FetchHTMLBatchMessage, FetchHTMLMessage
+from web_queue.types.fetch_many_result import FetchManyResult
 from web_queue.types.html_content import HTMLContent
 from web_queue.types.message import MessageStatus, MessageUpdate
 from web_queue.types.model_var import ModelVar
@@ -34,6 +38,54 @@ huey_app = huey.RedisExpireHuey(
     expire_time=24 * 60 * 60,  # 24 hours
 )
 
+# Each worker thread keeps its own event loop, so browsers pooled by
+# `wq_client.browser_pool` survive across tasks instead of one launch per URL.
+_thread_local = threading.local()
+
+
+def get_event_loop() -> asyncio.AbstractEventLoop:
+    loop: asyncio.AbstractEventLoop | None = getattr(_thread_local, "loop", None)
+    if loop is None or loop.is_closed():
+        loop = asyncio.new_event_loop()
+        _thread_local.loop = loop
+    asyncio.set_event_loop(loop)
+    return loop
+
+
+# The client's executors are shared by every worker of the process, they are
+# shut down when the last worker stops.
+_running_workers = 0
+_running_workers_lock = threading.Lock()
+
+
+@huey_app.on_startup()
+def count_worker() -> None:
+    global _running_workers
+
+    with _running_workers_lock:
+        _running_workers += 1
+    return None
+
+
+@huey_app.on_shutdown()
+def close_event_loop() -> None:
+    global _running_workers
+
+    loop: asyncio.AbstractEventLoop | None = getattr(_thread_local, "loop", None)
+    try:
+        if loop is not None and not loop.is_closed():
+            try:
+                loop.run_until_complete(wq_client.close())
+            finally:
+                loop.close()
+    finally:
+        with _running_workers_lock:
+            _running_workers -= 1
+            is_last_worker = _running_workers <= 0
+        if is_last_worker:
+            wq_client.shutdown()
+    return None
+
 
 def retrieve_result(task_id: str) -> typing.Optional[typing.Text]:
     try:
@@ -74,10 +126,29 @@ def fetch_html(
 
     message = FetchHTMLMessage.from_any(message)
     message.id = task.id
-    message.status = MessageStatus.RUNNING
 
-    loop = asyncio.new_event_loop()
-    asyncio.set_event_loop(loop)
+    loop = get_event_loop()
+
+    # Step aside while the domain is busy so the worker picks up tasks for
+    # idle domains first, RetryTask does not consume the task's retries.
+    # Finished results are served without touching the domain.
+    if wq_settings.WEB_DOMAIN_SCHEDULER_ENABLED:
+        result_cache_key = wq_client.get_result_cache_key(**message.data.model_dump())
+        has_result = (
+            message.data.artifact_capture == ArtifactCapture.NONE
+            and loop.run_until_complete(wq_client.get_cached_result(result_cache_key))
+            is not None
+        )
+        wait = (
+            0.0
+            if has_result
+            else wq_client.domain_scheduler.get_wait_seconds(message.data.url)
+        )
+        if wait > 0:
+            logger.info(f"Domain busy, deferring task {task.id} by {wait:.2f}s")
+            raise huey.exceptions.RetryTask(delay=max(wait, 1.0))
+
+    message.status = MessageStatus.RUNNING
 
     update_message_func = wq_client.messages.wrap_update_message(message.id, message)
 
@@ -121,7 +192,92 @@ def fetch_html(
             )
         )
 
-    finally:
-        loop.close()
+    return None
+
+
+@huey_app.task(
+    retries=0,
+    expires=24 * 60 * 60,
+    context=True,
+)
+def fetch_html_batch(
+    message: typing.Union["FetchHTMLBatchMessage", str, bytes], task: Task
+) -> typing.Optional[typing.Text]:
+    """Fetch many URLs in one worker invocation for bulk backfills.
+
+    Returns a JSON list of `FetchManyResult`, failed URLs carry an `error`.
+    """
+    from web_queue.types.fetch_html_message import FetchHTMLBatchMessage
+
+    global wq_client
+
+    message = FetchHTMLBatchMessage.from_any(message)
+    message.id = task.id
+    message.status = MessageStatus.RUNNING
+
+    loop = get_event_loop()
+
+    update_message_func = wq_client.messages.wrap_update_message(message.id, message)
+
+    async def _fetch_all() -> typing.List[FetchManyResult]:
+        fetch_kwargs = message.data.model_dump(
+            exclude={"urls", "concurrency", "per_domain_concurrency"}
+        )
+        results: typing.List[FetchManyResult] = []
+        async for result in wq_client.fetch_many(
+            message.data.urls,
+            concurrency=message.data.concurrency,
+            per_domain_concurrency=message.data.per_domain_concurrency,
+            **fetch_kwargs,
+        ):
+            results.append(result)
+            update_message_func(
+                MessageUpdate(
+                    total_steps=len(message.data.urls),
+                    completed_steps=len(results),
+                    message_text=f"Fetched {len(results)} of "
+                    + f"{len(message.data.urls)} URLs",
+                )
+            )
+        return results
+
+    try:
+        logger.info(f"Fetching {len(message.data.urls)} URLs in batch")
+        update_message_func(
+            MessageUpdate(
+                total_steps=len(message.data.urls),
+                completed_steps=0,
+                status=MessageStatus.RUNNING,
+                message_text="Starting to fetch HTML batch...",
+            )
+        )
+
+        results = loop.run_until_complete(_fetch_all())
+        failed_count = sum(1 for r in results if r.error is not None)
+
+        update_message_func(
+            MessageUpdate(
+                total_steps=len(message.data.urls),
+                completed_steps=len(message.data.urls),
+                status=MessageStatus.COMPLETED,
+                message_text=f"Finished fetching HTML batch, {failed_count} failed",
+            )
+        )
+
+        return (
+            pydantic.TypeAdapter(typing.List[FetchManyResult])
+            .dump_json(results)
+            .decode()
+        )
+
+    except Exception as e:
+        logger.exception(e)
+        logger.error(f"Failed to fetch HTML batch: {e}")
+        update_message_func(
+            MessageUpdate(
+                status=MessageStatus.FAILED,
+                message_text=f"Failed to fetch HTML batch: {e}",
+            )
+        )
 
     return None
@@ -1,17 +1,46 @@
+import asyncio
+import collections
 import functools
+import hashlib
+import json
+import logging
+import time
 import typing
 
 import httpx
 import yarl
 
+from web_queue.types.artifact_capture import ArtifactCapture
+from web_queue.types.web_fetch_result import FetchSource, FetchStats
+
 if typing.TYPE_CHECKING:
     from web_queue.client.ai import AI
+    from web_queue.client.ai_batches import AIBatches
+    from web_queue.client.browser_pool import BrowserPool
     from web_queue.client.clean import Clean
     from web_queue.client.config import Settings
+    from web_queue.client.domain_scheduler import DomainScheduler
     from web_queue.client.messages import Messages
+    from web_queue.client.single_flight import SingleFlight
+    from web_queue.client.site_templates import SiteTemplates
+    from web_queue.client.url_canonicalizer import URLCanonicalizer
     from web_queue.client.web import Web
+    from web_queue.client.zstd_dictionaries import ZstdDictionaries
+    from web_queue.types.fetch_many_result import FetchManyResult
     from web_queue.types.html_content import HTMLContent
+    from web_queue.types.html_metadata_response import HTMLMetadataResponse
     from web_queue.types.message import MessageUpdate
+    from web_queue.utils.html_document import HTMLDocument
+
+logger = logging.getLogger(__name__)
+
+# Fetch parameters that can change the finished result
+RESULT_CACHE_KEY_PARAMS = (
+    "http_first",
+    "http_expected_css_selector",
+    "blocked_resource_types",
+    "blocked_domains",
+)
 
 
 class WebQueueClient:
@@ -26,6 +55,24 @@ class WebQueueClient:
 
         return Web(self)
 
+    @functools.cached_property
+    def browser_pool(self) -> "BrowserPool":
+        from web_queue.client.browser_pool import BrowserPool
+
+        return BrowserPool(self)
+
+    @functools.cached_property
+    def url_canonicalizer(self) -> "URLCanonicalizer":
+        from web_queue.client.url_canonicalizer import URLCanonicalizer
+
+        return URLCanonicalizer(self)
+
+    @functools.cached_property
+    def domain_scheduler(self) -> "DomainScheduler":
+        from web_queue.client.domain_scheduler import DomainScheduler
+
+        return DomainScheduler(self)
+
     @functools.cached_property
     def clean(self) -> "Clean":
         from web_queue.client.clean import Clean
@@ -38,12 +85,53 @@ class WebQueueClient:
 
         return AI(self)
 
+    @functools.cached_property
+    def site_templates(self) -> "SiteTemplates":
+        from web_queue.client.site_templates import SiteTemplates
+
+        return SiteTemplates(self)
+
+    @functools.cached_property
+    def ai_batches(self) -> "AIBatches":
+        from web_queue.client.ai_batches import AIBatches
+
+        return AIBatches(self)
+
+    @functools.cached_property
+    def single_flight(self) -> "SingleFlight":
+        from web_queue.client.single_flight import SingleFlight
+
+        return SingleFlight(self)
+
+    @functools.cached_property
+    def zstd_dictionaries(self) -> "ZstdDictionaries":
+        from web_queue.client.zstd_dictionaries import ZstdDictionaries
+
+        return ZstdDictionaries(self)
+
     @functools.cached_property
     def messages(self) -> "Messages":
         from web_queue.client.messages import Messages
 
         return Messages(self)
 
+    async def close(self) -> None:
+        """Release resources bound to the current thread's event loop."""
+        await self.web.close()
+        await self.browser_pool.close()
+        return None
+
+    def shutdown(self) -> None:
+        """Stop the process-wide executors, after every event loop is closed.
+
+        Waits for pending artifact writes.
+        """
+        if "web" in self.__dict__:
+            self.web.shutdown()
+        if "cpu_executor" in self.settings.__dict__:
+            self.settings.cpu_executor.shutdown()
+        return None
+
     async def fetch(
         self,
         url: yarl.URL | httpx.URL | str,
@@ -54,45 +142,191 @@ class WebQueueClient:
         scrolling_times: int = 3,
         human_delay_base_delay: float = 1.2,
         dynamic_content_loading_delay: float = 2.0,
+        http_first: bool = False,
+        http_expected_css_selector: typing.Optional[typing.Text] = None,
+        blocked_resource_types: typing.Optional[typing.List[typing.Text]] = None,
+        blocked_domains: typing.Optional[typing.List[typing.Text]] = None,
+        artifact_capture: ArtifactCapture | str = ArtifactCapture.NONE,
         step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
     ) -> "HTMLContent":
-        from web_queue.types.html_content import HTMLContent
-        from web_queue.utils.html_to_str import htmls_to_str
-
-        # Fetch HTML
-        html = await self.web.fetch(
-            url,
+        fetch_kwargs: typing.Dict[str, typing.Any] = dict(
             headless=headless,
             goto_timeout=goto_timeout,
             circling_times=circling_times,
             scrolling_times=scrolling_times,
             human_delay_base_delay=human_delay_base_delay,
             dynamic_content_loading_delay=dynamic_content_loading_delay,
+            http_first=http_first,
+            http_expected_css_selector=http_expected_css_selector,
+            blocked_resource_types=blocked_resource_types,
+            blocked_domains=blocked_domains,
+            artifact_capture=artifact_capture,
+        )
+
+        result_cache_key = self.get_result_cache_key(url, **fetch_kwargs)
+
+        # Artifacts come from a browser render, never from a cached or shared run
+        if ArtifactCapture(artifact_capture) != ArtifactCapture.NONE:
+            return await self._fetch(
+                url,
+                result_cache_key=result_cache_key,
+                step_callback=step_callback,
+                **fetch_kwargs,
+            )
+
+        start_time = time.perf_counter()
+        if (html_content := await self.get_cached_result(result_cache_key)) is not None:
+            logger.debug(f"Hit result cache for {url}")
+            self.url_canonicalizer.record_hit(
+                url, self.url_canonicalizer.canonicalize(url), "result"
+            )
+            html_content.fetch_stats = FetchStats(
+                source=FetchSource.RESULT_CACHE,
+                elapsed_seconds=time.perf_counter() - start_time,
+            )
+            return html_content
+
+        # Concurrent callers with the same URL and parameters share one run,
+        # workers elsewhere pick up the leader's result from the result cache
+        return await self.single_flight.run(
+            result_cache_key,
+            functools.partial(
+                self._fetch,
+                url,
+                result_cache_key=result_cache_key,
+                step_callback=step_callback,
+                **fetch_kwargs,
+            ),
+            get_cached=functools.partial(self.get_cached_result, result_cache_key),
+        )
+
+    def get_result_cache_key(
+        self, url: yarl.URL | httpx.URL | str, **fetch_kwargs: typing.Any
+    ) -> str:
+        """Key of the finished result, from the URL and what changes the output."""
+        key_data = [
+            self.url_canonicalizer.canonicalize(url),
+            self.settings.OPENAI_MODEL,
+            {name: fetch_kwargs.get(name) for name in RESULT_CACHE_KEY_PARAMS},
+        ]
+        return "result:" + (
+            hashlib.md5(
+                json.dumps(key_data, sort_keys=True, default=str).encode()
+            ).hexdigest()
+        )
+
+    async def get_cached_result(
+        self, result_cache_key: str
+    ) -> typing.Optional["HTMLContent"]:
+        from web_queue.types.html_content_cache_entry import HTMLContentCacheEntry
+        from web_queue.utils.compression import decompress_bytes
+
+        memory_cache = self.settings.result_memory_cache
+        if (cache_entry := memory_cache.get(result_cache_key)) is not None:
+            return cache_entry.to_html_content()
+
+        maybe_cached = await asyncio.to_thread(
+            self.settings.result_cache.get, result_cache_key
+        )
+        if maybe_cached is None:
+            return None
+
+        cache_entry_json = decompress_bytes(maybe_cached)
+        cache_entry = HTMLContentCacheEntry.model_validate_json(cache_entry_json)
+        memory_cache.set(result_cache_key, cache_entry, size=len(cache_entry_json))
+        return cache_entry.to_html_content()
+
+    async def set_cached_result(
+        self, result_cache_key: str, html_content: "HTMLContent"
+    ) -> None:
+        from web_queue.types.html_content_cache_entry import HTMLContentCacheEntry
+        from web_queue.utils.compression import compress_bytes
+
+        cache_entry = HTMLContentCacheEntry(
+            html_content=html_content, html=html_content._html
+        ).model_copy(deep=True)
+        cache_entry_json = cache_entry.model_dump_json()
+        cache_entry_bytes = cache_entry_json.encode("utf-8")
+        await asyncio.to_thread(
+            self.settings.result_cache.set,
+            result_cache_key,
+            await self.settings.cpu_executor.run(
+                compress_bytes, cache_entry_bytes, size=len(cache_entry_bytes)
+            ),
+        )
+        self.settings.result_memory_cache.set(
+            result_cache_key, cache_entry, size=len(cache_entry_json)
+        )
+        return None
+
+    async def _fetch(
+        self,
+        url: yarl.URL | httpx.URL | str,
+        *,
+        result_cache_key: typing.Optional[str] = None,
+        step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
+        **fetch_kwargs: typing.Any,
+    ) -> "HTMLContent":
+        # Fetch HTML
+        web_fetch_result = await self.web.fetch_page(
+            url, step_callback=step_callback, **fetch_kwargs
+        )
+
+        # Clean HTML, off the event loop so concurrent fetches keep progressing.
+        # The document is parsed once and shared by every later stage. A large
+        # page is cleaned in a worker process, which also selects what its site
+        # template needs instead of a re-parse of the cleaned HTML per stage.
+        html = web_fetch_result.html
+        css_selectors: typing.List[str] = []
+        if self.settings.WEB_SITE_TEMPLATES_ENABLED and (
+            self.settings.cpu_executor.offloads(len(html))
+        ):
+            css_selectors = await self.site_templates.get_template_css_selectors(url)
+        document = await self.clean.as_main_content_document_offloaded(
+            html, css_selectors=css_selectors, markdown_css_selectors=css_selectors[:1]
+        )
+
+        return await self.as_html_content(
+            document,
+            url=url,
+            fetch_stats=web_fetch_result.stats,
+            result_cache_key=result_cache_key,
             step_callback=step_callback,
         )
 
-        # Clean HTML
-        html = self.clean.as_main_content(html)
+    async def as_html_content(
+        self,
+        document: "HTMLDocument",
+        *,
+        url: yarl.URL | httpx.URL | str,
+        fetch_stats: typing.Optional["FetchStats"] = None,
+        html_metadata: typing.Optional["HTMLMetadataResponse"] = None,
+        result_cache_key: typing.Optional[str] = None,
+        step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
+    ) -> "HTMLContent":
+        """Finish a cleaned page, with its metadata from the AI unless given."""
+        from web_queue.types.html_content import HTMLContent
 
         # Extract content metadata
-        html_metadata = await self.ai.as_html_metadata(
-            html, step_callback=step_callback
-        )
+        if html_metadata is None:
+            html_metadata = await self.ai.as_html_metadata(
+                document, url=url, step_callback=step_callback
+            )
 
         if not html_metadata:
             raise ValueError(f"Failed to retrieve content metadata for url: {url}")
 
         # Extract content body
-        content_body_htmls = html.select(html_metadata.content_body_css_selector)
-        if not content_body_htmls:
+        content_body_text = await self.clean.as_markdown(
+            document, html_metadata.content_body_css_selector
+        )
+        if content_body_text is None:
             raise ValueError(
                 "Failed to retrieve content body by css selector "
                 + f"'{html_metadata.content_body_css_selector}' "
                 + f"for url: '{url}'"
             )
 
-        content_body_text = htmls_to_str(content_body_htmls)
-
         html_content = HTMLContent(
             title=html_metadata.title,
             author=html_metadata.author,
@@ -101,7 +335,55 @@ class WebQueueClient:
             content=content_body_text,
             created_date=html_metadata.created_date,
             updated_date=html_metadata.updated_date,
+            fetch_stats=fetch_stats or FetchStats(),
         )
 
-        html_content._html = str(html)
+        html_content._html = document.cleaned_html
+
+        if result_cache_key is not None:
+            await self.set_cached_result(result_cache_key, html_content)
         return html_content
+
+    async def fetch_many(
+        self,
+        urls: typing.Iterable[yarl.URL | httpx.URL | str],
+        *,
+        concurrency: int = 4,
+        per_domain_concurrency: int = 1,
+        **fetch_kwargs: typing.Any,
+    ) -> typing.AsyncIterator["FetchManyResult"]:
+        """Fetch many URLs concurrently, yielding results as they complete.
+
+        Each URL runs the full `fetch` pipeline, so one page's clean and AI
+        stages overlap with other pages' browser work. Failures are yielded
+        as results with `error` set instead of being raised.
+        """
+        from web_queue.types.fetch_many_result import FetchManyResult
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        domain_semaphores: typing.DefaultDict[str, asyncio.Semaphore] = (
+            collections.defaultdict(
+                lambda: asyncio.Semaphore(max(per_domain_concurrency, 1))
+            )
+        )
+
+        async def _fetch_one(url: yarl.URL | httpx.URL | str) -> FetchManyResult:
+            domain = self.domain_scheduler.get_domain(url)
+            # Wait for the domain slot first to not hold a global slot idle
+            async with domain_semaphores[domain], semaphore:
+                try:
+                    html_content = await self.fetch(url, **fetch_kwargs)
+                except Exception as e:
+                    logger.exception(e)
+                    result = FetchManyResult(url=str(url), error=str(e))
+                    result._exception = e
+                    return result
+            return FetchManyResult(url=str(url), html_content=html_content)
+
+        tasks = [asyncio.create_task(_fetch_one(url)) for url in urls]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                yield await next_done
+        finally:
+            for task in tasks:
+                task.cancel()
@@ -1,6 +1,6 @@
 import asyncio
 import datetime
-import hashlib
+import functools
 import logging
 import textwrap
 import typing
@@ -12,13 +12,27 @@ from rich.pretty import pretty_repr
 from web_queue.client import WebQueueClient
 from web_queue.types.html_metadata_response import HTMLMetadataResponse
 from web_queue.types.message import MessageUpdate
-from web_queue.utils.compression import compress, decompress
+from web_queue.types.site_template import SiteTemplate
+from web_queue.utils.compression import compress_bytes, decompress_bytes
+from web_queue.utils.cpu_tasks import md5_hexdigest, skeletonize_html
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_fingerprint import html_structure_fingerprint
+from web_queue.utils.site_template import get_url_pattern
 
 if typing.TYPE_CHECKING:
     import bs4
+    import httpx
+    import yarl
+    from openai.types.chat import ChatCompletionMessageParam
 
 logger = logging.getLogger(__name__)
 
+SHORTENED_HTML_NOTE = (
+    "Long texts in the HTML are shortened to their start and end joined by '…', "
+    + "and runs of similar elements are shortened to their first and last few "
+    + "with a comment counting the rest."
+)
+
 
 class AI:
     def __init__(self, client: WebQueueClient):
@@ -27,50 +41,239 @@ class AI:
     @logfire.instrument
     async def as_html_metadata(
         self,
-        html: typing.Union["bs4.BeautifulSoup", typing.Text],
+        html: typing.Union["bs4.BeautifulSoup", typing.Text, HTMLDocument],
         step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
+        *,
+        url: typing.Optional[typing.Union[typing.Text, "yarl.URL", "httpx.URL"]] = None,
     ) -> typing.Optional[HTMLMetadataResponse]:
         """Extract content metadata and CSS selector from HTML.
 
         Analyzes HTML to find content body selector and extract metadata values.
+        A document is used through its memoized cleaned HTML and hash. The AI
+        is asked only when `get_known_html_metadata` has no result, the
+        templates are learned from its answer.
         """
-        openai_client = self.client.settings.openai_client
-        model_name = self.client.settings.OPENAI_MODEL
-
-        html = str(html)
+        settings = self.client.settings
+        if isinstance(html, HTMLDocument):
+            document = html
+        else:
+            html = str(html)
+            html_bytes = html.encode("utf-8")
+            document = HTMLDocument.from_cleaned_html(
+                html,
+                backend=settings.html_backend,
+                cleaned_html_md5=await settings.cpu_executor.run(
+                    md5_hexdigest, html_bytes, size=len(html_bytes)
+                ),
+            )
 
         logger.info(
             "AI is extracting content metadata from HTML: "
-            + f"{pretty_repr(str(html), max_string=64)}"
+            + f"{pretty_repr(document.cleaned_html, max_string=64)}"
         )
 
-        cache_key = (
-            "retrieve_html_content_metadata:"
-            + f"{hashlib.md5(html.encode('utf-8')).hexdigest()}"
-        )
+        output = await self.get_known_html_metadata(document, url=url)
+        if output is not None:
+            return output
 
-        might_cached_data: typing.Text | None = await asyncio.to_thread(
-            self.client.settings.compressed_base64_cache.get, cache_key
+        # Concurrent requests for the same HTML share one LLM call
+        cache_key = self.get_cache_key(document.cleaned_html_md5)
+        output = await self.client.single_flight.run(
+            f"ai:{cache_key}",
+            functools.partial(
+                self._extract_html_metadata,
+                document.cleaned_html,
+                cache_key=cache_key,
+                step_callback=step_callback,
+            ),
+            get_cached=functools.partial(self._get_cached_html_metadata, cache_key),
         )
-        if might_cached_data is not None:
-            logger.debug(
-                "Hit cache 'as_html_content_metadata':"
-                + f"{pretty_repr(html, max_string=32)}"
+        if output is not None:
+            await self.learn_templates(output, document, url=url)
+        return output
+
+    def get_cache_key(self, cleaned_html_md5: typing.Text) -> typing.Text:
+        return f"retrieve_html_content_metadata:{cleaned_html_md5}"
+
+    async def get_known_html_metadata(
+        self,
+        document: HTMLDocument,
+        *,
+        url: typing.Optional[typing.Union[typing.Text, "yarl.URL", "httpx.URL"]] = None,
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        """The page's metadata without the AI, None if it needs the AI.
+
+        In order: the AI result cached for the same cleaned HTML, with its
+        `url` and `WEB_SITE_TEMPLATES_ENABLED` the site template of the URL
+        pattern, and with its `url` and `OPENAI_STRUCTURE_CACHE_ENABLED` the
+        template cached for the domain's pages of the same structure.
+        """
+        settings = self.client.settings
+        cache_key = self.get_cache_key(document.cleaned_html_md5)
+        might_cached_output = await self._get_cached_html_metadata(cache_key)
+        if might_cached_output is not None:
+            return might_cached_output
+
+        if url is not None and settings.WEB_SITE_TEMPLATES_ENABLED:
+            output = await self.client.site_templates.extract(str(url), document)
+            if output is not None:
+                return output
+
+        if url is not None and settings.OPENAI_STRUCTURE_CACHE_ENABLED:
+            structure_cache_key = await self._get_structure_cache_key(document, url)
+            output = await self._get_structure_cached_html_metadata(
+                structure_cache_key, document, url=url
             )
-            return HTMLMetadataResponse.model_validate_json(
-                decompress(might_cached_data)
+            if output is not None:
+                return output
+
+        return None
+
+    async def learn_templates(
+        self,
+        output: HTMLMetadataResponse,
+        document: HTMLDocument,
+        *,
+        url: typing.Optional[typing.Union[typing.Text, "yarl.URL", "httpx.URL"]] = None,
+    ) -> None:
+        """Store the selectors of the AI's result for later pages.
+
+        As the site template of the URL pattern and under the domain and
+        structure fingerprint, as far as enabled. Nothing is learned without
+        the page's `url`.
+        """
+        settings = self.client.settings
+        if url is None:
+            return None
+        save_site_template = settings.WEB_SITE_TEMPLATES_ENABLED
+        save_structure = settings.OPENAI_STRUCTURE_CACHE_ENABLED
+        if not (save_site_template or save_structure):
+            return None
+
+        template = await self.client.site_templates.build(document, output, url=url)
+        if template is None:
+            logger.info("No template learned from the AI's result")
+            return None
+
+        if save_site_template:
+            await asyncio.to_thread(self.client.site_templates.save, template)
+            logger.info(
+                f"Learned site template of '{template.domain}{template.url_pattern}'"
             )
+        if save_structure:
+            structure_cache_key = await self._get_structure_cache_key(document, url)
+            template_bytes = template.model_dump_json().encode("utf-8")
+            await asyncio.to_thread(
+                settings.compressed_base64_cache.set,
+                structure_cache_key,
+                await settings.cpu_executor.run(
+                    compress_bytes, template_bytes, size=len(template_bytes)
+                ),
+            )
+        return None
+
+    async def get_messages(
+        self, html: typing.Text
+    ) -> typing.List["ChatCompletionMessageParam"]:
+        """The chat messages asking for the metadata of cleaned HTML."""
+        prompt_html = await self._get_prompt_html(html)
+        return [
+            {
+                "role": "system",
+                "content": self._get_system_prompt(shortened=prompt_html != html),
+            },
+            {"role": "user", "content": prompt_html},
+        ]
+
+    async def set_cached_html_metadata(
+        self, cache_key: typing.Text, output: HTMLMetadataResponse
+    ) -> None:
+        output_json = output.model_dump_json()
+        output_bytes = output_json.encode("utf-8")
+        await asyncio.to_thread(
+            self.client.settings.compressed_base64_cache.set,
+            cache_key,
+            await self.client.settings.cpu_executor.run(
+                compress_bytes, output_bytes, size=len(output_bytes)
+            ),
+        )
+        self.client.settings.compressed_base64_memory_cache.set(
+            cache_key,
+            HTMLMetadataResponse.model_validate_json(output_json),  # No HTML
+            size=len(output_json) + 512,
+        )
+        return None
+
+    async def _get_structure_cache_key(
+        self,
+        document: HTMLDocument,
+        url: typing.Union[typing.Text, "yarl.URL", "httpx.URL"],
+    ) -> typing.Text:
+        # Per domain, plain pages of unrelated sites share fingerprints
+        domain, _ = get_url_pattern(str(url))
+        cleaned_html_size = len(document.cleaned_html.encode("utf-8"))
+        fingerprint = await self.client.settings.cpu_executor.run(
+            html_structure_fingerprint, document.cleaned_html, size=cleaned_html_size
+        )
+        return f"retrieve_html_structure_metadata:{domain}:{fingerprint}"
+
+    async def _get_structure_cached_html_metadata(
+        self,
+        structure_cache_key: typing.Text,
+        document: HTMLDocument,
+        *,
+        url: typing.Optional[typing.Union[typing.Text, "yarl.URL", "httpx.URL"]],
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        """Metadata by the template cached for a page of the same structure."""
+        might_cached_data: bytes | None = await asyncio.to_thread(
+            self.client.settings.compressed_base64_cache.get, structure_cache_key
+        )
+        if might_cached_data is None:
+            return None
+
+        template = SiteTemplate.model_validate_json(decompress_bytes(might_cached_data))
+        output = await self.client.site_templates.apply(template, document, url=url)
+        if output is None:
+            logger.info(f"Structure cache template does not fit: {structure_cache_key}")
+            return None
+        logger.debug(
+            f"Hit structure cache 'as_html_content_metadata': {structure_cache_key}"
+        )
+        return output
+
+    async def _get_cached_html_metadata(
+        self, cache_key: typing.Text
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        memory_cache = self.client.settings.compressed_base64_memory_cache
+        if (output := memory_cache.get(cache_key)) is not None:
+            logger.debug(f"Hit memory cache 'as_html_content_metadata': {cache_key}")
+            return output
+
+        might_cached_data: bytes | None = await asyncio.to_thread(
+            self.client.settings.compressed_base64_cache.get, cache_key
+        )
+        if might_cached_data is None:
+            return None
+
+        logger.debug(f"Hit cache 'as_html_content_metadata': {cache_key}")
+        output_json = decompress_bytes(might_cached_data)
+        output = HTMLMetadataResponse.model_validate_json(output_json)
+        memory_cache.set(cache_key, output, size=len(output_json) + 512)
+        return output
 
+    def _get_system_prompt(self, *, shortened: bool = False) -> typing.Text:
         # Get current time in Asia/Taipei timezone for relative date parsing
         current_time = datetime.datetime.now(zoneinfo.ZoneInfo("Asia/Taipei"))
         current_time_iso = current_time.isoformat()
-
-        system_prompt = textwrap.dedent(
+        header = textwrap.dedent(
             f"""
             You are an HTML structure analysis expert. Task: From the provided HTML, extract content metadata and identify CSS selectors.
 
             Current time (Asia/Taipei timezone): {current_time_iso}
-
+            """  # noqa: E501
+        ).strip()
+        instructions = textwrap.dedent(
+            """
             Instructions:
             1. **content_body_css_selector**: Find the CSS selector for the main content body element containing ONLY the article text.
                - Look for semantic tags like <article>, <main>, or <div> with classes/IDs like 'body', 'content', 'text', 'novel-body'.
@@ -109,6 +312,44 @@ class AI:
             """  # noqa: E501
         ).strip()
 
+        sections = [header, instructions]
+        if shortened:
+            # Only when the HTML was skeletonized to fit the token budget
+            sections.insert(1, SHORTENED_HTML_NOTE)
+        return "\n\n".join(sections)
+
+    async def _get_prompt_html(self, html: typing.Text) -> typing.Text:
+        """The cleaned HTML skeletonized to `OPENAI_HTML_TOKEN_BUDGET` tokens."""
+        settings = self.client.settings
+        html_bytes = html.encode("utf-8")
+        skeleton = await settings.cpu_executor.run(
+            functools.partial(
+                skeletonize_html,
+                model_name=settings.OPENAI_MODEL,
+                token_budget=settings.OPENAI_HTML_TOKEN_BUDGET,
+                text_sample_length=settings.OPENAI_HTML_TEXT_SAMPLE_LENGTH,
+            ),
+            html_bytes,
+            size=len(html_bytes),
+        )
+        logger.info(
+            f"HTML prompt tokens: {skeleton.tokens_before} -> "
+            + f"{skeleton.tokens_after} (budget "
+            + f"{settings.OPENAI_HTML_TOKEN_BUDGET})"
+        )
+        return skeleton.html
+
+    async def _extract_html_metadata(
+        self,
+        html: typing.Text,
+        *,
+        cache_key: typing.Text,
+        step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        openai_client = self.client.settings.openai_client
+        model_name = self.client.settings.OPENAI_MODEL
+        messages = await self.get_messages(html)
+
         if step_callback:
             step_callback(
                 MessageUpdate(
@@ -120,10 +361,7 @@ class AI:
 
         try:
             parsed_cmpl = await openai_client.chat.completions.parse(
-                messages=[
-                    {"role": "system", "content": system_prompt},
-                    {"role": "user", "content": html},
-                ],
+                messages=messages,
                 model=model_name,
                 response_format=HTMLMetadataResponse,
             )
@@ -137,12 +375,7 @@ class AI:
                 output._html = html
                 logger.info(f"LLM response: {output}")
 
-                # Cache the response
-                await asyncio.to_thread(
-                    self.client.settings.compressed_base64_cache.set,
-                    cache_key,
-                    compress(output.model_dump_json()),
-                )
+                await self.set_cached_html_metadata(cache_key, output)
 
                 if step_callback:
                     step_callback(
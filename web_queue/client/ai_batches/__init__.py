@@ -0,0 +1,3 @@
+from web_queue.client.ai_batches._ai_batches import AIBatches
+
+__all__ = ["AIBatches"]
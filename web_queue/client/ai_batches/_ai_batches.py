@@ -0,0 +1,357 @@
+import asyncio
+import json
+import logging
+import time
+import typing
+
+import httpx
+import openai
+import redis.exceptions
+import yarl
+
+from web_queue.client import WebQueueClient
+from web_queue.types.ai_batch_job import AIBatchItem, AIBatchJob, AIBatchSubmission
+from web_queue.types.fetch_many_result import FetchManyResult
+from web_queue.types.html_metadata_response import HTMLMetadataResponse
+from web_queue.types.web_fetch_result import FetchSource, FetchStats
+from web_queue.utils.compression import compress_bytes, decompress_bytes
+from web_queue.utils.html_document import HTMLDocument
+
+logger = logging.getLogger(__name__)
+
+BATCH_ENDPOINT = "/v1/chat/completions"
+TERMINAL_STATUSES = frozenset(("completed", "failed", "expired", "cancelled"))
+# The strict JSON schema `chat.completions.parse` sends for the model
+RESPONSE_FORMAT = {
+    "type": "json_schema",
+    "json_schema": {
+        "name": HTMLMetadataResponse.__name__,
+        "strict": True,
+        "schema": openai.pydantic_function_tool(HTMLMetadataResponse)["function"][
+            "parameters"
+        ],
+    },
+}
+
+
+class AIBatches:
+    """Bulk metadata extraction through the OpenAI Batch API, for backfills.
+
+    `submit` fetches and cleans the pages, finishes those whose metadata is
+    known without the AI, and uploads the rest as JSONL batches. Jobs are
+    tracked in Redis, the cleaned HTML of their pages is kept with them.
+    `resolve` checks a job and, once the batch completed, caches each page's
+    `HTMLMetadataResponse` and finishes the page from its kept cleaned HTML,
+    so nothing is fetched again and no page falls back to the online AI.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+
+    @property
+    def pending_key(self) -> str:
+        return f"{self.client.settings.WEB_QUEUE_NAME}:ai_batches:pending"
+
+    def get_job_key(self, batch_id: str) -> str:
+        return f"{self.client.settings.WEB_QUEUE_NAME}:ai_batch:{batch_id}"
+
+    def get_cleaned_html_key(self, cleaned_html_md5: str) -> str:
+        return f"ai_batch_cleaned_html:{cleaned_html_md5}"
+
+    def get_job(self, batch_id: str) -> typing.Optional[AIBatchJob]:
+        job_json = self.client.settings.redis_client.get(self.get_job_key(batch_id))
+        if job_json is None:
+            return None
+        return AIBatchJob.model_validate_json(job_json)
+
+    def get_pending_batch_ids(self) -> typing.List[str]:
+        batch_ids = self.client.settings.redis_client.smembers(self.pending_key)
+        return sorted(
+            batch_id.decode("utf-8") if isinstance(batch_id, bytes) else batch_id
+            for batch_id in batch_ids
+        )
+
+    def save_job(self, job: AIBatchJob) -> None:
+        settings = self.client.settings
+        pipeline = settings.redis_client.pipeline()
+        pipeline.set(
+            self.get_job_key(job.batch_id),
+            job.model_dump_json(),
+            ex=settings.OPENAI_BATCH_JOB_EXPIRE_SECONDS,
+        )
+        if job.resolved_at is None:
+            pipeline.sadd(self.pending_key, job.batch_id)
+        else:
+            pipeline.srem(self.pending_key, job.batch_id)
+        pipeline.execute()
+        return None
+
+    async def submit(
+        self,
+        urls: typing.Iterable[yarl.URL | httpx.URL | str],
+        *,
+        concurrency: int = 4,
+        **fetch_kwargs: typing.Any,
+    ) -> AIBatchSubmission:
+        """Fetch the pages and submit those that need the AI as batch jobs.
+
+        `fetch_kwargs` are those of `WebQueueClient.fetch`, kept with the
+        job for finishing the pages and so JSON serializable.
+        """
+        settings = self.client.settings
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+        submission = AIBatchSubmission()
+        requests: typing.Dict[str, typing.Dict[str, typing.Any]] = {}
+        items: typing.List[AIBatchItem] = []
+
+        async def _prepare_one(url: yarl.URL | httpx.URL | str) -> None:
+            async with semaphore:
+                try:
+                    prepared = await self._prepare(url, fetch_kwargs)
+                    if prepared is None:
+                        html_content = await self.client.fetch(url, **fetch_kwargs)
+                        submission.results.append(
+                            FetchManyResult(url=str(url), html_content=html_content)
+                        )
+                        return None
+                except Exception as e:
+                    logger.exception(e)
+                    submission.results.append(
+                        FetchManyResult(url=str(url), error=str(e))
+                    )
+                    return None
+            item, request = prepared
+            items.append(item)
+            # Pages of the same cleaned HTML share one request
+            requests.setdefault(item.cleaned_html_md5, request)
+            return None
+
+        await asyncio.gather(*(_prepare_one(url) for url in urls))
+
+        max_requests = max(settings.OPENAI_BATCH_MAX_REQUESTS, 1)
+        custom_ids = list(requests)
+        for start in range(0, len(custom_ids), max_requests):
+            chunk = custom_ids[start : start + max_requests]
+            chunk_set = set(chunk)
+            job = await self._create_job(
+                [requests[custom_id] for custom_id in chunk],
+                [item for item in items if item.cleaned_html_md5 in chunk_set],
+                fetch_kwargs,
+            )
+            submission.jobs.append(job)
+
+        logger.info(
+            f"Submitted {len(custom_ids)} pages in {len(submission.jobs)} AI "
+            + f"batches, {len(submission.results)} pages finished without"
+        )
+        return submission
+
+    async def resolve(
+        self, batch_id: str, *, concurrency: int = 4
+    ) -> typing.Optional[typing.List[FetchManyResult]]:
+        """Finish the pages of a batch, None while the batch is running."""
+        job = await asyncio.to_thread(self.get_job, batch_id)
+        if job is None:
+            raise ValueError(f"Unknown AI batch job: {batch_id}")
+        if job.resolved_at is not None:
+            logger.info(f"AI batch {batch_id} is already resolved")
+            return []
+
+        openai_client = self.client.settings.openai_client
+        batch = await openai_client.batches.retrieve(batch_id)
+        job.status = batch.status
+        if batch.status not in TERMINAL_STATUSES:
+            await asyncio.to_thread(self.save_job, job)
+            logger.debug(f"AI batch {batch_id} is {batch.status}")
+            return None
+
+        outputs: typing.Dict[str, HTMLMetadataResponse] = {}
+        if batch.output_file_id:
+            content = await openai_client.files.content(batch.output_file_id)
+            outputs = await self._read_outputs(content.text)
+
+        semaphore = asyncio.Semaphore(max(concurrency, 1))
+
+        async def _finish_one(item: AIBatchItem) -> FetchManyResult:
+            output = outputs.get(item.cleaned_html_md5)
+            if output is None:
+                return FetchManyResult(
+                    url=item.url, error=f"No AI batch result, batch {batch.status}"
+                )
+            async with semaphore:
+                try:
+                    return await self._finish(item, output, job.fetch_kwargs)
+                except Exception as e:
+                    logger.exception(e)
+                    return FetchManyResult(url=item.url, error=str(e))
+
+        results = await asyncio.gather(*(_finish_one(item) for item in job.items))
+
+        job.resolved_at = time.time()
+        await asyncio.to_thread(self.save_job, job)
+        logger.info(
+            f"Resolved AI batch {batch_id} ({batch.status}): "
+            + f"{sum(r.error is None for r in results)} of {len(results)} pages"
+        )
+        return list(results)
+
+    async def resolve_pending(
+        self, *, concurrency: int = 4
+    ) -> typing.Dict[str, typing.List[FetchManyResult]]:
+        """Resolve every tracked job whose batch has finished."""
+        resolved: typing.Dict[str, typing.List[FetchManyResult]] = {}
+        try:
+            batch_ids = await asyncio.to_thread(self.get_pending_batch_ids)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to list pending AI batches: {e}")
+            return resolved
+
+        for batch_id in batch_ids:
+            try:
+                results = await self.resolve(batch_id, concurrency=concurrency)
+            except Exception as e:
+                logger.warning(f"Failed to resolve AI batch {batch_id}: {e}")
+                continue
+            if results is not None:
+                resolved[batch_id] = results
+        return resolved
+
+    async def _prepare(
+        self,
+        url: yarl.URL | httpx.URL | str,
+        fetch_kwargs: typing.Dict[str, typing.Any],
+    ) -> typing.Optional[typing.Tuple[AIBatchItem, typing.Dict[str, typing.Any]]]:
+        """The page's batch item and request, None if no AI is needed."""
+        web_fetch_result = await self.client.web.fetch_page(url, **fetch_kwargs)
+        document = await self.client.clean.as_main_content_document_offloaded(
+            web_fetch_result.html
+        )
+        if await self.client.ai.get_known_html_metadata(document, url=url):
+            return None
+
+        await self._save_cleaned_html(document)
+        item = AIBatchItem(url=str(url), cleaned_html_md5=document.cleaned_html_md5)
+        request = {
+            "custom_id": document.cleaned_html_md5,
+            "method": "POST",
+            "url": BATCH_ENDPOINT,
+            "body": {
+                "model": self.client.settings.OPENAI_MODEL,
+                "messages": await self.client.ai.get_messages(document.cleaned_html),
+                "response_format": RESPONSE_FORMAT,
+            },
+        }
+        return item, request
+
+    async def _save_cleaned_html(self, document: HTMLDocument) -> None:
+        """Keep the cleaned HTML as long as its job, to finish the page from."""
+        settings = self.client.settings
+        cleaned_html_bytes = document.cleaned_html.encode("utf-8")
+        await asyncio.to_thread(
+            settings.compressed_base64_cache.set,
+            self.get_cleaned_html_key(document.cleaned_html_md5),
+            await settings.cpu_executor.run(
+                compress_bytes, cleaned_html_bytes, size=len(cleaned_html_bytes)
+            ),
+            settings.OPENAI_BATCH_JOB_EXPIRE_SECONDS,
+        )
+        return None
+
+    async def _get_cleaned_html(self, cleaned_html_md5: str) -> typing.Optional[str]:
+        might_cached_data: bytes | None = await asyncio.to_thread(
+            self.client.settings.compressed_base64_cache.get,
+            self.get_cleaned_html_key(cleaned_html_md5),
+        )
+        if might_cached_data is None:
+            return None
+        return decompress_bytes(might_cached_data).decode("utf-8")
+
+    async def _create_job(
+        self,
+        requests: typing.List[typing.Dict[str, typing.Any]],
+        items: typing.List[AIBatchItem],
+        fetch_kwargs: typing.Dict[str, typing.Any],
+    ) -> AIBatchJob:
+        openai_client = self.client.settings.openai_client
+        jsonl = "".join(
+            json.dumps(request, ensure_ascii=False) + "\n" for request in requests
+        )
+        input_file = await openai_client.files.create(
+            file=("web-queue-batch.jsonl", jsonl.encode("utf-8")), purpose="batch"
+        )
+        batch = await openai_client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=BATCH_ENDPOINT,
+            completion_window=self.client.settings.OPENAI_BATCH_COMPLETION_WINDOW,
+        )
+        job = AIBatchJob(
+            batch_id=batch.id,
+            status=batch.status,
+            items=items,
+            fetch_kwargs=fetch_kwargs,
+        )
+        await asyncio.to_thread(self.save_job, job)
+        logger.info(f"Created AI batch {batch.id} of {len(requests)} requests")
+        return job
+
+    async def _read_outputs(
+        self, output_jsonl: str
+    ) -> typing.Dict[str, HTMLMetadataResponse]:
+        """Parse and cache the batch's responses, by custom ID."""
+        outputs: typing.Dict[str, HTMLMetadataResponse] = {}
+        for line in output_jsonl.splitlines():
+            if not line.strip():
+                continue
+            record = json.loads(line)
+            custom_id = record.get("custom_id") or ""
+            response = record.get("response") or {}
+            if response.get("status_code") != 200:
+                logger.error(
+                    f"AI batch request {custom_id} failed: "
+                    + f"{record.get('error') or response}"
+                )
+                continue
+
+            message = response["body"]["choices"][0]["message"]
+            if message.get("refusal"):
+                logger.error(f"LLM refusal: {message['refusal']}")
+                continue
+            try:
+                output = HTMLMetadataResponse.model_validate_json(message["content"])
+            except Exception as e:
+                logger.error(f"Parsing failed for AI batch request {custom_id}: {e}")
+                continue
+
+            await self.client.ai.set_cached_html_metadata(
+                self.client.ai.get_cache_key(custom_id), output
+            )
+            outputs[custom_id] = output
+        return outputs
+
+    async def _finish(
+        self,
+        item: AIBatchItem,
+        output: HTMLMetadataResponse,
+        fetch_kwargs: typing.Dict[str, typing.Any],
+    ) -> FetchManyResult:
+        """Finish the page from its kept cleaned HTML, learn templates."""
+        cleaned_html = await self._get_cleaned_html(item.cleaned_html_md5)
+        if cleaned_html is None:
+            return FetchManyResult(
+                url=item.url, error="Cleaned HTML of the AI batch page expired"
+            )
+
+        document = HTMLDocument.from_cleaned_html(
+            cleaned_html,
+            backend=self.client.settings.html_backend,
+            cleaned_html_md5=item.cleaned_html_md5,
+        )
+        html_content = await self.client.as_html_content(
+            document,
+            url=item.url,
+            fetch_stats=FetchStats(source=FetchSource.CACHE),
+            html_metadata=output,
+            result_cache_key=self.client.get_result_cache_key(item.url, **fetch_kwargs),
+        )
+        await self.client.ai.learn_templates(output, document, url=item.url)
+        return FetchManyResult(url=item.url, html_content=html_content)
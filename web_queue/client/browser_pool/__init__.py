@@ -0,0 +1,3 @@
+from web_queue.client.browser_pool._browser_pool import BrowserPool
+
+__all__ = ["BrowserPool"]
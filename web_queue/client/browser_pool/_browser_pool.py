@@ -0,0 +1,188 @@
+import asyncio
+import contextlib
+import dataclasses
+import logging
+import threading
+import typing
+import uuid
+
+from playwright.async_api import Browser, BrowserContext, Playwright, async_playwright
+
+from web_queue.client import WebQueueClient
+from web_queue.utils.process_rss import find_pid_by_arg, get_process_tree_rss
+
+logger = logging.getLogger(__name__)
+
+BROWSER_LAUNCH_ARGS: typing.Tuple[typing.Text, ...] = (
+    "--no-sandbox",
+    "--disable-blink-features=AutomationControlled",
+    "--disable-dev-shm-usage",
+    "--disable-web-security",
+    "--disable-features=VizDisplayCompositor",
+)
+
+
+@dataclasses.dataclass
+class PooledBrowser:
+    browser: Browser
+    headless: bool
+    pages_served: int = 0
+    active_contexts: int = 0
+    retired: bool = False
+    pid: typing.Optional[int] = None  # Browser process, None if not found
+
+
+class _BrowserPoolState(threading.local):
+    """Per-thread pool state, playwright objects are bound to one event loop."""
+
+    def __init__(self) -> None:
+        self.loop: asyncio.AbstractEventLoop | None = None
+        self.playwright: Playwright | None = None
+        self.browsers: typing.List[PooledBrowser] = []
+        self.lock: asyncio.Lock | None = None
+
+
+class BrowserPool:
+    """Long-lived chromium browsers handing out isolated contexts per fetch.
+
+    Browsers are recycled after `WEB_BROWSER_MAX_PAGES` pages or when the
+    browser's own process tree exceeds `WEB_BROWSER_MAX_RSS_MB`, and
+    relaunched on crash.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+        self._local = _BrowserPoolState()
+
+    @contextlib.asynccontextmanager
+    async def new_context(
+        self, *, headless: bool = True, **context_kwargs: typing.Any
+    ) -> typing.AsyncIterator[BrowserContext]:
+        pooled = await self._acquire(headless)
+        context: BrowserContext | None = None
+        try:
+            context = await pooled.browser.new_context(**context_kwargs)
+            yield context
+        finally:
+            if context is not None:
+                try:
+                    await context.close()
+                except Exception as e:  # Browser may have crashed mid-fetch
+                    logger.warning(f"Failed to close browser context: {e}")
+            await self._release(pooled)
+
+    async def close(self) -> None:
+        state = self._local
+        if state.loop is None:
+            return None
+
+        for pooled in state.browsers:
+            await self._close_browser(pooled)
+        state.browsers.clear()
+
+        if state.playwright is not None:
+            await state.playwright.stop()
+            state.playwright = None
+        state.loop = None
+        state.lock = None
+        return None
+
+    def _get_state(self) -> _BrowserPoolState:
+        state = self._local
+        loop = asyncio.get_running_loop()
+        if state.loop is not loop:
+            if state.loop is not None:
+                logger.warning(
+                    "Event loop changed, "
+                    + f"dropping {len(state.browsers)} browser(s) of the previous loop"
+                )
+            state.loop = loop
+            state.playwright = None
+            state.browsers = []
+            state.lock = asyncio.Lock()
+        return state
+
+    async def _acquire(self, headless: bool) -> PooledBrowser:
+        state = self._get_state()
+        assert state.lock is not None
+
+        async with state.lock:
+            # Drop crashed browsers, they are relaunched on demand
+            for pooled in list(state.browsers):
+                if not pooled.browser.is_connected():
+                    logger.warning("Browser disconnected, removing it from the pool")
+                    state.browsers.remove(pooled)
+
+            candidates = [
+                b for b in state.browsers if b.headless == headless and not b.retired
+            ]
+            idle = [b for b in candidates if b.active_contexts == 0]
+            if idle:
+                pooled = idle[0]
+            elif len(candidates) < max(self.client.settings.WEB_BROWSER_POOL_SIZE, 1):
+                pooled = await self._launch(state, headless)
+                state.browsers.append(pooled)
+            else:
+                pooled = min(candidates, key=lambda b: b.active_contexts)
+
+            pooled.active_contexts += 1
+            pooled.pages_served += 1
+            return pooled
+
+    async def _release(self, pooled: PooledBrowser) -> None:
+        state = self._get_state()
+        assert state.lock is not None
+
+        # Measured before taking the lock, the /proc scan must not hold up
+        # other fetches acquiring or releasing browsers
+        rss: typing.Optional[int] = None
+        max_rss_mb = self.client.settings.WEB_BROWSER_MAX_RSS_MB
+        if max_rss_mb > 0 and pooled.pid is not None and not pooled.retired:
+            rss = await asyncio.to_thread(get_process_tree_rss, pooled.pid)
+
+        async with state.lock:
+            pooled.active_contexts -= 1
+
+            max_pages = self.client.settings.WEB_BROWSER_MAX_PAGES
+            if max_pages > 0 and pooled.pages_served >= max_pages:
+                logger.info(f"Recycling browser after {pooled.pages_served} pages")
+                pooled.retired = True
+
+            if rss is not None and rss > max_rss_mb * 1024 * 1024:
+                logger.info(
+                    f"Recycling browser, RSS {rss // (1024 * 1024)}MB "
+                    + f"exceeds {max_rss_mb}MB"
+                )
+                pooled.retired = True
+
+            if not pooled.browser.is_connected():
+                pooled.retired = True
+
+            if pooled.retired and pooled.active_contexts <= 0:
+                if pooled in state.browsers:
+                    state.browsers.remove(pooled)
+                await self._close_browser(pooled)
+
+        return None
+
+    async def _launch(self, state: _BrowserPoolState, headless: bool) -> PooledBrowser:
+        if state.playwright is None:
+            state.playwright = await async_playwright().start()
+
+        logger.info(f"Launching chromium browser (headless: {headless})")
+        # Chromium ignores the unknown switch, it finds the browser's process
+        browser_arg = f"--web-queue-browser={uuid.uuid4().hex}"
+        browser = await state.playwright.chromium.launch(
+            headless=headless, args=[*BROWSER_LAUNCH_ARGS, browser_arg]
+        )
+        pid = await asyncio.to_thread(find_pid_by_arg, browser_arg)
+        if pid is None:
+            logger.warning("Browser process not found, its RSS is not limited")
+        return PooledBrowser(browser=browser, headless=headless, pid=pid)
+
+    async def _close_browser(self, pooled: PooledBrowser) -> None:
+        try:
+            await pooled.browser.close()
+        except Exception as e:
+            logger.warning(f"Failed to close browser: {e}")
+        return None
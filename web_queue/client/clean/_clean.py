@@ -1,3 +1,4 @@
+import functools
 import logging
 import typing
 
@@ -5,7 +6,9 @@ import bs4
 from rich.pretty import pretty_repr
 
 from web_queue.client import WebQueueClient
+from web_queue.utils import cpu_tasks
 from web_queue.utils.html_cleaner import HTMLCleaner
+from web_queue.utils.html_document import HTMLDocument
 
 logger = logging.getLogger(__name__)
 
@@ -24,3 +27,89 @@ class Clean:
         logger.info(f"Cleaning HTML: {pretty_repr(str(html), max_string=64)}")
         cleaned_html = HTMLCleaner.clean_as_main_content_html_str(html)
         return bs4.BeautifulSoup(cleaned_html, "html.parser")
+
+    def as_main_content_html(self, html: str) -> str:
+        """Cleaned and compacted main content, with the configured backend."""
+        logger.info(f"Cleaning HTML: {pretty_repr(html, max_string=64)}")
+        return self.client.settings.html_backend.clean_html(html)
+
+    def as_main_content_document(self, html: str) -> HTMLDocument:
+        """A prepared document, parsed and cleaned once for every later stage."""
+        logger.info(f"Cleaning HTML: {pretty_repr(html, max_string=64)}")
+        settings = self.client.settings
+        return HTMLDocument.from_html(
+            html,
+            backend=settings.html_backend,
+            streaming_min_length=settings.WEB_HTML_STREAMING_MIN_LENGTH,
+            streaming_max_buffer_length=settings.WEB_HTML_STREAMING_MAX_BUFFER_LENGTH,
+        )
+
+    async def as_main_content_document_offloaded(
+        self,
+        html: str,
+        *,
+        css_selectors: typing.Sequence[str] = (),
+        markdown_css_selectors: typing.Sequence[str] = (),
+    ) -> HTMLDocument:
+        """`as_main_content_document` off the event loop.
+
+        Large pages are cleaned in the CPU process pool, which returns the
+        cleaned HTML and its hash instead of a tree. Selections known ahead,
+        the texts of `css_selectors` and the markdown of
+        `markdown_css_selectors`, are made in the same worker call.
+        """
+        settings = self.client.settings
+        html_bytes = html.encode("utf-8")
+        if not settings.cpu_executor.offloads(len(html_bytes)):
+            return await settings.cpu_executor.run(
+                self.as_main_content_document, html, size=len(html_bytes)
+            )
+
+        logger.info(f"Cleaning HTML in a worker: {pretty_repr(html, max_string=64)}")
+        (
+            cleaned_html,
+            cleaned_html_md5,
+            texts,
+            markdowns,
+        ) = await settings.cpu_executor.run(
+            functools.partial(
+                cpu_tasks.clean_html,
+                css_selectors=css_selectors,
+                markdown_css_selectors=markdown_css_selectors,
+                streaming_min_length=settings.WEB_HTML_STREAMING_MIN_LENGTH,
+                streaming_max_buffer_length=(
+                    settings.WEB_HTML_STREAMING_MAX_BUFFER_LENGTH
+                ),
+            ),
+            html_bytes,
+            settings.WEB_HTML_BACKEND,
+            size=len(html_bytes),
+        )
+        return HTMLDocument.from_cleaned_html(
+            cleaned_html,
+            backend=settings.html_backend,
+            cleaned_html_md5=cleaned_html_md5,
+            texts=texts,
+            markdowns=markdowns,
+        )
+
+    async def as_markdown(
+        self, document: HTMLDocument, css_selector: str
+    ) -> typing.Optional[str]:
+        """Markdown of the matches of `css_selector` in the document."""
+        if document.has_markdown(css_selector):
+            return document.select_markdown(css_selector)
+
+        settings = self.client.settings
+        cleaned_html_bytes = document.cleaned_html.encode("utf-8")
+        if not settings.cpu_executor.offloads(len(cleaned_html_bytes)):
+            return await settings.cpu_executor.run(
+                document.select_markdown, css_selector, size=len(cleaned_html_bytes)
+            )
+        return await settings.cpu_executor.run(
+            cpu_tasks.select_markdown,
+            cleaned_html_bytes,
+            css_selector,
+            settings.WEB_HTML_BACKEND,
+            size=len(cleaned_html_bytes),
+        )
@@ -8,6 +8,26 @@ import pydantic as pydantic
 import pydantic_settings
 from str_or_none import str_or_none
 
+if typing.TYPE_CHECKING:
+    import redis
+
+    from web_queue.types.html_content_cache_entry import HTMLContentCacheEntry
+    from web_queue.types.html_metadata_response import HTMLMetadataResponse
+    from web_queue.types.memory_cache_stats import MemoryCacheStats
+    from web_queue.types.web_cache_entry import WebCacheEntry
+    from web_queue.utils.cpu_executor import CPUExecutor
+    from web_queue.utils.html_backend import HTMLBackend
+
+from web_queue.types.domain_rate_limit import DomainRateLimit
+from web_queue.types.url_canonical_rule import URLCanonicalRule
+from web_queue.utils.canonicalize_url import DEFAULT_TRACKING_PARAMS
+from web_queue.utils.html_backend import HTMLBackendName
+from web_queue.utils.memory_cache import MemoryCache
+from web_queue.utils.resource_policy import (
+    DEFAULT_BLOCKED_DOMAINS,
+    DEFAULT_BLOCKED_RESOURCE_TYPES,
+)
+
 
 class Settings(pydantic_settings.BaseSettings):
     # Core
@@ -18,10 +38,56 @@ class Settings(pydantic_settings.BaseSettings):
     # AI
     OPENAI_MODEL: str = pydantic.Field(default="gpt-4.1-nano")
     OPENAI_API_KEY: pydantic.SecretStr = pydantic.SecretStr("")
+    OPENAI_BASE_URL: typing.Optional[typing.Text] = pydantic.Field(
+        default=None
+    )  # Such as a local stand-in, None: the API's default
+    OPENAI_HTML_TOKEN_BUDGET: int = pydantic.Field(
+        default=4000
+    )  # Metadata prompt HTML is skeletonized to fit, 0: the full cleaned HTML
+    OPENAI_HTML_TEXT_SAMPLE_LENGTH: int = pydantic.Field(
+        default=80
+    )  # Characters kept at each end of a long text in the skeleton
+    OPENAI_STRUCTURE_CACHE_ENABLED: bool = pydantic.Field(
+        default=False
+    )  # Same-domain pages of a cached tag and class structure reuse its selectors
+
+    # AI batches, bulk extraction through the Batch API
+    OPENAI_BATCH_COMPLETION_WINDOW: typing.Literal["24h"] = pydantic.Field(
+        default="24h"
+    )
+    OPENAI_BATCH_MAX_REQUESTS: int = pydantic.Field(
+        default=50_000
+    )  # Per batch, more pages are split into several
+    OPENAI_BATCH_JOB_EXPIRE_SECONDS: int = pydantic.Field(
+        default=60 * 60 * 24 * 7
+    )  # 7 days, tracked jobs are forgotten after
+
+    # Learned site templates, pages of a known URL pattern skip the AI
+    WEB_SITE_TEMPLATES_ENABLED: bool = pydantic.Field(default=False)
+    WEB_SITE_TEMPLATE_MIN_BODY_LENGTH: int = pydantic.Field(
+        default=200
+    )  # Shorter content body text is a template failure
+    WEB_SITE_TEMPLATE_EXPIRE_SECONDS: int = pydantic.Field(
+        default=60 * 60 * 24 * 30
+    )  # 30 days, renewed when learned again
 
     # Cache
     WEB_CACHE_PATH: typing.Text = pydantic.Field(default="./.cache/web.cache")
     WEB_CACHE_EXPIRE_SECONDS: int = pydantic.Field(default=60 * 60 * 24)  # 1 day
+    WEB_CACHE_STALE_SECONDS: int = pydantic.Field(
+        default=60 * 60 * 24 * 7
+    )  # Kept for revalidation after expiry, 7 days
+    WEB_CACHE_STALE_WHILE_REVALIDATE: bool = pydantic.Field(default=False)
+    WEB_CACHE_ZSTD_DICTIONARY_ENABLED: bool = pydantic.Field(default=False)
+    WEB_CACHE_ZSTD_DICTIONARY_PATH: typing.Text = pydantic.Field(
+        default="./.cache/zstd_dictionaries.cache"
+    )
+    WEB_CACHE_ZSTD_DICTIONARY_SIZE: int = pydantic.Field(default=112_640)  # 110 KiB
+    WEB_CACHE_ZSTD_DICTIONARY_MIN_SAMPLES: int = pydantic.Field(default=20)
+    WEB_CACHE_ZSTD_DICTIONARY_MAX_SAMPLES: int = pydantic.Field(default=500)
+    WEB_CACHE_ZSTD_DICTIONARY_DOMAIN_GROUPS: typing.Dict[typing.Text, typing.Text] = (
+        pydantic.Field(default_factory=dict)
+    )  # Domain to group name, domains train their own dictionary by default
     WEB_SCREENSHOT_PATH: typing.Text = pydantic.Field(default="./data/screenshots")
     WEB_PDF_PATH: typing.Text = pydantic.Field(default="./data/pdfs")
     COMPRESSED_BASE64_CACHE_PATH: typing.Text = pydantic.Field(
@@ -30,6 +96,90 @@ class Settings(pydantic_settings.BaseSettings):
     COMPRESSED_BASE64_CACHE_EXPIRE_SECONDS: int = pydantic.Field(
         default=60 * 60 * 24
     )  # 1 day
+    RESULT_CACHE_PATH: typing.Text = pydantic.Field(default="./.cache/result.cache")
+    RESULT_CACHE_EXPIRE_SECONDS: int = pydantic.Field(default=60 * 60 * 24)  # 1 day
+
+    # Shared cache, all nodes read and write the caches above through it
+    SHARED_CACHE_BACKEND: typing.Literal["none", "redis", "directory"] = pydantic.Field(
+        default="none"
+    )
+    SHARED_CACHE_PATH: typing.Text = pydantic.Field(
+        default="./.cache/shared"
+    )  # Directory backend, on a disk mounted by every node
+    SHARED_CACHE_CHUNK_BYTES: int = pydantic.Field(default=512 * 1024)
+    SHARED_CACHE_LOCAL_COPY_SECONDS: int = pydantic.Field(
+        default=60 * 60
+    )  # Local read-through copy, 1 hour
+
+    # In-process memory cache, in front of the caches above
+    WEB_MEMORY_CACHE_MAX_BYTES: int = pydantic.Field(
+        default=64 * 1024 * 1024
+    )  # 0: disabled
+    WEB_MEMORY_CACHE_TTL_SECONDS: float = pydantic.Field(default=300.0)
+    COMPRESSED_BASE64_MEMORY_CACHE_MAX_BYTES: int = pydantic.Field(
+        default=8 * 1024 * 1024
+    )
+    COMPRESSED_BASE64_MEMORY_CACHE_TTL_SECONDS: float = pydantic.Field(default=300.0)
+    RESULT_MEMORY_CACHE_MAX_BYTES: int = pydantic.Field(default=16 * 1024 * 1024)
+    RESULT_MEMORY_CACHE_TTL_SECONDS: float = pydantic.Field(default=300.0)
+
+    # Browser
+    WEB_BROWSER_POOL_SIZE: int = pydantic.Field(default=1)
+    WEB_BROWSER_MAX_PAGES: int = pydantic.Field(default=50)  # 0: never recycle
+    WEB_BROWSER_MAX_RSS_MB: int = pydantic.Field(default=2048)  # 0: no ceiling
+    WEB_ADAPTIVE_READINESS: bool = pydantic.Field(default=True)
+    WEB_READINESS_QUIET_SECONDS: float = pydantic.Field(default=0.5)
+    WEB_BLOCKED_RESOURCE_TYPES: typing.List[typing.Text] = pydantic.Field(
+        default_factory=lambda: list(DEFAULT_BLOCKED_RESOURCE_TYPES)
+    )
+    WEB_BLOCKED_DOMAINS: typing.List[typing.Text] = pydantic.Field(
+        default_factory=lambda: list(DEFAULT_BLOCKED_DOMAINS)
+    )
+
+    # URL canonicalization
+    WEB_URL_TRACKING_PARAMS: typing.List[typing.Text] = pydantic.Field(
+        default_factory=lambda: list(DEFAULT_TRACKING_PARAMS)
+    )  # fnmatch patterns
+    WEB_URL_CANONICAL_RULES: typing.Dict[typing.Text, URLCanonicalRule] = (
+        pydantic.Field(default_factory=dict)
+    )  # Per-host query parameter rules
+
+    # Domain scheduler
+    WEB_DOMAIN_SCHEDULER_ENABLED: bool = pydantic.Field(default=True)
+    WEB_DOMAIN_REQUESTS_PER_SECOND: float = pydantic.Field(default=0.5)
+    WEB_DOMAIN_BURST: int = pydantic.Field(default=2)
+    WEB_DOMAIN_MAX_IN_FLIGHT: int = pydantic.Field(default=2)
+    WEB_DOMAIN_LEASE_SECONDS: int = pydantic.Field(default=300)
+    WEB_DOMAIN_RATE_LIMITS: typing.Dict[typing.Text, DomainRateLimit] = pydantic.Field(
+        default_factory=dict
+    )  # Per-host overrides
+
+    # Single-flight
+    WEB_SINGLE_FLIGHT_LEASE_SECONDS: int = pydantic.Field(default=300)
+    WEB_SINGLE_FLIGHT_WAIT_SECONDS: float = pydantic.Field(default=300.0)
+    WEB_SINGLE_FLIGHT_POLL_SECONDS: float = pydantic.Field(default=0.5)
+
+    # HTML processing
+    WEB_HTML_BACKEND: HTMLBackendName = pydantic.Field(
+        default="html.parser"
+    )  # "selectolax" needs the `fast` extra
+    WEB_HTML_STREAMING_MIN_LENGTH: int = pydantic.Field(
+        default=4 * 1024 * 1024
+    )  # Larger pages are cleaned without a full tree on html.parser, 0: never
+    WEB_HTML_STREAMING_MAX_BUFFER_LENGTH: int = pydantic.Field(
+        default=8 * 1024 * 1024
+    )  # Longest unparsed token the streaming cleaner holds
+
+    # CPU-bound stages: cleaning, hashing, compression and markdown
+    CPU_PROCESS_POOL_SIZE: int = pydantic.Field(default=2)  # 0: worker threads
+    CPU_PROCESS_INLINE_MAX_BYTES: int = pydantic.Field(
+        default=256 * 1024
+    )  # Smaller inputs run in a worker thread
+
+    # Plain HTTP
+    WEB_HTTP_TIMEOUT_SECONDS: float = pydantic.Field(default=10.0)
+    WEB_HTTP_MAX_CONNECTIONS: int = pydantic.Field(default=20)
+    WEB_HTTP_MIN_TEXT_LENGTH: int = pydantic.Field(default=500)
 
     @pydantic.model_validator(mode="after")
     def validate_values(self) -> typing.Self:
@@ -40,39 +190,148 @@ class Settings(pydantic_settings.BaseSettings):
         return self
 
     @functools.cached_property
-    def message_cache(self) -> "cachetic.Cachetic[typing.Text]":
+    def redis_client(self) -> "redis.Redis":
         import redis
 
+        return redis.from_url(self.WEB_QUEUE_URL.get_secret_value())
+
+    @functools.cached_property
+    def message_cache(self) -> "cachetic.Cachetic[typing.Text]":
         return cachetic.Cachetic(
             object_type=pydantic.TypeAdapter(typing.Text),
-            cache_url=redis.from_url(self.WEB_QUEUE_URL.get_secret_value()),
+            cache_url=self.redis_client,
             default_ttl=self.MESSAGE_CACHE_EXPIRE_SECONDS,
         )
 
+    @property
+    def html_backend(self) -> "HTMLBackend":
+        from web_queue.utils.html_backend import get_html_backend
+
+        return get_html_backend(self.WEB_HTML_BACKEND)
+
     @functools.cached_property
-    def openai_client(self) -> openai.AsyncOpenAI:
-        return openai.AsyncOpenAI(api_key=self.OPENAI_API_KEY.get_secret_value())
+    def cpu_executor(self) -> "CPUExecutor":
+        from web_queue.utils.cpu_executor import CPUExecutor
+
+        return CPUExecutor(
+            max_workers=self.CPU_PROCESS_POOL_SIZE,
+            inline_max_bytes=self.CPU_PROCESS_INLINE_MAX_BYTES,
+        )
 
     @functools.cached_property
-    def web_cache(self) -> "cachetic.Cachetic[typing.Text]":
-        import cachetic
+    def openai_client(self) -> openai.AsyncOpenAI:
+        return openai.AsyncOpenAI(
+            api_key=self.OPENAI_API_KEY.get_secret_value(),
+            base_url=self.OPENAI_BASE_URL,
+        )
 
-        return cachetic.Cachetic(
-            object_type=pydantic.TypeAdapter(typing.Text),
-            cache_url=pathlib.Path(self.WEB_CACHE_PATH),
+    @functools.cached_property
+    def web_cache(self) -> "cachetic.Cachetic[bytes]":
+        return self._get_bytes_cache(
+            "web_cache",
+            local_path=self.WEB_CACHE_PATH,
             default_ttl=self.WEB_CACHE_EXPIRE_SECONDS,
         )
 
     @functools.cached_property
-    def compressed_base64_cache(self) -> "cachetic.Cachetic[typing.Text]":
-        import cachetic
+    def zstd_dictionary_cache(self) -> "cachetic.Cachetic[bytes]":
+        return self._get_bytes_cache(
+            "zstd_dictionary_cache",
+            local_path=self.WEB_CACHE_ZSTD_DICTIONARY_PATH,
+            default_ttl=-1,  # Entries may reference any version
+        )
 
-        return cachetic.Cachetic(
-            object_type=pydantic.TypeAdapter(typing.Text),
-            cache_url=pathlib.Path(self.COMPRESSED_BASE64_CACHE_PATH),
+    @functools.cached_property
+    def compressed_base64_cache(self) -> "cachetic.Cachetic[bytes]":
+        """Raw zstd frames, the name is kept from the former base64 storage."""
+        return self._get_bytes_cache(
+            "compressed_base64_cache",
+            local_path=self.COMPRESSED_BASE64_CACHE_PATH,
             default_ttl=self.COMPRESSED_BASE64_CACHE_EXPIRE_SECONDS,
         )
 
+    @functools.cached_property
+    def result_cache(self) -> "cachetic.Cachetic[bytes]":
+        return self._get_bytes_cache(
+            "result_cache",
+            local_path=self.RESULT_CACHE_PATH,
+            default_ttl=self.RESULT_CACHE_EXPIRE_SECONDS,
+        )
+
+    def _get_bytes_cache(
+        self, name: str, *, local_path: typing.Text, default_ttl: int
+    ) -> "cachetic.Cachetic[bytes]":
+        """A local disk cache, or a shared one with a local read-through copy."""
+        if self.SHARED_CACHE_BACKEND == "none":
+            return cachetic.Cachetic(
+                object_type=pydantic.TypeAdapter(bytes),
+                cache_url=pathlib.Path(local_path),
+                default_ttl=default_ttl,
+            )
+
+        import diskcache
+
+        from web_queue.utils.shared_cache import (
+            ChunkedRedisCache,
+            ContentAddressedDirectoryCache,
+            ReadThroughCache,
+            SharedCachetic,
+        )
+
+        shared: ChunkedRedisCache | ContentAddressedDirectoryCache
+        if self.SHARED_CACHE_BACKEND == "redis":
+            shared = ChunkedRedisCache(
+                self.redis_client,
+                namespace=f"{self.WEB_QUEUE_NAME}:cache:{name}",
+                chunk_bytes=self.SHARED_CACHE_CHUNK_BYTES,
+            )
+        else:
+            shared = ContentAddressedDirectoryCache(
+                pathlib.Path(self.SHARED_CACHE_PATH) / name,
+                chunk_bytes=self.SHARED_CACHE_CHUNK_BYTES,
+            )
+
+        return SharedCachetic(
+            object_type=pydantic.TypeAdapter(bytes),
+            cache_url=pathlib.Path(local_path),
+            default_ttl=default_ttl,
+            backend=ReadThroughCache(
+                local=diskcache.Cache(local_path),
+                shared=shared,
+                local_ttl=self.SHARED_CACHE_LOCAL_COPY_SECONDS,
+            ),
+        )
+
+    @functools.cached_property
+    def web_memory_cache(self) -> "MemoryCache[WebCacheEntry]":
+        return MemoryCache(
+            max_bytes=self.WEB_MEMORY_CACHE_MAX_BYTES,
+            ttl=self.WEB_MEMORY_CACHE_TTL_SECONDS,
+        )
+
+    @functools.cached_property
+    def compressed_base64_memory_cache(
+        self,
+    ) -> "MemoryCache[HTMLMetadataResponse]":
+        return MemoryCache(
+            max_bytes=self.COMPRESSED_BASE64_MEMORY_CACHE_MAX_BYTES,
+            ttl=self.COMPRESSED_BASE64_MEMORY_CACHE_TTL_SECONDS,
+        )
+
+    @functools.cached_property
+    def result_memory_cache(self) -> "MemoryCache[HTMLContentCacheEntry]":
+        return MemoryCache(
+            max_bytes=self.RESULT_MEMORY_CACHE_MAX_BYTES,
+            ttl=self.RESULT_MEMORY_CACHE_TTL_SECONDS,
+        )
+
+    def get_memory_cache_stats(self) -> typing.Dict[str, "MemoryCacheStats"]:
+        return {
+            "web_cache": self.web_memory_cache.stats,
+            "compressed_base64_cache": self.compressed_base64_memory_cache.stats,
+            "result_cache": self.result_memory_cache.stats,
+        }
+
     @property
     def web_queue_safe_url(self) -> str:
         import yarl
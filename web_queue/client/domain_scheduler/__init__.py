@@ -0,0 +1,3 @@
+from web_queue.client.domain_scheduler._domain_scheduler import DomainScheduler
+
+__all__ = ["DomainScheduler"]
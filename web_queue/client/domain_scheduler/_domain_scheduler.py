@@ -0,0 +1,158 @@
+import asyncio
+import contextlib
+import functools
+import logging
+import secrets
+import typing
+
+import httpx
+import redis.exceptions
+import yarl
+
+from web_queue.client import WebQueueClient
+from web_queue.types.domain_rate_limit import DomainRateLimit
+
+if typing.TYPE_CHECKING:
+    from redis.commands.core import Script
+
+logger = logging.getLogger(__name__)
+
+# KEYS: bucket hash, in-flight zset
+# ARGV: requests per second, burst, max in flight, lease id, lease ttl, acquire
+# Returns '0' when a slot is (or would be) granted, else seconds to wait.
+ACQUIRE_SCRIPT = """
+local t = redis.call('TIME')
+local now = tonumber(t[1]) + tonumber(t[2]) / 1000000
+local rate = tonumber(ARGV[1])
+local burst = tonumber(ARGV[2])
+local max_in_flight = tonumber(ARGV[3])
+local lease_ttl = tonumber(ARGV[5])
+local acquire = ARGV[6] == '1'
+
+if max_in_flight > 0 then
+    redis.call('ZREMRANGEBYSCORE', KEYS[2], '-inf', now)
+    if redis.call('ZCARD', KEYS[2]) >= max_in_flight then
+        return '0.5'
+    end
+end
+
+local tokens = burst
+if rate > 0 then
+    local bucket = redis.call('HMGET', KEYS[1], 'tokens', 'ts')
+    if bucket[1] then
+        local elapsed = math.max(now - tonumber(bucket[2]), 0)
+        tokens = math.min(burst, tonumber(bucket[1]) + elapsed * rate)
+    end
+    if tokens < 1 then
+        return tostring((1 - tokens) / rate)
+    end
+end
+
+if acquire then
+    if rate > 0 then
+        redis.call('HSET', KEYS[1], 'tokens', tokens - 1, 'ts', now)
+        redis.call('EXPIRE', KEYS[1], math.ceil(burst / rate) + 60)
+    end
+    if max_in_flight > 0 then
+        redis.call('ZADD', KEYS[2], now + lease_ttl, ARGV[4])
+        redis.call('EXPIRE', KEYS[2], lease_ttl + 60)
+    end
+end
+return '0'
+"""
+
+
+class DomainScheduler:
+    """Per-domain politeness shared by every worker through Redis.
+
+    Each host gets a token bucket (requests per second with a burst) and a
+    cap on in-flight fetches. In-flight leases expire after
+    `WEB_DOMAIN_LEASE_SECONDS` so crashed workers do not hold slots forever.
+    Redis errors fail open, fetching is never blocked by the scheduler itself.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+
+    @functools.cached_property
+    def _acquire_script(self) -> "Script":
+        return self.client.settings.redis_client.register_script(ACQUIRE_SCRIPT)
+
+    def get_domain(self, url: typing.Text | yarl.URL | httpx.URL) -> str:
+        canonical_url = self.client.url_canonicalizer.canonicalize(url)
+        return yarl.URL(canonical_url).host or ""
+
+    def get_rate_limit(self, domain: str) -> DomainRateLimit:
+        settings = self.client.settings
+        return settings.WEB_DOMAIN_RATE_LIMITS.get(domain) or DomainRateLimit(
+            requests_per_second=settings.WEB_DOMAIN_REQUESTS_PER_SECOND,
+            burst=settings.WEB_DOMAIN_BURST,
+            max_in_flight=settings.WEB_DOMAIN_MAX_IN_FLIGHT,
+        )
+
+    def get_wait_seconds(self, url: typing.Text | yarl.URL | httpx.URL) -> float:
+        """Seconds until the domain has a free slot, without taking it."""
+        return self._run_script(url, lease_id="", acquire=False)
+
+    def try_acquire(
+        self, url: typing.Text | yarl.URL | httpx.URL, lease_id: str
+    ) -> float:
+        """Take a slot for `lease_id`, returns 0 or the seconds to wait."""
+        return self._run_script(url, lease_id=lease_id, acquire=True)
+
+    def release(self, url: typing.Text | yarl.URL | httpx.URL, lease_id: str) -> None:
+        if self.get_rate_limit(self.get_domain(url)).max_in_flight <= 0:
+            return None
+        try:
+            self.client.settings.redis_client.zrem(
+                self.get_in_flight_key(self.get_domain(url)), lease_id
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to release domain slot for '{url}': {e}")
+        return None
+
+    @contextlib.asynccontextmanager
+    async def slot(
+        self, url: typing.Text | yarl.URL | httpx.URL
+    ) -> typing.AsyncIterator[None]:
+        """Wait for and hold a fetch slot of the URL's domain."""
+        if not self.client.settings.WEB_DOMAIN_SCHEDULER_ENABLED:
+            yield
+            return
+
+        lease_id = secrets.token_hex(8)
+        while (wait := await asyncio.to_thread(self.try_acquire, url, lease_id)) > 0:
+            logger.debug(f"Domain of '{url}' is busy, waiting {wait:.2f}s")
+            await asyncio.sleep(wait)
+        try:
+            yield
+        finally:
+            await asyncio.to_thread(self.release, url, lease_id)
+
+    def get_bucket_key(self, domain: str) -> str:
+        return f"{self.client.settings.WEB_QUEUE_NAME}:domain:{domain}:bucket"
+
+    def get_in_flight_key(self, domain: str) -> str:
+        return f"{self.client.settings.WEB_QUEUE_NAME}:domain:{domain}:in_flight"
+
+    def _run_script(
+        self, url: typing.Text | yarl.URL | httpx.URL, *, lease_id: str, acquire: bool
+    ) -> float:
+        domain = self.get_domain(url)
+        rate_limit = self.get_rate_limit(domain)
+        try:
+            wait = self._acquire_script(
+                keys=[self.get_bucket_key(domain), self.get_in_flight_key(domain)],
+                args=[
+                    rate_limit.requests_per_second,
+                    max(rate_limit.burst, 1),
+                    rate_limit.max_in_flight,
+                    lease_id,
+                    self.client.settings.WEB_DOMAIN_LEASE_SECONDS,
+                    "1" if acquire else "0",
+                ],
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Domain scheduler unavailable, not limiting '{url}': {e}")
+            return 0.0
+        return float(wait)
@@ -0,0 +1,3 @@
+from web_queue.client.single_flight._single_flight import SingleFlight
+
+__all__ = ["SingleFlight"]
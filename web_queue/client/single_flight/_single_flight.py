@@ -0,0 +1,175 @@
+import asyncio
+import collections
+import logging
+import secrets
+import threading
+import time
+import typing
+
+import redis.exceptions
+
+from web_queue.client import WebQueueClient
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+# Delete the lease only if it is still ours
+RELEASE_SCRIPT = """
+if redis.call('GET', KEYS[1]) == ARGV[1] then
+    return redis.call('DEL', KEYS[1])
+end
+return 0
+"""
+
+
+class SingleFlight:
+    """Coalesces concurrent work for the same key.
+
+    In-process callers on one event loop await the leader's shared future.
+    Across workers a Redis lease elects one leader, followers poll
+    `get_cached` until the leader has stored its result.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+        self.hits: typing.Counter[str] = collections.Counter()
+        self._local = threading.local()
+
+    @property
+    def hit_count(self) -> int:
+        return sum(self.hits.values())
+
+    def get_cluster_hit_count(self) -> int:
+        """Dedup hits counted by every worker sharing the Redis."""
+        try:
+            return int(self.client.settings.redis_client.get(self.hits_key) or 0)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to read single-flight hit count: {e}")
+            return 0
+
+    @property
+    def hits_key(self) -> str:
+        return f"{self.client.settings.WEB_QUEUE_NAME}:single_flight:hits"
+
+    async def run(
+        self,
+        key: str,
+        func: typing.Callable[[], typing.Awaitable[T]],
+        *,
+        get_cached: typing.Optional[
+            typing.Callable[[], typing.Awaitable[typing.Optional[T]]]
+        ] = None,
+    ) -> T:
+        """Run `func` once per key, sharing its result with concurrent callers.
+
+        Without `get_cached` only in-process callers are coalesced. When the
+        leader is cancelled its followers are not, one of them runs instead.
+        """
+        in_flight = self._get_in_flight()
+        is_following = False
+        while (leader_future := in_flight.get(key)) is not None:
+            if not is_following:
+                is_following = True
+                await self._count_hit("in_process")
+            try:
+                return await asyncio.shield(leader_future)
+            except asyncio.CancelledError:
+                task = asyncio.current_task()
+                if not leader_future.cancelled() or (task and task.cancelling()):
+                    raise  # This caller was cancelled itself
+                logger.debug(f"Leader of '{key}' was cancelled, taking over")
+
+        future: asyncio.Future[T] = asyncio.get_running_loop().create_future()
+        in_flight[key] = future
+        try:
+            if get_cached is None:
+                result = await func()
+            else:
+                result = await self._run_with_lease(key, func, get_cached)
+        except BaseException as e:
+            if isinstance(e, asyncio.CancelledError):
+                future.cancel()
+            else:
+                future.set_exception(e)
+                future.exception()  # Mark retrieved when nobody is waiting
+            raise
+        else:
+            future.set_result(result)
+            return result
+        finally:
+            if in_flight.get(key) is future:
+                del in_flight[key]
+
+    async def _run_with_lease(
+        self,
+        key: str,
+        func: typing.Callable[[], typing.Awaitable[T]],
+        get_cached: typing.Callable[[], typing.Awaitable[typing.Optional[T]]],
+    ) -> T:
+        settings = self.client.settings
+        lease_key = f"{settings.WEB_QUEUE_NAME}:single_flight:{key}"
+        token = secrets.token_hex(8)
+        deadline = time.monotonic() + settings.WEB_SINGLE_FLIGHT_WAIT_SECONDS
+        is_following = False
+
+        while time.monotonic() < deadline:
+            if await asyncio.to_thread(self._acquire_lease, lease_key, token):
+                break
+
+            if not is_following:
+                is_following = True
+                await self._count_hit("cross_worker")
+                logger.debug(f"Waiting for the leader of '{key}'")
+
+            await asyncio.sleep(settings.WEB_SINGLE_FLIGHT_POLL_SECONDS)
+            cached = await get_cached()
+            if cached is not None:
+                return cached
+        else:
+            logger.warning(f"Timeout waiting for the leader of '{key}', running")
+
+        try:
+            return await func()
+        finally:
+            await asyncio.to_thread(self._release_lease, lease_key, token)
+
+    def _acquire_lease(self, lease_key: str, token: str) -> bool:
+        try:
+            return bool(
+                self.client.settings.redis_client.set(
+                    lease_key,
+                    token,
+                    nx=True,
+                    ex=self.client.settings.WEB_SINGLE_FLIGHT_LEASE_SECONDS,
+                )
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Single-flight lease unavailable, running anyway: {e}")
+            return True
+
+    def _release_lease(self, lease_key: str, token: str) -> None:
+        try:
+            self.client.settings.redis_client.eval(RELEASE_SCRIPT, 1, lease_key, token)
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to release single-flight lease: {e}")
+        return None
+
+    async def _count_hit(self, kind: str) -> None:
+        self.hits[kind] += 1
+        await asyncio.to_thread(self._incr_cluster_hits)
+        return None
+
+    def _incr_cluster_hits(self) -> None:
+        try:
+            self.client.settings.redis_client.incr(self.hits_key)
+        except redis.exceptions.RedisError:
+            pass
+        return None
+
+    def _get_in_flight(self) -> typing.Dict[str, asyncio.Future]:
+        loop = asyncio.get_running_loop()
+        if getattr(self._local, "loop", None) is not loop:
+            self._local.loop = loop
+            self._local.in_flight = {}
+        return self._local.in_flight
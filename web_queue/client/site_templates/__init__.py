@@ -0,0 +1,3 @@
+from web_queue.client.site_templates._site_templates import SiteTemplates
+
+__all__ = ["SiteTemplates"]
@@ -0,0 +1,178 @@
+import asyncio
+import logging
+import typing
+
+import httpx
+import redis.exceptions
+import yarl
+
+from web_queue.client import WebQueueClient
+from web_queue.types.html_metadata_response import HTMLMetadataResponse
+from web_queue.types.site_template import SiteTemplate, SiteTemplateStats
+from web_queue.utils import cpu_tasks
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.site_template import (
+    apply_site_template,
+    get_css_selectors,
+    get_url_pattern,
+    learn_site_template,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class SiteTemplates:
+    """Extraction templates learned per domain and URL pattern.
+
+    After the AI extracts a page, the selectors of its values are stored for
+    the page's URL pattern, shared by every worker through Redis. Later pages
+    of the pattern are extracted with the selectors, and go to the AI only
+    when the selection is empty or implausible. Hits and failures are counted
+    per template. Redis errors fail open, the AI is used instead.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+
+    def get_key(self, domain: str, url_pattern: str) -> str:
+        return (
+            f"{self.client.settings.WEB_QUEUE_NAME}:site_template:"
+            + f"{domain}:{url_pattern}"
+        )
+
+    def get(
+        self, url: typing.Text | yarl.URL | httpx.URL
+    ) -> typing.Optional[SiteTemplate]:
+        try:
+            template_json = self.client.settings.redis_client.hget(
+                self.get_key(*get_url_pattern(str(url))), "template"
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to read site template for '{url}': {e}")
+            return None
+        if template_json is None:
+            return None
+        return SiteTemplate.model_validate_json(template_json)
+
+    def get_stats(self, url: typing.Text | yarl.URL | httpx.URL) -> SiteTemplateStats:
+        try:
+            hits, failures = self.client.settings.redis_client.hmget(
+                self.get_key(*get_url_pattern(str(url))), "hits", "failures"
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to read site template stats for '{url}': {e}")
+            return SiteTemplateStats()
+        return SiteTemplateStats(hits=int(hits or 0), failures=int(failures or 0))
+
+    async def get_template_css_selectors(
+        self, url: typing.Text | yarl.URL | httpx.URL
+    ) -> typing.List[str]:
+        """The selectors of the URL pattern's template, the content body first."""
+        template = await asyncio.to_thread(self.get, url)
+        return get_css_selectors(template) if template is not None else []
+
+    def save(self, template: SiteTemplate) -> None:
+        """Store `template` for its URL pattern, keeping the pattern's counts."""
+        key = self.get_key(template.domain, template.url_pattern)
+        try:
+            pipeline = self.client.settings.redis_client.pipeline()
+            pipeline.hset(key, "template", template.model_dump_json())
+            pipeline.expire(key, self.client.settings.WEB_SITE_TEMPLATE_EXPIRE_SECONDS)
+            pipeline.execute()
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to save site template '{key}': {e}")
+        return None
+
+    def record(self, template: SiteTemplate, *, hit: bool) -> None:
+        key = self.get_key(template.domain, template.url_pattern)
+        try:
+            self.client.settings.redis_client.hincrby(
+                key, "hits" if hit else "failures", 1
+            )
+        except redis.exceptions.RedisError as e:
+            logger.warning(f"Failed to count site template '{key}': {e}")
+        return None
+
+    async def extract(
+        self, url: typing.Text | yarl.URL | httpx.URL, document: HTMLDocument
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        """The page's metadata from its site template, None if it does not fit."""
+        template = await asyncio.to_thread(self.get, url)
+        if template is None:
+            return None
+
+        metadata = await self.apply(template, document, url=url)
+        await asyncio.to_thread(self.record, template, hit=metadata is not None)
+        if metadata is None:
+            logger.info(
+                f"Site template of '{template.domain}{template.url_pattern}' "
+                + f"does not fit '{url}'"
+            )
+            return None
+
+        logger.info(
+            f"Extracted '{url}' with the site template of "
+            + f"'{template.domain}{template.url_pattern}'"
+        )
+        return metadata
+
+    async def build(
+        self,
+        document: HTMLDocument,
+        metadata: HTMLMetadataResponse,
+        *,
+        url: typing.Optional[typing.Text | yarl.URL | httpx.URL] = None,
+    ) -> typing.Optional[SiteTemplate]:
+        """The template of the page's metadata, see `learn_site_template`."""
+        return await self.client.settings.cpu_executor.run(
+            learn_site_template,
+            document.cleaned_html,
+            str(url) if url is not None else None,
+            metadata,
+            size=len(document.cleaned_html.encode("utf-8")),
+        )
+
+    async def apply(
+        self,
+        template: SiteTemplate,
+        document: HTMLDocument,
+        *,
+        url: typing.Optional[typing.Text | yarl.URL | httpx.URL] = None,
+    ) -> typing.Optional[HTMLMetadataResponse]:
+        """The page's metadata by `template`, None if it does not fit."""
+        try:
+            texts = await self._select_texts(document, get_css_selectors(template))
+        except Exception as e:
+            logger.warning(f"Site template selection failed: {e}")
+            return None
+
+        metadata = apply_site_template(
+            template,
+            texts,
+            str(url) if url is not None else None,
+            min_body_length=self.client.settings.WEB_SITE_TEMPLATE_MIN_BODY_LENGTH,
+        )
+        if metadata is not None:
+            metadata._html = document.cleaned_html
+        return metadata
+
+    async def _select_texts(
+        self, document: HTMLDocument, css_selectors: typing.List[str]
+    ) -> typing.Dict[str, typing.List[str]]:
+        if document.has_texts(css_selectors):
+            return {s: document.select_text(s) for s in css_selectors}
+
+        settings = self.client.settings
+        cleaned_html_bytes = document.cleaned_html.encode("utf-8")
+        if not settings.cpu_executor.offloads(len(cleaned_html_bytes)):
+            return await settings.cpu_executor.run(
+                lambda: {s: document.select_text(s) for s in css_selectors},
+                size=len(cleaned_html_bytes),
+            )
+        return await settings.cpu_executor.run(
+            cpu_tasks.select_texts,
+            cleaned_html_bytes,
+            css_selectors,
+            settings.WEB_HTML_BACKEND,
+            size=len(cleaned_html_bytes),
+        )
@@ -0,0 +1,3 @@
+from web_queue.client.url_canonicalizer._url_canonicalizer import URLCanonicalizer
+
+__all__ = ["URLCanonicalizer"]
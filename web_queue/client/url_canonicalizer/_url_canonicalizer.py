@@ -0,0 +1,50 @@
+import collections
+import logging
+import typing
+
+import httpx
+import yarl
+
+from web_queue.client import WebQueueClient
+from web_queue.types.url_canonical_rule import URLCanonicalRule
+from web_queue.utils.canonicalize_url import canonicalize_url
+
+logger = logging.getLogger(__name__)
+
+
+class URLCanonicalizer:
+    """Canonical URLs for every cache, dedup and rate-limit key.
+
+    Per-domain rules come from `WEB_URL_CANONICAL_RULES`, a rule for
+    `example.com` also applies to `www.example.com`. `hits` counts cache hits
+    that only happened because the requested URL was canonicalized.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+        self.hits: typing.Counter[str] = collections.Counter()
+
+    @property
+    def hit_count(self) -> int:
+        return sum(self.hits.values())
+
+    def get_rule(self, host: str) -> typing.Optional[URLCanonicalRule]:
+        rules = self.client.settings.WEB_URL_CANONICAL_RULES
+        return rules.get(host) or rules.get(host.removeprefix("www."))
+
+    def canonicalize(self, url: typing.Text | yarl.URL | httpx.URL) -> str:
+        host = (yarl.URL(str(url)).host or "").lower()
+        return canonicalize_url(
+            url,
+            rule=self.get_rule(host),
+            tracking_params=self.client.settings.WEB_URL_TRACKING_PARAMS,
+        )
+
+    def record_hit(
+        self, url: typing.Text | yarl.URL | httpx.URL, canonical_url: str, cache: str
+    ) -> None:
+        """Count a `cache` hit if the requested URL differs from its key."""
+        if str(url) != canonical_url:
+            self.hits[cache] += 1
+            logger.debug(f"Canonical {cache} cache hit: '{url}' -> '{canonical_url}'")
+        return None
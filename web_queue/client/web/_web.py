@@ -1,6 +1,11 @@
 import asyncio
+import functools
+import hashlib
 import logging
+import pathlib
 import secrets
+import sys
+import threading
 import time
 import typing
 
@@ -9,17 +14,27 @@ import fastapi
 import httpx
 import yarl
 from playwright._impl._api_structures import ViewportSize
-from playwright.async_api import async_playwright
+from playwright.async_api import Error as PlaywrightError
+from playwright.async_api import Response as PlaywrightResponse
 from playwright.sync_api import TimeoutError as PlaywrightTimeoutError
 from str_or_none import str_or_none
 
 from web_queue.client import WebQueueClient
+from web_queue.types.artifact_capture import ArtifactCapture
 from web_queue.types.message import MessageUpdate
-from web_queue.utils.compression import compress, decompress
-from web_queue.utils.human_delay import human_delay
+from web_queue.types.web_cache_entry import WebCacheEntry
+from web_queue.types.web_fetch_result import FetchSource, FetchStats, WebFetchResult
+from web_queue.utils.artifact_writer import ArtifactWriter
+from web_queue.utils.content_sufficiency import is_content_sufficient
+from web_queue.utils.page_readiness import PageReadiness
 from web_queue.utils.page_with_init_script import page_with_init_script
+from web_queue.utils.resource_policy import ResourcePolicy
 from web_queue.utils.simulate_mouse_circling import simulate_mouse_circling
 from web_queue.utils.simulate_scrolling import simulate_scrolling
+from web_queue.utils.web_cache_codec import (
+    decode_web_cache_entry,
+    encode_web_cache_entry_json,
+)
 
 logger = logging.getLogger(__name__)
 
@@ -38,8 +53,54 @@ class Web:
 
     def __init__(self, client: WebQueueClient):
         self.client = client
+        self._local = threading.local()
+        self._background_tasks: typing.Set[asyncio.Task] = set()
+
+    @property
+    def http_client(self) -> httpx.AsyncClient:
+        """Pooled HTTP client of the current thread's event loop."""
+        loop = asyncio.get_running_loop()
+        if getattr(self._local, "loop", None) is not loop:
+            self._local.loop = loop
+            self._local.http_client = httpx.AsyncClient(
+                follow_redirects=True,
+                timeout=self.client.settings.WEB_HTTP_TIMEOUT_SECONDS,
+                limits=httpx.Limits(
+                    max_connections=self.client.settings.WEB_HTTP_MAX_CONNECTIONS
+                ),
+                headers={
+                    "Accept-Language": "en-US,en;q=0.9,ja;q=0.8",
+                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,*/*;q=0.8",  # noqa: E501
+                },
+            )
+        return self._local.http_client
+
+    @functools.cached_property
+    def artifact_writer(self) -> ArtifactWriter:
+        return ArtifactWriter()
+
+    async def close(self) -> None:
+        if getattr(self._local, "loop", None) is None:
+            return None
+        await self._local.http_client.aclose()
+        self._local.loop = None
+        self._local.http_client = None
+        return None
+
+    def shutdown(self) -> None:
+        if "artifact_writer" in self.__dict__:
+            self.artifact_writer.shutdown(wait=True)
+        return None
 
     async def fetch(
+        self,
+        url: typing.Text | yarl.URL | httpx.URL,
+        **kwargs: typing.Any,
+    ) -> bs4.BeautifulSoup:
+        web_fetch_result = await self.fetch_page(url, **kwargs)
+        return bs4.BeautifulSoup(web_fetch_result.html, "html.parser")
+
+    async def fetch_page(
         self,
         url: typing.Text | yarl.URL | httpx.URL,
         *,
@@ -49,61 +110,423 @@ class Web:
         scrolling_times: int = 3,
         human_delay_base_delay: float = 1.2,
         dynamic_content_loading_delay: float = 2.0,
+        http_first: bool = False,
+        http_expected_css_selector: typing.Optional[typing.Text] = None,
+        blocked_resource_types: typing.Optional[typing.List[typing.Text]] = None,
+        blocked_domains: typing.Optional[typing.List[typing.Text]] = None,
+        artifact_capture: ArtifactCapture | str = ArtifactCapture.NONE,
         step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
-    ) -> bs4.BeautifulSoup:
+    ) -> WebFetchResult:
         _url = str_or_none(str(url))
         if not _url:
             raise fastapi.exceptions.HTTPException(status_code=400, detail="Empty URL")
+        # Fetched as given, cached and coalesced by its canonical form
+        cache_key = self.client.url_canonicalizer.canonicalize(_url)
 
-        html_content: typing.Text | None = None
-        h_delay = human_delay_base_delay
-        d_delay = dynamic_content_loading_delay
+        started_at = time.perf_counter()
+
+        fetch_uncached = functools.partial(
+            self._fetch_page_uncached,
+            _url,
+            cache_key=cache_key,
+            headless=headless,
+            goto_timeout=goto_timeout,
+            circling_times=circling_times,
+            scrolling_times=scrolling_times,
+            human_delay_base_delay=human_delay_base_delay,
+            dynamic_content_loading_delay=dynamic_content_loading_delay,
+            http_first=http_first,
+            http_expected_css_selector=http_expected_css_selector,
+            blocked_resource_types=blocked_resource_types,
+            blocked_domains=blocked_domains,
+            artifact_capture=artifact_capture,
+            step_callback=step_callback,
+        )
 
-        logger.info(f"Browser is fetching {_url}")
-        maybe_html_content = self.client.settings.web_cache.get(_url)
-        if maybe_html_content:
+        logger.info(f"Web is fetching {_url}")
+        web_fetch_result: WebFetchResult | None = None
+        if ArtifactCapture(artifact_capture) != ArtifactCapture.NONE:
+            # Artifacts need this render, not a cached or coalesced page
+            web_fetch_result = await fetch_uncached()
+            cache_entry = None
+        else:
+            cache_entry = await self.get_cache_entry(cache_key)
+        if cache_entry is None:
+            pass
+        elif cache_entry.is_fresh(self.client.settings.WEB_CACHE_EXPIRE_SECONDS):
             logger.debug(f"Hit web cache for {_url}")
-            html_content = await asyncio.to_thread(
-                decompress, maybe_html_content, format="zstd"
+            self.client.url_canonicalizer.record_hit(url, cache_key, "web")
+            web_fetch_result = await self._cache_entry_to_result(
+                _url, cache_entry, source=FetchSource.CACHE
             )
-            return bs4.BeautifulSoup(html_content, "html.parser")
-
-        async with async_playwright() as p:
-            browser = await p.chromium.launch(
-                headless=headless,
-                args=[
-                    "--no-sandbox",
-                    "--disable-blink-features=AutomationControlled",
-                    "--disable-dev-shm-usage",
-                    "--disable-web-security",
-                    "--disable-features=VizDisplayCompositor",
-                ],
+        elif cache_entry.can_revalidate:
+            if self.client.settings.WEB_CACHE_STALE_WHILE_REVALIDATE:
+                logger.debug(f"Serving stale web cache for {_url}, revalidating")
+                self.client.url_canonicalizer.record_hit(url, cache_key, "web")
+                web_fetch_result = await self._cache_entry_to_result(
+                    _url, cache_entry, source=FetchSource.CACHE
+                )
+                web_fetch_result.stats.stale = True
+                self._revalidate_in_background(
+                    _url, cache_entry, fetch_uncached, cache_key=cache_key
+                )
+            else:
+                web_fetch_result = await self.client.single_flight.run(
+                    f"revalidate:{cache_key}",
+                    functools.partial(
+                        self.revalidate, _url, cache_entry, cache_key=cache_key
+                    ),
+                )
+
+        if web_fetch_result is None:
+            web_fetch_result = await self.client.single_flight.run(
+                f"web:{cache_key}",
+                fetch_uncached,
+                get_cached=functools.partial(self.get_cached_page, _url),
+            )
+
+        # Results may be shared by coalesced callers, never mutate them in place
+        stats = web_fetch_result.stats.model_copy(
+            update={"elapsed_seconds": time.perf_counter() - started_at}
+        )
+        logger.info(
+            f"Fetched {_url} via {stats.source} in {stats.elapsed_seconds:.2f}s "
+            + f"(waited {stats.waited_seconds:.2f}s)"
+        )
+        return web_fetch_result.model_copy(update={"stats": stats})
+
+    async def get_cached_page(
+        self, url: typing.Text
+    ) -> typing.Optional[WebFetchResult]:
+        """Return the cached page if it is still fresh."""
+        cache_entry = await self.get_cache_entry(
+            self.client.url_canonicalizer.canonicalize(url)
+        )
+        if cache_entry is None or not cache_entry.is_fresh(
+            self.client.settings.WEB_CACHE_EXPIRE_SECONDS
+        ):
+            return None
+        return await self._cache_entry_to_result(
+            url, cache_entry, source=FetchSource.CACHE
+        )
+
+    async def get_cache_entry(self, url: typing.Text) -> typing.Optional[WebCacheEntry]:
+        memory_cache = self.client.settings.web_memory_cache
+        if (cache_entry := memory_cache.get(url)) is not None:
+            return cache_entry
+
+        maybe_cached = await asyncio.to_thread(self.client.settings.web_cache.get, url)
+        if not maybe_cached:
+            return None
+        try:
+            cache_entry = await asyncio.to_thread(
+                decode_web_cache_entry,
+                maybe_cached,
+                get_dictionary=self.client.zstd_dictionaries.get_by_id,
+            )
+        except ValueError as e:
+            logger.warning(f"Unreadable web cache entry for '{url}': {e}")
+            return None
+        memory_cache.set(url, cache_entry, size=get_cache_entry_size(cache_entry))
+        return cache_entry
+
+    async def set_cache_entry(
+        self, url: typing.Text, cache_entry: WebCacheEntry
+    ) -> None:
+        expire_seconds = self.client.settings.WEB_CACHE_EXPIRE_SECONDS
+        dictionary = await asyncio.to_thread(
+            self.client.zstd_dictionaries.get_for_url, url
+        )
+        cache_entry_json = cache_entry.model_dump_json().encode("utf-8")
+        await asyncio.to_thread(
+            self.client.settings.web_cache.set,
+            url,
+            await self.client.settings.cpu_executor.run(
+                functools.partial(
+                    encode_web_cache_entry_json,
+                    cache_entry_json,
+                    dictionary_data=(
+                        dictionary.as_bytes() if dictionary is not None else None
+                    ),
+                ),
+                size=len(cache_entry_json),
+            ),
+            (
+                expire_seconds + self.client.settings.WEB_CACHE_STALE_SECONDS
+                if expire_seconds > 0
+                else None
+            ),
+        )
+        self.client.settings.web_memory_cache.set(
+            url, cache_entry, size=get_cache_entry_size(cache_entry)
+        )
+        return None
+
+    async def revalidate(
+        self,
+        url: typing.Text,
+        cache_entry: WebCacheEntry,
+        *,
+        cache_key: typing.Optional[typing.Text] = None,
+    ) -> typing.Optional[WebFetchResult]:
+        """Check a stale entry with a conditional request.
+
+        Extends and returns the entry when the server reports it unchanged,
+        returns None when it has to be fetched again. The entry is stored
+        under `cache_key`, by default the canonical form of `url`.
+        """
+        if cache_key is None:
+            cache_key = self.client.url_canonicalizer.canonicalize(url)
+        headers = {"User-Agent": secrets.choice(self.USER_AGENTS)}
+        if cache_entry.etag:
+            headers["If-None-Match"] = cache_entry.etag
+        if cache_entry.last_modified:
+            headers["If-Modified-Since"] = cache_entry.last_modified
+
+        async with self.client.domain_scheduler.slot(url):
+            try:
+                response = await self.http_client.get(url, headers=headers)
+            except httpx.HTTPError as e:
+                logger.info(f"Revalidation failed for '{url}': {e}")
+                return None
+
+        if response.status_code == 304:
+            logger.debug(f"Web cache for '{url}' not modified")
+        elif (
+            response.status_code == 200
+            and cache_entry.content_hash is not None
+            and hash_content(response.content) == cache_entry.content_hash
+        ):
+            logger.debug(f"Web cache for '{url}' has unchanged content")
+        else:
+            return None
+
+        cache_entry = cache_entry.model_copy(
+            update={
+                "etag": response.headers.get("etag") or cache_entry.etag,
+                "last_modified": (
+                    response.headers.get("last-modified") or cache_entry.last_modified
+                ),
+                "fetched_at": time.time(),
+            }
+        )
+        await self.set_cache_entry(cache_key, cache_entry)
+        return await self._cache_entry_to_result(
+            url, cache_entry, source=FetchSource.REVALIDATED
+        )
+
+    def _revalidate_in_background(
+        self,
+        url: typing.Text,
+        cache_entry: WebCacheEntry,
+        fetch_uncached: typing.Callable[[], typing.Awaitable[WebFetchResult]],
+        *,
+        cache_key: typing.Text,
+    ) -> None:
+        async def _revalidate() -> typing.Optional[WebFetchResult]:
+            web_fetch_result = await self.revalidate(
+                url, cache_entry, cache_key=cache_key
             )
+            if web_fetch_result is None:
+                web_fetch_result = await fetch_uncached()
+            return web_fetch_result
+
+        task = asyncio.create_task(
+            self.client.single_flight.run(f"revalidate:{cache_key}", _revalidate)
+        )
+        self._background_tasks.add(task)
+        task.add_done_callback(self._on_background_task_done)
+        return None
+
+    def _on_background_task_done(self, task: asyncio.Task) -> None:
+        self._background_tasks.discard(task)
+        if not task.cancelled() and (e := task.exception()) is not None:
+            logger.error(f"Background revalidation failed: {e}")
+        return None
+
+    async def _cache_entry_to_result(
+        self, url: typing.Text, cache_entry: WebCacheEntry, *, source: FetchSource
+    ) -> WebFetchResult:
+        return WebFetchResult(
+            url=url,
+            html=cache_entry.html,
+            stats=FetchStats(source=source),
+            etag=cache_entry.etag,
+            last_modified=cache_entry.last_modified,
+            content_hash=cache_entry.content_hash,
+        )
+
+    async def _fetch_page_uncached(
+        self,
+        url: typing.Text,
+        *,
+        cache_key: typing.Text,
+        headless: bool,
+        goto_timeout: int,
+        circling_times: int,
+        scrolling_times: int,
+        human_delay_base_delay: float,
+        dynamic_content_loading_delay: float,
+        http_first: bool,
+        http_expected_css_selector: typing.Optional[typing.Text],
+        blocked_resource_types: typing.Optional[typing.List[typing.Text]],
+        blocked_domains: typing.Optional[typing.List[typing.Text]],
+        artifact_capture: ArtifactCapture | str,
+        step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]],
+    ) -> WebFetchResult:
+        web_fetch_result: WebFetchResult | None = None
+
+        resource_policy = ResourcePolicy(
+            blocked_resource_types=(
+                self.client.settings.WEB_BLOCKED_RESOURCE_TYPES
+                if blocked_resource_types is None
+                else blocked_resource_types
+            ),
+            blocked_domains=(
+                self.client.settings.WEB_BLOCKED_DOMAINS
+                if blocked_domains is None
+                else blocked_domains
+            ),
+        )
+
+        # Hold a politeness slot of the domain while hitting the network
+        async with self.client.domain_scheduler.slot(url):
+            if http_first:
+                web_fetch_result = await self.fetch_http(
+                    url, expected_css_selector=http_expected_css_selector
+                )
+
+            if web_fetch_result is None:
+                web_fetch_result = await self.fetch_browser(
+                    url,
+                    headless=headless,
+                    goto_timeout=goto_timeout,
+                    circling_times=circling_times,
+                    scrolling_times=scrolling_times,
+                    human_delay_base_delay=human_delay_base_delay,
+                    dynamic_content_loading_delay=dynamic_content_loading_delay,
+                    resource_policy=resource_policy,
+                    artifact_capture=artifact_capture,
+                    step_callback=step_callback,
+                )
+
+        if web_fetch_result is None:
+            raise fastapi.exceptions.HTTPException(
+                status_code=500, detail="Failed to fetch content"
+            )
+
+        await self.set_cache_entry(
+            cache_key,
+            WebCacheEntry(
+                html=web_fetch_result.html,
+                etag=web_fetch_result.etag,
+                last_modified=web_fetch_result.last_modified,
+                content_hash=web_fetch_result.content_hash,
+            ),
+        )
+
+        return web_fetch_result
+
+    async def fetch_http(
+        self,
+        url: typing.Text,
+        *,
+        expected_css_selector: typing.Optional[typing.Text] = None,
+    ) -> typing.Optional[WebFetchResult]:
+        """Fetch a page without a browser.
+
+        Returns None when the request fails or the content looks insufficient,
+        so the caller can escalate to the browser.
+        """
+        try:
+            response = await self.http_client.get(
+                url, headers={"User-Agent": secrets.choice(self.USER_AGENTS)}
+            )
+        except httpx.HTTPError as e:
+            logger.info(f"Plain HTTP fetch failed for '{url}': {e}")
+            return None
+
+        content_type = response.headers.get("content-type", "")
+        if response.status_code != 200 or "html" not in content_type:
+            logger.info(
+                f"Plain HTTP fetch got status {response.status_code} "
+                + f"({content_type}) for '{url}', escalating to browser"
+            )
+            return None
+
+        html_content = str_or_none(response.text)
+        if not html_content:
+            return None
+
+        is_sufficient = await asyncio.to_thread(
+            is_content_sufficient,
+            html_content,
+            min_text_length=self.client.settings.WEB_HTTP_MIN_TEXT_LENGTH,
+            expected_css_selector=expected_css_selector,
+        )
+        if not is_sufficient:
+            logger.info(f"Insufficient plain HTTP content for '{url}', escalating")
+            return None
+
+        return WebFetchResult(
+            url=url,
+            html=html_content,
+            stats=FetchStats(source=FetchSource.HTTP),
+            etag=response.headers.get("etag"),
+            last_modified=response.headers.get("last-modified"),
+            content_hash=hash_content(response.content),
+        )
+
+    async def fetch_browser(
+        self,
+        url: typing.Text,
+        *,
+        headless: bool = True,
+        goto_timeout: int = 4000,  # 4 seconds
+        circling_times: int = 3,
+        scrolling_times: int = 3,
+        human_delay_base_delay: float = 1.2,
+        dynamic_content_loading_delay: float = 2.0,
+        resource_policy: typing.Optional[ResourcePolicy] = None,
+        artifact_capture: ArtifactCapture | str = ArtifactCapture.NONE,
+        step_callback: typing.Optional[typing.Callable[["MessageUpdate"], None]] = None,
+    ) -> typing.Optional[WebFetchResult]:
+        html_content: typing.Text | None = None
+        h_delay = human_delay_base_delay
+        d_delay = dynamic_content_loading_delay
+        stats = FetchStats(source=FetchSource.BROWSER)
+        response: PlaywrightResponse | None = None
+        artifact_capture = ArtifactCapture(artifact_capture)
+
+        # Create context
+        _viewport_size = secrets.choice(self.VIEWPORT_SIZES)
+        _viewport = ViewportSize(width=_viewport_size[0], height=_viewport_size[1])
+        async with self.client.browser_pool.new_context(
+            headless=headless,
+            user_agent=secrets.choice(self.USER_AGENTS),
+            viewport=_viewport,
+            locale="en-US",
+            timezone_id="Asia/Tokyo",
+            permissions=["geolocation"],
+            extra_http_headers={
+                "Accept-Language": "en-US,en;q=0.9,ja;q=0.8",
+                "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",  # noqa: E501
+                "Accept-Encoding": "gzip, deflate, br",
+                "Accept-Charset": "utf-8",
+            },
+        ) as context:
             if step_callback:
                 step_callback(
                     MessageUpdate(
                         total_steps=100,
                         completed_steps=15,
-                        message_text="Launching browser...",
+                        message_text="Acquired browser context...",
                     )
                 )
 
-            # Create context
-            _viewport_size = secrets.choice(self.VIEWPORT_SIZES)
-            _viewport = ViewportSize(width=_viewport_size[0], height=_viewport_size[1])
-            context = await browser.new_context(
-                user_agent=secrets.choice(self.USER_AGENTS),
-                viewport=_viewport,
-                locale="en-US",
-                timezone_id="Asia/Tokyo",
-                permissions=["geolocation"],
-                extra_http_headers={
-                    "Accept-Language": "en-US,en;q=0.9,ja;q=0.8",
-                    "Accept": "text/html,application/xhtml+xml,application/xml;q=0.9,image/webp,*/*;q=0.8",  # noqa: E501
-                    "Accept-Encoding": "gzip, deflate, br",
-                    "Accept-Charset": "utf-8",
-                },
-            )
+            # Block unneeded subresources
+            if resource_policy is not None and not resource_policy.is_noop:
+                await context.route("**/*", resource_policy.handle_route)
 
             # Create new page
             page = await context.new_page()
@@ -111,6 +534,13 @@ class Web:
             # Inject script to hide automation features
             page = await page_with_init_script(page)
 
+            # Watch network and DOM activity to end waits early
+            readiness = await PageReadiness(
+                page,
+                adaptive=self.client.settings.WEB_ADAPTIVE_READINESS,
+                quiet_seconds=self.client.settings.WEB_READINESS_QUIET_SECONDS,
+            ).attach()
+
             if step_callback:
                 step_callback(
                     MessageUpdate(
@@ -120,93 +550,109 @@ class Web:
                     )
                 )
 
+            # Navigate to URL
+            logger.debug(f"Navigating (timeout: {goto_timeout}ms) to {url}")
             try:
-                # Navigate to URL
-                logger.debug(f"Navigating (timeout: {goto_timeout}ms) to {_url}")
-                try:
-                    await page.goto(
-                        _url, wait_until="domcontentloaded", timeout=goto_timeout
-                    )  # Wait for network idle
-                except PlaywrightTimeoutError:
-                    logger.info(f"Timeout for goto '{_url}', continuing...")
-                await human_delay(h_delay)  # Initial delay
-
-                # Wait for full page load (additional checks)
-                logger.debug(f"Waiting {h_delay}s for full page load")
-                await page.wait_for_load_state("domcontentloaded")
-                await human_delay(h_delay)
-
-                if step_callback:
-                    step_callback(
-                        MessageUpdate(
-                            total_steps=100,
-                            completed_steps=45,
-                            message_text="Waiting for full page load...",
-                        )
-                    )
+                response = await page.goto(
+                    url, wait_until="domcontentloaded", timeout=goto_timeout
+                )  # Wait for network idle
+            except PlaywrightTimeoutError:
+                logger.info(f"Timeout for goto '{url}', continuing...")
+            await readiness.wait(h_delay)  # Initial delay
 
-                # Simulate smooth mouse circling three times
-                start_position = None
-                for i in range(circling_times):
-                    logger.debug(f"Simulating mouse circling {i+1} of {circling_times}")
-                    start_position = await simulate_mouse_circling(
-                        page, _viewport, start_position=start_position
+            # Wait for full page load (additional checks)
+            logger.debug(f"Waiting up to {h_delay}s for full page load")
+            await page.wait_for_load_state("domcontentloaded")
+            await readiness.wait(h_delay)
+
+            if step_callback:
+                step_callback(
+                    MessageUpdate(
+                        total_steps=100,
+                        completed_steps=45,
+                        message_text="Waiting for full page load...",
                     )
-                    await human_delay(h_delay)
+                )
 
-                # Simulate scrolling three times
-                for i in range(scrolling_times):
-                    logger.debug(f"Simulating scrolling {i+1} of {scrolling_times}")
-                    await simulate_scrolling(page, scroll_direction="down")
-                    await human_delay(h_delay)
+            # Simulate smooth mouse circling three times
+            start_position = None
+            for i in range(circling_times):
+                logger.debug(f"Simulating mouse circling {i+1} of {circling_times}")
+                start_position = await simulate_mouse_circling(
+                    page, _viewport, start_position=start_position
+                )
+                await readiness.wait(h_delay)
 
-                # Extra delay for dynamic content loading
-                logger.debug(f"Delaying {d_delay}s for dynamic content loading")
-                await human_delay(d_delay)
+            # Simulate scrolling three times
+            for i in range(scrolling_times):
+                logger.debug(f"Simulating scrolling {i+1} of {scrolling_times}")
+                await simulate_scrolling(page, scroll_direction="down")
+                await readiness.wait(h_delay)
 
-                # Get full HTML content
-                html_content = await page.content()
-                html_content = str_or_none(html_content)
-                html_content_size = len(html_content or " ")
+            # Extra delay for dynamic content loading
+            logger.debug(f"Delaying up to {d_delay}s for dynamic content loading")
+            await readiness.wait(d_delay)
 
-                logger.info(
-                    f"Fetched HTML content size: {html_content_size} for {_url}"
-                )
+            # Get full HTML content
+            html_content = await page.content()
+            html_content = str_or_none(html_content)
+            html_content_size = len(html_content or " ")
 
-                if step_callback:
-                    step_callback(
-                        MessageUpdate(
-                            total_steps=100,
-                            completed_steps=60,
-                            message_text="Finished fetching HTML content",
-                        )
-                    )
+            logger.info(f"Fetched HTML content size: {html_content_size} for {url}")
+
+            stats.waited_seconds = readiness.waited_seconds
+            if resource_policy is not None:
+                stats.requests_blocked = resource_policy.blocked_count
+                stats.requests_allowed = resource_policy.allowed_count
 
-                # Screenshot and PDF
-                snapshot_filename = f"{int(time.time()*1E3)}_{secrets.token_hex(2)}"
-                screenshot_path = self.client.settings.web_screenshot_path.joinpath(
-                    f"{snapshot_filename}.png"
+            if step_callback:
+                step_callback(
+                    MessageUpdate(
+                        total_steps=100,
+                        completed_steps=60,
+                        message_text="Finished fetching HTML content",
+                    )
                 )
-                screenshot_path.write_bytes(await page.screenshot())
-                logger.info(f"Screenshot saved to {screenshot_path}")
-                pdf_path = self.client.settings.web_pdf_path.joinpath(
-                    f"{snapshot_filename}.pdf"
+
+            # Screenshot and PDF, persisted in the background
+            snapshot_filename = f"{int(time.time()*1E3)}_{secrets.token_hex(2)}"
+            if artifact_capture.with_screenshot:
+                self.artifact_writer.submit(
+                    pathlib.Path(self.client.settings.WEB_SCREENSHOT_PATH).joinpath(
+                        f"{snapshot_filename}.png"
+                    ),
+                    await page.screenshot(),
                 )
-                await page.pdf(path=pdf_path, print_background=True)
-                logger.info(f"PDF saved to {pdf_path}")
+            if artifact_capture.with_pdf:
+                try:
+                    self.artifact_writer.submit(
+                        pathlib.Path(self.client.settings.WEB_PDF_PATH).joinpath(
+                            f"{snapshot_filename}.pdf"
+                        ),
+                        await page.pdf(print_background=True),
+                    )
+                except PlaywrightError as e:  # PDF requires headless chromium
+                    logger.warning(f"Failed to capture PDF for '{url}': {e}")
 
-            finally:
-                await browser.close()
+            if not html_content:
+                return None
 
-        if not html_content:
-            raise fastapi.exceptions.HTTPException(
-                status_code=500, detail="Failed to fetch content"
-            )
+            web_fetch_result = WebFetchResult(url=url, html=html_content, stats=stats)
+            if response is not None:
+                web_fetch_result.etag = response.headers.get("etag")
+                web_fetch_result.last_modified = response.headers.get("last-modified")
+                try:
+                    web_fetch_result.content_hash = hash_content(await response.body())
+                except PlaywrightError as e:  # Body is gone after some redirects
+                    logger.debug(f"Main document body unavailable for '{url}': {e}")
+
+        return web_fetch_result
+
+
+def get_cache_entry_size(cache_entry: WebCacheEntry) -> int:
+    """Approximate memory footprint, dominated by the HTML."""
+    return sys.getsizeof(cache_entry.html) + 512
 
-        await asyncio.to_thread(
-            self.client.settings.web_cache.set,
-            _url,
-            compress(html_content, format="zstd"),
-        )
 
-        return bs4.BeautifulSoup(html_content, "html.parser")
+def hash_content(content: bytes) -> str:
+    return hashlib.sha256(content).hexdigest()
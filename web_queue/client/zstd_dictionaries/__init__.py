@@ -0,0 +1,3 @@
+from web_queue.client.zstd_dictionaries._zstd_dictionaries import ZstdDictionaries
+
+__all__ = ["ZstdDictionaries"]
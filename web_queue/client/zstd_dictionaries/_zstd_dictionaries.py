@@ -0,0 +1,181 @@
+import collections
+import logging
+import threading
+import time
+import typing
+
+import httpx
+import redis
+import yarl
+import zstandard
+
+from web_queue.client import WebQueueClient
+from web_queue.types.zstd_dictionary_info import ZstdDictionaryInfo
+from web_queue.utils.web_cache_codec import decode_web_cache_entry
+
+logger = logging.getLogger(__name__)
+
+# How long a worker trusts its view of a group's current dictionary
+CURRENT_DICTIONARY_REFRESH_SECONDS = 60.0
+
+
+class ZstdDictionaries:
+    """Per-domain zstd dictionaries for the web cache.
+
+    Dictionaries are trained from cached pages of a domain group and stored
+    by dictionary ID, so entries compressed with a superseded version still
+    decode. Each group points at its current version.
+    """
+
+    def __init__(self, client: WebQueueClient):
+        self.client = client
+        self._lock = threading.Lock()
+        self._by_id: typing.Dict[int, zstandard.ZstdCompressionDict] = {}
+        self._current: typing.Dict[
+            str, typing.Tuple[float, typing.Optional[zstandard.ZstdCompressionDict]]
+        ] = {}
+
+    def get_group(self, url: typing.Text | yarl.URL | httpx.URL) -> str:
+        domain = (yarl.URL(str(url)).host or "").lower().removeprefix("www.")
+        groups = self.client.settings.WEB_CACHE_ZSTD_DICTIONARY_DOMAIN_GROUPS
+        return groups.get(domain, domain)
+
+    def get_for_url(
+        self, url: typing.Text | yarl.URL | httpx.URL
+    ) -> typing.Optional[zstandard.ZstdCompressionDict]:
+        """The current dictionary to compress pages of the URL's group with."""
+        if not self.client.settings.WEB_CACHE_ZSTD_DICTIONARY_ENABLED:
+            return None
+
+        group = self.get_group(url)
+        with self._lock:
+            expires_at, dictionary = self._current.get(group, (0.0, None))
+        if time.monotonic() < expires_at:
+            return dictionary
+
+        info = self.get_info(group)
+        dictionary = self.get_by_id(info.dict_id) if info else None
+        with self._lock:
+            self._current[group] = (
+                time.monotonic() + CURRENT_DICTIONARY_REFRESH_SECONDS,
+                dictionary,
+            )
+        return dictionary
+
+    def get_by_id(self, dict_id: int) -> typing.Optional[zstandard.ZstdCompressionDict]:
+        with self._lock:
+            if dict_id in self._by_id:
+                return self._by_id[dict_id]
+
+        dict_data = self.client.settings.zstd_dictionary_cache.get(f"dict:{dict_id}")
+        if dict_data is None:
+            return None
+        dictionary = zstandard.ZstdCompressionDict(dict_data)
+        with self._lock:
+            self._by_id[dict_id] = dictionary
+        return dictionary
+
+    def get_info(self, group: str) -> typing.Optional[ZstdDictionaryInfo]:
+        info_data = self.client.settings.zstd_dictionary_cache.get(f"group:{group}")
+        if info_data is None:
+            return None
+        return ZstdDictionaryInfo.model_validate_json(info_data)
+
+    def train(
+        self, group: str, samples: typing.List[bytes]
+    ) -> typing.Optional[ZstdDictionaryInfo]:
+        """Train, store and activate a new dictionary version for `group`."""
+        settings = self.client.settings
+        if len(samples) < settings.WEB_CACHE_ZSTD_DICTIONARY_MIN_SAMPLES:
+            logger.info(
+                f"Not enough samples to train a zstd dictionary for '{group}': "
+                + f"{len(samples)}"
+            )
+            return None
+
+        try:
+            dictionary = zstandard.train_dictionary(
+                settings.WEB_CACHE_ZSTD_DICTIONARY_SIZE, samples
+            )
+        except zstandard.ZstdError as e:
+            logger.warning(f"Failed to train zstd dictionary for '{group}': {e}")
+            return None
+
+        previous_info = self.get_info(group)
+        info = ZstdDictionaryInfo(
+            group=group,
+            dict_id=dictionary.dict_id(),
+            version=(previous_info.version + 1) if previous_info else 1,
+            sample_count=len(samples),
+            sample_bytes=sum(len(sample) for sample in samples),
+        )
+        # Store the dictionary before pointing the group at it
+        settings.zstd_dictionary_cache.set(
+            f"dict:{info.dict_id}", dictionary.as_bytes()
+        )
+        settings.zstd_dictionary_cache.set(
+            f"group:{group}", info.model_dump_json().encode("utf-8")
+        )
+        with self._lock:
+            self._by_id[info.dict_id] = dictionary
+            self._current.pop(group, None)
+
+        logger.info(
+            f"Trained zstd dictionary {info.dict_id} (v{info.version}) "
+            + f"for '{group}' from {info.sample_count} samples"
+        )
+        return info
+
+    def train_from_cache(
+        self, groups: typing.Optional[typing.Iterable[str]] = None
+    ) -> typing.List[ZstdDictionaryInfo]:
+        """Train every group, or the given ones, from the cached pages."""
+        samples = self.collect_samples(groups)
+        return [
+            info
+            for group, group_samples in samples.items()
+            if (info := self.train(group, group_samples)) is not None
+        ]
+
+    def collect_samples(
+        self, groups: typing.Optional[typing.Iterable[str]] = None
+    ) -> typing.Dict[str, typing.List[bytes]]:
+        """Cached entries per domain group, as training samples.
+
+        Samples are the entry JSON, the exact payload that gets compressed.
+        """
+        max_samples = self.client.settings.WEB_CACHE_ZSTD_DICTIONARY_MAX_SAMPLES
+        wanted_groups = set(groups) if groups is not None else None
+        samples: typing.DefaultDict[str, typing.List[bytes]] = collections.defaultdict(
+            list
+        )
+
+        web_cache = self.client.settings.web_cache.cache
+        for key in self._iter_web_cache_keys(web_cache):
+            url = key.decode("utf-8") if isinstance(key, bytes) else str(key)
+            group = self.get_group(url)
+            if not group or (wanted_groups is not None and group not in wanted_groups):
+                continue
+            if len(samples[group]) >= max_samples:
+                continue
+
+            value = web_cache.get(key)
+            if not value:
+                continue
+            try:
+                cache_entry = decode_web_cache_entry(
+                    value, get_dictionary=self.get_by_id
+                )
+            except ValueError as e:
+                logger.debug(f"Skipping web cache entry '{url}': {e}")
+                continue
+            samples[group].append(cache_entry.model_dump_json().encode("utf-8"))
+
+        return dict(samples)
+
+    def _iter_web_cache_keys(self, web_cache: typing.Any) -> typing.Iterator:
+        if isinstance(web_cache, redis.Redis):
+            return web_cache.scan_iter(match="http*")
+        if hasattr(web_cache, "iterkeys"):  # Disk and shared backends
+            return web_cache.iterkeys()
+        raise ValueError(f"Unsupported web cache backend: {type(web_cache)}")
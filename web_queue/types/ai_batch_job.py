@@ -0,0 +1,28 @@
+import time
+import typing
+
+import pydantic
+
+from web_queue.types.fetch_many_result import FetchManyResult
+
+
+class AIBatchItem(pydantic.BaseModel):
+    url: str
+    cleaned_html_md5: str  # Also the request's custom ID
+
+
+class AIBatchJob(pydantic.BaseModel):
+    """A Batch API job and the pages waiting for it."""
+
+    batch_id: str
+    status: str = pydantic.Field(default="validating")  # As the Batch API reports
+    items: typing.List[AIBatchItem] = pydantic.Field(default_factory=list)
+    fetch_kwargs: typing.Dict[str, typing.Any] = pydantic.Field(default_factory=dict)
+    created_at: float = pydantic.Field(default_factory=time.time)
+    resolved_at: typing.Optional[float] = pydantic.Field(default=None)
+
+
+class AIBatchSubmission(pydantic.BaseModel):
+    jobs: typing.List[AIBatchJob] = pydantic.Field(default_factory=list)
+    # Pages finished without the AI, or failed before it
+    results: typing.List[FetchManyResult] = pydantic.Field(default_factory=list)
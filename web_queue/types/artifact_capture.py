@@ -0,0 +1,16 @@
+import enum
+
+
+class ArtifactCapture(enum.StrEnum):
+    NONE = "none"
+    SCREENSHOT = "screenshot"
+    PDF = "pdf"
+    BOTH = "both"
+
+    @property
+    def with_screenshot(self) -> bool:
+        return self in (ArtifactCapture.SCREENSHOT, ArtifactCapture.BOTH)
+
+    @property
+    def with_pdf(self) -> bool:
+        return self in (ArtifactCapture.PDF, ArtifactCapture.BOTH)
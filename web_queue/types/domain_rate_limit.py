@@ -0,0 +1,7 @@
+import pydantic
+
+
+class DomainRateLimit(pydantic.BaseModel):
+    requests_per_second: float = pydantic.Field(default=0.5)  # <= 0: unlimited
+    burst: int = pydantic.Field(default=2)
+    max_in_flight: int = pydantic.Field(default=2)  # <= 0: unlimited
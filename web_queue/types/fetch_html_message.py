@@ -3,17 +3,27 @@ import typing
 import pydantic
 from str_or_none import str_or_none
 
+from web_queue.types.artifact_capture import ArtifactCapture
 from web_queue.types.message import Message
 
 
-class FetchHTMLMessageRequest(pydantic.BaseModel):
-    url: str
+class FetchHTMLOptions(pydantic.BaseModel):
     headless: bool = False
     goto_timeout: int = 4000
     circling_times: int = 2
     scrolling_times: int = 3
     human_delay_base_delay: float = 1.2
     dynamic_content_loading_delay: float = 2
+    http_first: bool = False
+    http_expected_css_selector: typing.Optional[str] = None
+    # None uses the WEB_BLOCKED_* settings, an empty list blocks nothing
+    blocked_resource_types: typing.Optional[typing.List[str]] = None
+    blocked_domains: typing.Optional[typing.List[str]] = None
+    artifact_capture: ArtifactCapture = ArtifactCapture.NONE
+
+
+class FetchHTMLMessageRequest(FetchHTMLOptions):
+    url: str
 
     @pydantic.model_validator(mode="after")
     def validate_url(self) -> typing.Self:
@@ -24,3 +34,19 @@ class FetchHTMLMessageRequest(pydantic.BaseModel):
 
 class FetchHTMLMessage(Message):
     data: FetchHTMLMessageRequest
+
+
+class FetchHTMLBatchMessageRequest(FetchHTMLOptions):
+    urls: typing.List[str]
+    concurrency: int = 4
+    per_domain_concurrency: int = 1
+
+    @pydantic.model_validator(mode="after")
+    def validate_urls(self) -> typing.Self:
+        if not self.urls or not all(str_or_none(url) for url in self.urls):
+            raise ValueError("URLs are required")
+        return self
+
+
+class FetchHTMLBatchMessage(Message):
+    data: FetchHTMLBatchMessageRequest
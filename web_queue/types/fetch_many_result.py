@@ -0,0 +1,14 @@
+import typing
+
+import pydantic
+
+from web_queue.types.html_content import HTMLContent
+
+
+class FetchManyResult(pydantic.BaseModel):
+    url: str
+    html_content: typing.Optional[HTMLContent] = pydantic.Field(default=None)
+    error: typing.Optional[str] = pydantic.Field(default=None)
+
+    # Private attributes
+    _exception: typing.Optional[Exception] = pydantic.PrivateAttr(default=None)
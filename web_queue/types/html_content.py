@@ -2,6 +2,8 @@ import logging
 
 import pydantic
 
+from web_queue.types.web_fetch_result import FetchStats
+
 logger = logging.getLogger(__name__)
 
 
@@ -13,6 +15,7 @@ class HTMLContent(pydantic.BaseModel):
     content: str = pydantic.Field(default="")
     created_date: str = pydantic.Field(default="")
     updated_date: str = pydantic.Field(default="")
+    fetch_stats: FetchStats = pydantic.Field(default_factory=FetchStats)
 
     # Private attributes
     _html: str = pydantic.PrivateAttr(default="")
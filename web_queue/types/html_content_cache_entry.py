@@ -0,0 +1,15 @@
+import pydantic
+
+from web_queue.types.html_content import HTMLContent
+
+
+class HTMLContentCacheEntry(pydantic.BaseModel):
+    """A finished fetch result, with the cleaned HTML it was extracted from."""
+
+    html_content: HTMLContent
+    html: str = pydantic.Field(default="")
+
+    def to_html_content(self) -> HTMLContent:
+        html_content = self.html_content.model_copy(deep=True)
+        html_content._html = self.html
+        return html_content
@@ -0,0 +1,16 @@
+import pydantic
+
+
+class MemoryCacheStats(pydantic.BaseModel):
+    hits: int = pydantic.Field(default=0)
+    misses: int = pydantic.Field(default=0)
+    evictions: int = pydantic.Field(default=0)  # Dropped to stay under max bytes
+    expirations: int = pydantic.Field(default=0)
+    entries: int = pydantic.Field(default=0)
+    size_bytes: int = pydantic.Field(default=0)
+    max_bytes: int = pydantic.Field(default=0)
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.misses
+        return self.hits / total if total else 0.0
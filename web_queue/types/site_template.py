@@ -0,0 +1,39 @@
+import time
+import typing
+
+import pydantic
+
+
+class SiteTemplateField(pydantic.BaseModel):
+    """Where a metadata value is on pages of a site."""
+
+    css_selector: str = pydantic.Field(default="")  # First match's text
+    pattern: str = pydantic.Field(default="")  # Regex, group 1 is the value
+    url_segment: typing.Optional[int] = pydantic.Field(
+        default=None
+    )  # URL path segment instead of the page
+
+
+class SiteTemplate(pydantic.BaseModel):
+    """Selectors learned from one page, reused for pages of the same URL pattern."""
+
+    domain: str  # Without 'www.', empty when learned without a URL
+    url_pattern: str
+    content_body_css_selector: str
+    title: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    author: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    chapter_id: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    chapter_number: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    created_date: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    updated_date: typing.Optional[SiteTemplateField] = pydantic.Field(default=None)
+    learned_at: float = pydantic.Field(default_factory=time.time)
+
+
+class SiteTemplateStats(pydantic.BaseModel):
+    hits: int = pydantic.Field(default=0)
+    failures: int = pydantic.Field(default=0)  # Pages the template did not fit
+
+    @property
+    def hit_rate(self) -> float:
+        total = self.hits + self.failures
+        return self.hits / total if total else 0.0
@@ -0,0 +1,15 @@
+import typing
+
+import pydantic
+
+
+class URLCanonicalRule(pydantic.BaseModel):
+    """How URLs of one domain are reduced to their cache identity."""
+
+    # Only these query parameters identify a page, None keeps all but tracking
+    keep_params: typing.Optional[typing.List[typing.Text]] = pydantic.Field(
+        default=None
+    )
+    drop_params: typing.List[typing.Text] = pydantic.Field(default_factory=list)
+    # Only for sites known to serve `/dir` and `/dir/` alike
+    strip_trailing_slash: bool = pydantic.Field(default=False)
@@ -0,0 +1,21 @@
+import time
+import typing
+
+import pydantic
+
+
+class WebCacheEntry(pydantic.BaseModel):
+    """Cached page with the validators needed to revalidate it."""
+
+    html: str
+    etag: typing.Optional[str] = pydantic.Field(default=None)
+    last_modified: typing.Optional[str] = pydantic.Field(default=None)
+    content_hash: typing.Optional[str] = pydantic.Field(default=None)  # Raw body
+    fetched_at: float = pydantic.Field(default_factory=time.time)
+
+    @property
+    def can_revalidate(self) -> bool:
+        return bool(self.etag or self.last_modified or self.content_hash)
+
+    def is_fresh(self, ttl: int) -> bool:
+        return ttl < 0 or time.time() - self.fetched_at < ttl
@@ -0,0 +1,32 @@
+import enum
+import typing
+
+import pydantic
+
+
+class FetchSource(enum.StrEnum):
+    CACHE = "cache"
+    HTTP = "http"
+    BROWSER = "browser"
+    REVALIDATED = "revalidated"
+    RESULT_CACHE = "result_cache"  # Finished result, no fetch at all
+
+
+class FetchStats(pydantic.BaseModel):
+    source: FetchSource = pydantic.Field(default=FetchSource.BROWSER)
+    elapsed_seconds: float = pydantic.Field(default=0.0)
+    waited_seconds: float = pydantic.Field(default=0.0)
+    stale: bool = pydantic.Field(default=False)
+    requests_blocked: int = pydantic.Field(default=0)
+    requests_allowed: int = pydantic.Field(default=0)
+
+
+class WebFetchResult(pydantic.BaseModel):
+    url: str
+    html: str
+    stats: FetchStats = pydantic.Field(default_factory=FetchStats)
+
+    # Response validators of the main document, used for cache revalidation
+    etag: typing.Optional[str] = pydantic.Field(default=None)
+    last_modified: typing.Optional[str] = pydantic.Field(default=None)
+    content_hash: typing.Optional[str] = pydantic.Field(default=None)
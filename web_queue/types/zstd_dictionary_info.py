@@ -0,0 +1,14 @@
+import time
+
+import pydantic
+
+
+class ZstdDictionaryInfo(pydantic.BaseModel):
+    """The current dictionary of a domain group."""
+
+    group: str
+    dict_id: int
+    version: int = pydantic.Field(default=1)
+    sample_count: int = pydantic.Field(default=0)
+    sample_bytes: int = pydantic.Field(default=0)
+    trained_at: float = pydantic.Field(default_factory=time.time)
@@ -0,0 +1,41 @@
+import concurrent.futures
+import logging
+import pathlib
+
+logger = logging.getLogger(__name__)
+
+
+class ArtifactWriter:
+    """Persists fetch artifacts on a background thread.
+
+    Callers never wait for the write, failures are only logged.
+    """
+
+    def __init__(self, max_workers: int = 1):
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=max_workers, thread_name_prefix="artifact-writer"
+        )
+
+    def submit(
+        self, path: pathlib.Path, data: bytes
+    ) -> concurrent.futures.Future[pathlib.Path]:
+        future = self._executor.submit(self._write, path, data)
+        future.add_done_callback(self._log_result)
+        return future
+
+    def shutdown(self, wait: bool = True) -> None:
+        self._executor.shutdown(wait=wait)
+        return None
+
+    @staticmethod
+    def _write(path: pathlib.Path, data: bytes) -> pathlib.Path:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        path.write_bytes(data)
+        return path
+
+    @staticmethod
+    def _log_result(future: concurrent.futures.Future[pathlib.Path]) -> None:
+        if (e := future.exception()) is not None:
+            logger.error(f"Failed to save artifact: {e}")
+        else:
+            logger.info(f"Artifact saved to {future.result()}")
@@ -0,0 +1,72 @@
+import fnmatch
+import typing
+import urllib.parse
+
+import httpx
+import yarl
+
+from web_queue.types.url_canonical_rule import URLCanonicalRule
+
+DEFAULT_TRACKING_PARAMS: typing.Tuple[typing.Text, ...] = (
+    "utm_*",
+    "fbclid",
+    "gclid",
+    "dclid",
+    "msclkid",
+    "yclid",
+    "igshid",
+    "mc_cid",
+    "mc_eid",
+    "_ga",
+    "_gl",
+)
+
+
+def canonicalize_url(
+    url: typing.Text | yarl.URL | httpx.URL,
+    *,
+    rule: typing.Optional[URLCanonicalRule] = None,
+    tracking_params: typing.Iterable[typing.Text] = DEFAULT_TRACKING_PARAMS,
+) -> str:
+    """Reduce equivalent URLs to one string, for cache and dedup keys.
+
+    Lowercases scheme and host, drops the default port, the fragment,
+    tracking parameters (`fnmatch` patterns) and, if the rule says so, the
+    trailing slash, and sorts the remaining query parameters by name. The
+    path and query keep their raw encoding, so the key never names a
+    different resource than the URL.
+    """
+    rule = rule or URLCanonicalRule()
+    _url = yarl.URL(str(url), encoded=True)
+    if not _url.absolute:
+        return str(_url.with_fragment(None))
+
+    drop_patterns = [*tracking_params, *rule.drop_params]
+    query_parts = []
+    for part in _url.raw_query_string.split("&"):
+        if not part:
+            continue
+        key = urllib.parse.unquote_plus(part.split("=", 1)[0])
+        if rule.keep_params is not None and key not in rule.keep_params:
+            continue
+        if any(fnmatch.fnmatchcase(key, p) for p in drop_patterns):
+            continue
+        query_parts.append((key, part))
+    query_parts.sort(key=lambda item: item[0])  # Stable, repeated keys keep order
+
+    path = _url.raw_path
+    if rule.strip_trailing_slash and len(path) > 1:
+        path = path.rstrip("/") or "/"
+
+    return str(
+        yarl.URL.build(
+            scheme=_url.scheme.lower(),
+            user=_url.raw_user,
+            password=_url.raw_password,
+            host=(_url.raw_host or "").lower(),
+            port=None if _url.is_default_port() else _url.port,
+            path=path or "/",
+            query_string="&".join(part for _, part in query_parts),
+            encoded=True,
+        )
+    )
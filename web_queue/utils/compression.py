@@ -1,4 +1,5 @@
 import base64
+import json
 import typing
 
 import fastapi
@@ -27,3 +28,24 @@ def decompress(data: str, *, format: typing.Literal["zstd"] = "zstd") -> str:
         raise fastapi.exceptions.HTTPException(
             status_code=400, detail=f"Invalid format: {format}"
         )
+
+
+ZSTD_MAGIC_NUMBER = b"\x28\xb5\x2f\xfd"
+
+
+def compress_bytes(data: bytes | str, *, level: int = 9) -> bytes:
+    """Compress to a raw zstd frame, for bytes-native caches."""
+    if isinstance(data, str):
+        data = data.encode("utf-8")
+    return zstandard.compress(data, level=level)
+
+
+def decompress_bytes(data: bytes) -> bytes:
+    """Decompress a raw zstd frame or a legacy base64 encoded cache value.
+
+    Legacy values were stored by `Cachetic[str]` as a JSON string holding the
+    base64 encoded zstd frame.
+    """
+    if not data.startswith(ZSTD_MAGIC_NUMBER):
+        data = base64.b64decode(json.loads(data))
+    return zstandard.decompress(data)
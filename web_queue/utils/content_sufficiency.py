@@ -0,0 +1,25 @@
+import typing
+
+import bs4
+
+from web_queue.utils.html_cleaner import HTMLCleaner
+
+
+def is_content_sufficient(
+    html: typing.Text | bs4.BeautifulSoup,
+    *,
+    min_text_length: int = 500,
+    expected_css_selector: typing.Optional[typing.Text] = None,
+) -> bool:
+    """Check whether a page has enough main content without rendering it.
+
+    Passes when the cleaned HTML matches `expected_css_selector` (if given)
+    and holds at least `min_text_length` characters of visible text.
+    """
+    html = HTMLCleaner.clean_as_main_content_html(html)
+
+    if expected_css_selector and not html.select(expected_css_selector):
+        return False
+
+    text = html.get_text(" ", strip=True)
+    return len(text) >= min_text_length
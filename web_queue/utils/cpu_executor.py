@@ -0,0 +1,78 @@
+import asyncio
+import concurrent.futures
+import concurrent.futures.process
+import functools
+import logging
+import multiprocessing
+import threading
+import typing
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+
+class CPUExecutor:
+    """Runs CPU-bound functions off the event loop.
+
+    Inputs larger than `inline_max_bytes` go to a pool of `max_workers`
+    processes, so one large page does not hold the GIL while other fetches
+    on the loop wait. Smaller inputs run in a worker thread, the round trip
+    to a process would cost more than the work. With `max_workers` 0
+    everything runs in a worker thread. Nothing runs on the loop itself,
+    even small pages take tenths of a second to clean or skeletonize.
+
+    Functions and arguments must be picklable, pass bytes and strings
+    rather than parsed trees.
+    """
+
+    def __init__(self, *, max_workers: int, inline_max_bytes: int):
+        self.max_workers = max(max_workers, 0)
+        self.inline_max_bytes = inline_max_bytes
+        self._pool: typing.Optional[concurrent.futures.ProcessPoolExecutor] = None
+        self._lock = threading.Lock()
+
+    def offloads(self, size: int) -> bool:
+        """Whether an input of `size` bytes runs in the process pool."""
+        return self.max_workers > 0 and size > self.inline_max_bytes
+
+    async def run(
+        self, func: typing.Callable[..., T], *args: typing.Any, size: int
+    ) -> T:
+        if not self.offloads(size):
+            return await asyncio.to_thread(func, *args)
+
+        pool = self._get_pool()
+        try:
+            return await asyncio.get_running_loop().run_in_executor(
+                pool, functools.partial(func, *args)
+            )
+        except concurrent.futures.process.BrokenProcessPool as e:
+            # A worker died, such as killed for memory, replace the pool
+            logger.warning(f"CPU process pool broken, running in a thread: {e}")
+            self._discard_pool(pool)
+            return await asyncio.to_thread(func, *args)
+
+    def shutdown(self, wait: bool = True) -> None:
+        with self._lock:
+            pool, self._pool = self._pool, None
+        if pool is not None:
+            pool.shutdown(wait=wait, cancel_futures=True)
+        return None
+
+    def _get_pool(self) -> concurrent.futures.ProcessPoolExecutor:
+        with self._lock:
+            if self._pool is None:
+                # Spawned, forking would copy the browser driver threads
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers,
+                    mp_context=multiprocessing.get_context("spawn"),
+                )
+            return self._pool
+
+    def _discard_pool(self, pool: concurrent.futures.ProcessPoolExecutor) -> None:
+        with self._lock:
+            if self._pool is pool:
+                self._pool = None
+        pool.shutdown(wait=False, cancel_futures=True)
+        return None
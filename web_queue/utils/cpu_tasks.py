@@ -0,0 +1,96 @@
+"""CPU-bound pipeline stages for `CPUExecutor`.
+
+Module level functions of bytes and strings, so they pickle to a worker
+process. Results are compact too: serialized HTML, digests and markdown.
+"""
+
+import hashlib
+import typing
+
+from web_queue.utils import html_skeleton
+from web_queue.utils.html_backend import HTMLBackendName, get_html_backend
+from web_queue.utils.html_document import HTMLDocument
+from web_queue.utils.html_stream_cleaner import DEFAULT_MAX_BUFFER_LENGTH
+from web_queue.utils.html_to_str import htmls_to_str
+
+
+def md5_hexdigest(data: bytes) -> str:
+    return hashlib.md5(data).hexdigest()
+
+
+def clean_html(
+    html: bytes,
+    backend_name: HTMLBackendName,
+    *,
+    css_selectors: typing.Sequence[str] = (),
+    markdown_css_selectors: typing.Sequence[str] = (),
+    streaming_min_length: int = 0,
+    streaming_max_buffer_length: int = DEFAULT_MAX_BUFFER_LENGTH,
+) -> typing.Tuple[
+    str, str, typing.Dict[str, typing.List[str]], typing.Dict[str, typing.Optional[str]]
+]:
+    """Cleaned and compacted main content and its md5, see `HTMLDocument`.
+
+    With the texts of `css_selectors` and the markdown of
+    `markdown_css_selectors`, selected from the same cleaned tree instead of
+    a re-parse of the cleaned HTML in a later call.
+    """
+    document = HTMLDocument.from_html(
+        html.decode("utf-8"),
+        backend=get_html_backend(backend_name),
+        streaming_min_length=streaming_min_length,
+        streaming_max_buffer_length=streaming_max_buffer_length,
+    )
+    return (
+        document.cleaned_html,
+        document.cleaned_html_md5,
+        {
+            css_selector: document.select_text(css_selector)
+            for css_selector in css_selectors
+        },
+        {
+            css_selector: document.select_markdown(css_selector)
+            for css_selector in markdown_css_selectors
+        },
+    )
+
+
+def select_markdown(
+    cleaned_html: bytes, css_selector: str, backend_name: HTMLBackendName
+) -> typing.Optional[str]:
+    """Markdown of the matches of `css_selector`, None when nothing matches."""
+    document = HTMLDocument.from_cleaned_html(
+        cleaned_html.decode("utf-8"), backend=get_html_backend(backend_name)
+    )
+    return document.select_markdown(css_selector)
+
+
+def skeletonize_html(
+    cleaned_html: bytes,
+    *,
+    model_name: str,
+    token_budget: int,
+    text_sample_length: int,
+) -> html_skeleton.HTMLSkeleton:
+    """The metadata prompt HTML within `token_budget`, see `skeletonize_html`."""
+    return html_skeleton.skeletonize_html(
+        cleaned_html.decode("utf-8"),
+        model_name=model_name,
+        token_budget=token_budget,
+        text_sample_length=text_sample_length,
+    )
+
+
+def select_texts(
+    cleaned_html: bytes,
+    css_selectors: typing.List[str],
+    backend_name: HTMLBackendName,
+) -> typing.Dict[str, typing.List[str]]:
+    """Text content of the matches of each of `css_selectors`."""
+    document = HTMLDocument.from_cleaned_html(
+        cleaned_html.decode("utf-8"), backend=get_html_backend(backend_name)
+    )
+    return {
+        css_selector: document.select_text(css_selector)
+        for css_selector in css_selectors
+    }
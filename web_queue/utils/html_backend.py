@@ -0,0 +1,175 @@
+import abc
+import functools
+import re
+import typing
+
+import bs4
+
+from web_queue.utils.html_cleaner import (
+    DEFAULT_DROP_TAGS,
+    DEFAULT_KEEP_ATTRIBUTES,
+    DEFAULT_KEEP_TAGS,
+    HTMLCleaner,
+)
+from web_queue.utils.html_to_str import html_to_str
+
+if typing.TYPE_CHECKING:
+    from selectolax.lexbor import LexborHTMLParser, LexborNode
+
+HTMLBackendName = typing.Literal["html.parser", "selectolax"]
+
+TreeT = typing.TypeVar("TreeT")
+NodeT = typing.TypeVar("NodeT")
+
+
+def compact_html(html: str) -> str:
+    """Drop whitespace between tags."""
+    return re.sub(r">\s+<", "><", html)
+
+
+class HTMLBackend(abc.ABC, typing.Generic[TreeT, NodeT]):
+    """Parses, cleans, selects from and serializes HTML with one library."""
+
+    name: typing.ClassVar[str]
+    # Removed nodes stay allocated until the whole tree is freed
+    retains_removed_nodes: typing.ClassVar[bool] = False
+
+    @abc.abstractmethod
+    def parse(self, html: str) -> TreeT: ...
+
+    @abc.abstractmethod
+    def clean(self, tree: TreeT, *, strip_blank_text: bool = False) -> TreeT:
+        """Reduce to the main content in place, see `HTMLCleaner`.
+
+        `strip_blank_text` drops whitespace-only text nodes, the tree then
+        matches a re-parse of the compacted serialization.
+        """
+
+    @abc.abstractmethod
+    def select(self, tree: TreeT, css_selector: str) -> typing.List[NodeT]: ...
+
+    @abc.abstractmethod
+    def serialize(self, node: TreeT | NodeT) -> str: ...
+
+    @abc.abstractmethod
+    def text(self, node: NodeT) -> str:
+        """Text content of a selected node, its strings joined by spaces."""
+
+    def to_markdown(self, node: NodeT) -> str:
+        """`html_to_str` of a selected node."""
+        return html_to_str(self.serialize(node))
+
+    def clean_html(self, html: str) -> str:
+        return compact_html(self.serialize(self.clean(self.parse(html))))
+
+    def select_html(self, html: str, css_selector: str) -> typing.List[str]:
+        tree = self.parse(html)
+        return [self.serialize(node) for node in self.select(tree, css_selector)]
+
+
+class BeautifulSoupBackend(HTMLBackend[bs4.BeautifulSoup, bs4.Tag]):
+    """The pure Python `html.parser` tree, the reference implementation."""
+
+    name = "html.parser"
+
+    def parse(self, html: str) -> bs4.BeautifulSoup:
+        return bs4.BeautifulSoup(html, "html.parser")
+
+    def clean(
+        self, tree: bs4.BeautifulSoup, *, strip_blank_text: bool = False
+    ) -> bs4.BeautifulSoup:
+        return HTMLCleaner.clean_in_one_pass(tree, strip_blank_text=strip_blank_text)
+
+    def select(
+        self, tree: bs4.BeautifulSoup, css_selector: str
+    ) -> typing.List[bs4.Tag]:
+        return list(tree.select(css_selector))
+
+    def serialize(self, node: bs4.BeautifulSoup | bs4.Tag) -> str:
+        return str(node)
+
+    def text(self, node: bs4.Tag) -> str:
+        return node.get_text(" ")
+
+    def to_markdown(self, node: bs4.Tag) -> str:
+        return html_to_str(node)
+
+
+class SelectolaxBackend(HTMLBackend["LexborHTMLParser", "LexborNode"]):
+    """The C `lexbor` HTML5 parser through `selectolax`, several times faster.
+
+    Parses like a browser: `html`, `head` and `body` are always present, so
+    cleaned HTML differs from `html.parser` in structure but not content.
+    """
+
+    name = "selectolax"
+    retains_removed_nodes = True
+
+    def __init__(self):
+        from selectolax.lexbor import LexborHTMLParser
+
+        self._parser_class = LexborHTMLParser
+        self.keep_tags = frozenset(DEFAULT_KEEP_TAGS) - frozenset(DEFAULT_DROP_TAGS)
+        self.keep_attributes = frozenset(DEFAULT_KEEP_ATTRIBUTES)
+
+    def parse(self, html: str) -> "LexborHTMLParser":
+        return self._parser_class(html)
+
+    def clean(
+        self, tree: "LexborHTMLParser", *, strip_blank_text: bool = False
+    ) -> "LexborHTMLParser":
+        if tree.root is None:
+            return tree
+
+        stack: typing.List["LexborNode"] = [tree.root]
+        while stack:
+            child = stack.pop().child
+            while child is not None:
+                next_child = child.next
+
+                if child.is_element_node:
+                    if child.tag not in self.keep_tags:
+                        child.decompose()
+                    else:
+                        attrs = child.attrs
+                        for attribute in [
+                            a for a in attrs if a not in self.keep_attributes
+                        ]:
+                            del attrs[attribute]
+                        classes = (attrs.get("class") or "").split()
+                        if len(classes) > 1:
+                            attrs["class"] = classes[0]
+                        stack.append(child)
+
+                elif child.is_comment_node:
+                    child.decompose()
+
+                elif strip_blank_text and child.is_text_node:
+                    text = child.text_content or ""
+                    # Serialized as `&nbsp;`, which `compact_html` keeps
+                    if text.isspace() and "\xa0" not in text:
+                        child.decompose()
+
+                child = next_child
+
+        return tree
+
+    def select(
+        self, tree: "LexborHTMLParser", css_selector: str
+    ) -> typing.List["LexborNode"]:
+        return list(tree.css(css_selector))
+
+    def serialize(self, node: "LexborHTMLParser | LexborNode") -> str:
+        return node.html or ""
+
+    def text(self, node: "LexborNode") -> str:
+        return node.text(separator=" ")
+
+
+@functools.cache
+def get_html_backend(name: HTMLBackendName) -> HTMLBackend:
+    if name == "html.parser":
+        return BeautifulSoupBackend()
+    if name == "selectolax":
+        return SelectolaxBackend()
+    raise ValueError(f"Invalid HTML backend: {name}")
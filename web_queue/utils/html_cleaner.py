@@ -38,16 +38,79 @@ class HTMLCleaner:
     def clean_as_main_content_html(
         html: typing.Text | bs4.BeautifulSoup,
     ) -> bs4.BeautifulSoup:
+        return HTMLCleaner.clean_in_one_pass(html)
+
+    @staticmethod
+    def clean_in_one_pass(
+        html: typing.Text | bs4.BeautifulSoup,
+        *,
+        keep_tags: typing.Iterable[typing.Text] = DEFAULT_KEEP_TAGS,
+        drop_tags: typing.Iterable[typing.Text] = DEFAULT_DROP_TAGS,
+        keep_attributes: typing.Iterable[typing.Text] = DEFAULT_KEEP_ATTRIBUTES,
+        strip_blank_text: bool = False,
+    ) -> bs4.BeautifulSoup:
+        """Same result as `clean_all_comments`, `keep_only_tags`, `clean_tags`,
+        `clean_attributes` and `keep_first_class_name` in sequence, in one walk.
+
+        Removed subtrees are never visited and removals skip the sibling scan
+        of `extract`. `strip_blank_text` also drops
+        whitespace-only text inside tags, as `clean_as_main_content_html_str`
+        does on the serialized HTML.
+        """
         html = (
             bs4.BeautifulSoup(html, "html.parser")
             if isinstance(html, typing.Text)
             else html
         )
-        html = HTMLCleaner.clean_all_comments(html)
-        html = HTMLCleaner.keep_only_tags(html)
-        html = HTMLCleaner.clean_tags(html)
-        html = HTMLCleaner.clean_attributes(html)
-        html = HTMLCleaner.keep_first_class_name(html)
+        keep_tag_set = frozenset(keep_tags) - frozenset(drop_tags)
+        keep_attribute_set = frozenset(keep_attributes)
+
+        stack: typing.List[bs4.Tag] = [html]
+        while stack:
+            parent = stack.pop()
+            child = parent.contents[0] if parent.contents else None
+            # Position of `child` in `parent.contents`, saves `extract` a scan.
+            # `_self_index` is in every bs4 of the pyproject's range.
+            index = 0
+            while child is not None:
+                next_child = child.next_sibling
+
+                if isinstance(child, bs4.Tag):
+                    if child.name not in keep_tag_set:
+                        child.extract(_self_index=index)
+                        child.decompose()
+                        index -= 1
+                    else:
+                        attrs = child.attrs
+                        for attribute in [
+                            a for a in attrs if a not in keep_attribute_set
+                        ]:
+                            del attrs[attribute]
+                        class_attr = attrs.get("class")
+                        if isinstance(class_attr, list) and len(class_attr) > 1:
+                            attrs["class"] = class_attr[0]
+                        elif isinstance(class_attr, str):
+                            classes = class_attr.split()
+                            if len(classes) > 1:
+                                attrs["class"] = classes[0]
+                        stack.append(child)
+
+                elif isinstance(child, bs4.Comment):
+                    child.extract(_self_index=index)
+                    index -= 1
+
+                elif (
+                    strip_blank_text
+                    and parent is not html  # Leading and trailing text survives
+                    and type(child) is bs4.NavigableString
+                    and child.isspace()
+                ):
+                    child.extract(_self_index=index)
+                    index -= 1
+
+                child = next_child
+                index += 1
+
         return html
 
     @staticmethod
@@ -67,11 +130,11 @@ class HTMLCleaner:
             if isinstance(html, typing.Text)
             else html
         )
-        tags = tags or list(DEFAULT_KEEP_TAGS)
+        keep_tags = frozenset(tags or DEFAULT_KEEP_TAGS)
 
         # Find all tags that are not in the keep list and decompose them
         for tag in html.find_all():
-            if tag.name not in tags:
+            if tag.name not in keep_tags:
                 tag.decompose()
 
         return html
@@ -108,10 +171,10 @@ class HTMLCleaner:
             if isinstance(html, typing.Text)
             else html
         )
-        attributes = attributes or list(DEFAULT_KEEP_ATTRIBUTES)
+        keep_attributes = frozenset(attributes or DEFAULT_KEEP_ATTRIBUTES)
         for tag in html.find_all():
             for attribute in list(tag.attrs):
-                if attribute not in attributes:
+                if attribute not in keep_attributes:
                     tag.attrs.pop(attribute, None)
 
         return html
@@ -0,0 +1,147 @@
+import functools
+import hashlib
+import logging
+import typing
+
+from web_queue.utils.html_backend import HTMLBackend, compact_html
+from web_queue.utils.html_stream_cleaner import (
+    DEFAULT_MAX_BUFFER_LENGTH,
+    clean_html_streaming,
+)
+
+logger = logging.getLogger(__name__)
+
+
+class HTMLDocument:
+    """One page through the clean, AI and extract stages.
+
+    The page is parsed and cleaned once, every representation the stages
+    need is produced at most once and memoized. Selections run on the
+    cleaned tree instead of a re-parse of the cleaned HTML, except on
+    backends that only free memory with the whole tree.
+    """
+
+    def __init__(self, html: str, *, backend: HTMLBackend):
+        self.html = html
+        self.backend = backend
+        self._selections: typing.Dict[str, typing.List[str]] = {}
+        self._texts: typing.Dict[str, typing.List[str]] = {}
+        self._markdowns: typing.Dict[str, typing.Optional[str]] = {}
+
+    @classmethod
+    def from_cleaned_html(
+        cls,
+        cleaned_html: str,
+        *,
+        backend: HTMLBackend,
+        cleaned_html_md5: typing.Optional[str] = None,
+        texts: typing.Optional[typing.Dict[str, typing.List[str]]] = None,
+        markdowns: typing.Optional[typing.Dict[str, typing.Optional[str]]] = None,
+    ) -> "HTMLDocument":
+        """A document for HTML cleaned elsewhere, such as in a worker process.
+
+        Cleaning is idempotent, the tree is a parse of `cleaned_html` if any
+        stage needs it. `texts` and `markdowns` are selections made there,
+        by selector, so those never need the tree.
+        """
+        document = cls(cleaned_html, backend=backend)
+        document.cleaned_html = cleaned_html
+        if cleaned_html_md5 is not None:
+            document.cleaned_html_md5 = cleaned_html_md5
+        document._texts.update(texts or {})
+        document._markdowns.update(markdowns or {})
+        return document
+
+    @classmethod
+    def from_html(
+        cls,
+        html: str,
+        *,
+        backend: HTMLBackend,
+        streaming_min_length: int = 0,
+        streaming_max_buffer_length: int = DEFAULT_MAX_BUFFER_LENGTH,
+    ) -> "HTMLDocument":
+        """A prepared document.
+
+        On the html.parser backend, whose output it reproduces, pages of
+        `streaming_min_length` characters or more, if set, are cleaned by
+        `StreamingHTMLCleaner` and never built as a full tree. A page with a
+        token longer than `streaming_max_buffer_length` gets the tree cleaner.
+        """
+        if (
+            backend.name == "html.parser"
+            and streaming_min_length > 0
+            and len(html) >= streaming_min_length
+        ):
+            try:
+                cleaned_html = clean_html_streaming(
+                    html, max_buffer_length=streaming_max_buffer_length
+                )
+            except ValueError as e:
+                logger.warning(f"Streaming clean failed, building the tree: {e}")
+            else:
+                return cls.from_cleaned_html(cleaned_html, backend=backend)
+        return cls(html, backend=backend).prepare()
+
+    @functools.cached_property
+    def cleaned_tree(self) -> typing.Any:
+        return self.backend.clean(self.backend.parse(self.html), strip_blank_text=True)
+
+    @functools.cached_property
+    def cleaned_html(self) -> str:
+        """Same as `HTMLBackend.clean_html`, the AI prompt and cache input."""
+        cleaned_html = compact_html(self.backend.serialize(self.cleaned_tree))
+        if self.backend.retains_removed_nodes:
+            # Release the full page first, the compact HTML parses in a fraction
+            del self.cleaned_tree
+            self.cleaned_tree = self.backend.parse(cleaned_html)
+        return cleaned_html
+
+    @functools.cached_property
+    def cleaned_html_md5(self) -> str:
+        return hashlib.md5(self.cleaned_html.encode("utf-8")).hexdigest()
+
+    def select_html(self, css_selector: str) -> typing.List[str]:
+        """Serialized matches of `css_selector` in the cleaned tree."""
+        if css_selector not in self._selections:
+            self._selections[css_selector] = [
+                self.backend.serialize(node)
+                for node in self.backend.select(self.cleaned_tree, css_selector)
+            ]
+        return self._selections[css_selector]
+
+    def select_text(self, css_selector: str) -> typing.List[str]:
+        """Text content of the matches of `css_selector` in the cleaned tree."""
+        if css_selector not in self._texts:
+            self._texts[css_selector] = [
+                self.backend.text(node)
+                for node in self.backend.select(self.cleaned_tree, css_selector)
+            ]
+        return self._texts[css_selector]
+
+    def select_markdown(self, css_selector: str) -> typing.Optional[str]:
+        """Markdown of the matches of `css_selector`, None when nothing matches.
+
+        Same as `htmls_to_str` of `select_html`, converted from the nodes.
+        """
+        if css_selector not in self._markdowns:
+            nodes = self.backend.select(self.cleaned_tree, css_selector)
+            self._markdowns[css_selector] = (
+                "\n\n".join(self.backend.to_markdown(node) for node in nodes)
+                if nodes
+                else None
+            )
+        return self._markdowns[css_selector]
+
+    def has_texts(self, css_selectors: typing.Iterable[str]) -> bool:
+        """Whether `select_text` of every one of `css_selectors` is memoized."""
+        return all(css_selector in self._texts for css_selector in css_selectors)
+
+    def has_markdown(self, css_selector: str) -> bool:
+        """Whether `select_markdown` of `css_selector` is memoized."""
+        return css_selector in self._markdowns
+
+    def prepare(self) -> "HTMLDocument":
+        """Parse, clean and serialize now, such as in a worker thread."""
+        self.cleaned_html_md5
+        return self
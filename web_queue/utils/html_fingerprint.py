@@ -0,0 +1,69 @@
+import hashlib
+import re
+import typing
+
+TAG_RE = re.compile(r"<(/?)([A-Za-z][A-Za-z0-9]*)((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>")
+ATTRIBUTE_RE = re.compile(r"""\b(id|class)=(?:"([^"]*)"|'([^']*)')""")
+DIGITS_RE = re.compile(r"\d")
+VOID_TAGS = frozenset(("br", "hr", "img", "input", "meta", "link", "wbr"))
+
+
+def html_structure_fingerprint(cleaned_html: str) -> str:
+    """A hash of the tags of cleaned HTML with their id and class, not its text.
+
+    Pages built from one layout get the same fingerprint although their text,
+    counters and dates differ. Ids and classes with digits are left out, and
+    a run of identical siblings counts once, so the number of paragraphs or
+    list items does not matter either. Expects serialized HTML such as
+    `HTMLBackend.clean_html` gives, text `<` is escaped there.
+    """
+    # Per open element: its name, its signature and its children's hashes
+    stack: typing.List[typing.Tuple[str, str, typing.List[str]]] = [("", "", [])]
+    for match in TAG_RE.finditer(cleaned_html):
+        closing, name, attributes = match.groups()
+        name = name.lower()
+        if closing:
+            if not any(open_name == name for open_name, _, _ in stack[1:]):
+                continue
+            while True:
+                open_name, signature, children = stack.pop()
+                _append(stack[-1][2], _hash(signature, children))
+                if open_name == name:
+                    break
+            continue
+
+        signature = name + _get_signature_attributes(attributes)
+        if name in VOID_TAGS or attributes.rstrip().endswith("/"):
+            _append(stack[-1][2], _hash(signature, []))
+        else:
+            stack.append((name, signature, []))
+
+    while len(stack) > 1:
+        _, signature, children = stack.pop()
+        _append(stack[-1][2], _hash(signature, children))
+    return _hash("", stack[0][2])
+
+
+def _get_signature_attributes(attributes: str) -> str:
+    values: typing.List[str] = []
+    for key, double_quoted, single_quoted in ATTRIBUTE_RE.findall(attributes):
+        names = [
+            name
+            for name in (double_quoted or single_quoted).split()
+            if not DIGITS_RE.search(name)
+        ]
+        if names:
+            values.append(("#" if key == "id" else ".") + ".".join(names))
+    return "".join(sorted(values))
+
+
+def _hash(signature: str, children: typing.List[str]) -> str:
+    data = f"{signature}({','.join(children)})".encode("utf-8")
+    return hashlib.md5(data).hexdigest()[:16]
+
+
+def _append(children: typing.List[str], child_hash: str) -> None:
+    """Add a child, a run of identical siblings is kept as one."""
+    if not children or children[-1] != child_hash:
+        children.append(child_hash)
+    return None
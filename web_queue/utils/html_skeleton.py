@@ -0,0 +1,177 @@
+import functools
+import html
+import logging
+import re
+import typing
+
+import bs4
+
+if typing.TYPE_CHECKING:
+    import tiktoken
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_ENCODING_NAME = "o200k_base"
+DEFAULT_TEXT_SAMPLE_LENGTH = 80
+DEFAULT_SIBLING_SAMPLES = 3
+METADATA_TEXT_LENGTH = 256
+ELLIPSIS = "…"
+
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+METADATA_NAME_RE = re.compile(
+    r"title|head|author|writer|user|name|date|time|publish|update|"
+    + r"chapter|episode|subtitle|meta|info|byline",
+    re.IGNORECASE,
+)
+SPACE_RE = re.compile(r"\s+")
+
+
+class HTMLSkeleton(typing.NamedTuple):
+    html: str
+    tokens_before: int
+    tokens_after: int
+
+
+@functools.lru_cache(maxsize=8)
+def get_token_encoding(model_name: str) -> typing.Optional["tiktoken.Encoding"]:
+    """The `tiktoken` encoding of `model_name`, None if it cannot be loaded.
+
+    Unknown models use `o200k_base`. Encodings are downloaded on first use,
+    offline hosts without a `TIKTOKEN_CACHE_DIR` get None.
+    """
+    import tiktoken
+
+    try:
+        try:
+            return tiktoken.encoding_for_model(model_name)
+        except KeyError:
+            return tiktoken.get_encoding(DEFAULT_ENCODING_NAME)
+    except Exception as e:
+        logger.warning(f"No tiktoken encoding for '{model_name}', estimating: {e}")
+        return None
+
+
+def count_tokens(text: str, model_name: str) -> int:
+    """Tokens of `text` for `model_name`, about 4 bytes each without `tiktoken`."""
+    encoding = get_token_encoding(model_name)
+    if encoding is None:
+        return (len(text.encode("utf-8")) + 3) // 4
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def skeletonize_html(
+    cleaned_html: str,
+    *,
+    model_name: str,
+    token_budget: int,
+    text_sample_length: int = DEFAULT_TEXT_SAMPLE_LENGTH,
+    sibling_samples: int = DEFAULT_SIBLING_SAMPLES,
+) -> HTMLSkeleton:
+    """Cleaned HTML shrunk to `token_budget` tokens for the metadata prompt.
+
+    The tags with their id and class are kept. Long text keeps its start and
+    end, runs of siblings of the same tag and class keep their first and last
+    few, with a comment counting the rest. Headings and elements named like
+    title, author or date keep up to `METADATA_TEXT_LENGTH` characters.
+    Samples shrink until the skeleton fits, then it is cut at the budget.
+    HTML within the budget, or a budget of 0, is returned as is.
+    """
+    tokens_before = count_tokens(cleaned_html, model_name)
+    if token_budget <= 0 or tokens_before <= token_budget:
+        return HTMLSkeleton(cleaned_html, tokens_before, tokens_before)
+
+    soup = bs4.BeautifulSoup(cleaned_html, "html.parser")
+    skeleton = cleaned_html
+    tokens_after = tokens_before
+    while True:
+        skeleton = _SkeletonWriter(
+            text_sample_length=text_sample_length, sibling_samples=sibling_samples
+        ).write(soup)
+        tokens_after = count_tokens(skeleton, model_name)
+        if tokens_after <= token_budget:
+            return HTMLSkeleton(skeleton, tokens_before, tokens_after)
+        if text_sample_length <= 8 and sibling_samples <= 1:
+            break
+        text_sample_length = max(text_sample_length // 2, 8)
+        sibling_samples = max(sibling_samples - 1, 1)
+
+    # Still too large, such as a very wide tree, keep the first part
+    while tokens_after > token_budget:
+        skeleton = skeleton[: len(skeleton) * token_budget // tokens_after]
+        tokens_after = count_tokens(skeleton, model_name)
+    return HTMLSkeleton(skeleton, tokens_before, tokens_after)
+
+
+def _is_metadata(tag: bs4.Tag) -> bool:
+    if tag.name in HEADING_TAGS:
+        return True
+    names = [tag.get("id") or "", *(tag.get("class") or [])]
+    return any(METADATA_NAME_RE.search(name) for name in names if name)
+
+
+def _signature(node: bs4.PageElement) -> typing.Optional[typing.Tuple[str, ...]]:
+    if not isinstance(node, bs4.Tag):
+        return None
+    return (node.name, *(node.get("class") or []))
+
+
+def _format_attributes(tag: bs4.Tag) -> str:
+    formatted: typing.List[str] = []
+    for key, value in tag.attrs.items():
+        value = " ".join(value) if isinstance(value, list) else value
+        formatted.append(f' {key}="{html.escape(value)}"')
+    return "".join(formatted)
+
+
+class _SkeletonWriter:
+    def __init__(self, *, text_sample_length: int, sibling_samples: int):
+        self.text_sample_length = text_sample_length
+        self.sibling_samples = sibling_samples
+        self.buffer: typing.List[str] = []
+
+    def write(self, soup: bs4.BeautifulSoup) -> str:
+        self.write_children(soup, metadata=False)
+        return "".join(self.buffer)
+
+    def write_children(self, parent: bs4.Tag, *, metadata: bool) -> None:
+        children = list(parent.children)
+        index = 0
+        while index < len(children):
+            child = children[index]
+            signature = _signature(child)
+            end = index + 1
+            if signature is not None:
+                while end < len(children) and _signature(children[end]) == signature:
+                    end += 1
+
+            run = end - index
+            if run > 2 * self.sibling_samples:
+                for node in children[index : index + self.sibling_samples]:
+                    self.write_node(node, metadata=metadata)
+                elided = run - 2 * self.sibling_samples
+                self.buffer.append(f"<!-- {elided} more <{child.name}> -->")
+                for node in children[end - self.sibling_samples : end]:
+                    self.write_node(node, metadata=metadata)
+            else:
+                for node in children[index:end]:
+                    self.write_node(node, metadata=metadata)
+            index = end
+        return None
+
+    def write_node(self, node: bs4.PageElement, *, metadata: bool) -> None:
+        if isinstance(node, bs4.Tag):
+            self.buffer.append(f"<{node.name}{_format_attributes(node)}>")
+            if node.name != "br" and node.name != "hr":
+                self.write_children(node, metadata=metadata or _is_metadata(node))
+                self.buffer.append(f"</{node.name}>")
+        elif type(node) is bs4.NavigableString:
+            text = self.sample_text(node, metadata=metadata)
+            self.buffer.append(html.escape(text, quote=False))
+        return None
+
+    def sample_text(self, text: str, *, metadata: bool) -> str:
+        text = SPACE_RE.sub(" ", text)
+        length = METADATA_TEXT_LENGTH if metadata else self.text_sample_length
+        if len(text) <= 2 * length:
+            return text
+        return text[:length] + ELLIPSIS + text[-length:]
@@ -0,0 +1,322 @@
+import html.parser
+import typing
+
+import bs4
+import bs4.builder
+import bs4.dammit
+import bs4.formatter
+
+from web_queue.utils.html_backend import compact_html
+from web_queue.utils.html_cleaner import (
+    DEFAULT_DROP_TAGS,
+    DEFAULT_KEEP_ATTRIBUTES,
+    DEFAULT_KEEP_TAGS,
+)
+
+ASCII_SPACES = "\x20\x0a\x09\x0c\x0d"
+VOID_TAGS = frozenset(bs4.builder.HTMLTreeBuilder.DEFAULT_EMPTY_ELEMENT_TAGS)
+PRESERVE_WHITESPACE_TAGS = frozenset(
+    bs4.builder.HTMLTreeBuilder.DEFAULT_PRESERVE_WHITESPACE_TAGS
+)
+MULTI_VALUED_ATTRIBUTES = bs4.builder.HTMLTreeBuilder.DEFAULT_CDATA_LIST_ATTRIBUTES
+
+DEFAULT_CHUNK_SIZE = 64 * 1024
+DEFAULT_MAX_BUFFER_LENGTH = 8 * 1024 * 1024
+
+
+class _OpenTag(typing.NamedTuple):
+    name: str
+    visible: bool
+    start_tag: str  # Not yet written for a void element without content
+
+
+class StreamingHTMLCleaner(html.parser.HTMLParser):
+    """`HTMLCleaner.clean_as_main_content_html_str` without building a tree.
+
+    Tokenizes with `html.parser` as `bs4` does and writes the cleaned,
+    compacted HTML as it goes, only the open tag stack and the current
+    token are held. The output equals the tree cleaner's for the same
+    rules, including `bs4`'s nesting, whitespace and serialization quirks.
+
+    Input still unparsed, such as an unterminated comment, is held until
+    its end arrives. Past `max_buffer_length` characters `feed` raises
+    ValueError.
+    """
+
+    def __init__(
+        self,
+        *,
+        keep_tags: typing.Iterable[typing.Text] = DEFAULT_KEEP_TAGS,
+        drop_tags: typing.Iterable[typing.Text] = DEFAULT_DROP_TAGS,
+        keep_attributes: typing.Iterable[typing.Text] = DEFAULT_KEEP_ATTRIBUTES,
+        max_buffer_length: int = DEFAULT_MAX_BUFFER_LENGTH,
+    ):
+        super().__init__(convert_charrefs=False)
+        self.keep_tags = frozenset(keep_tags) - frozenset(drop_tags)
+        self.keep_attributes = frozenset(keep_attributes)
+        self.max_buffer_length = max_buffer_length
+        self.formatter = bs4.formatter.HTMLFormatter.REGISTRY["minimal"]
+
+        self._stack: typing.List[_OpenTag] = []
+        self._already_closed_void_tags: typing.List[str] = []
+        self._data: typing.List[str] = []
+        self._data_length = 0
+        self._output: typing.List[str] = []
+        self._pending_space = ""
+        self._last_char = ""
+
+    def feed(self, data: str) -> None:
+        super().feed(data)
+        if len(self.rawdata) + self._data_length > self.max_buffer_length:
+            raise ValueError(
+                "Streaming HTML cleaner buffer exceeded "
+                + f"{self.max_buffer_length} characters"
+            )
+        return None
+
+    def close(self) -> None:
+        super().close()
+        self._end_data()
+        while self._stack:
+            self._close_tag(self._stack.pop())
+        if self._pending_space:
+            self._output.append(self._pending_space)
+            self._pending_space = ""
+        return None
+
+    def drain(self) -> str:
+        """The cleaned HTML written since the last call."""
+        output = "".join(self._output)
+        self._output.clear()
+        return output
+
+    def handle_starttag(
+        self, tag: str, attrs: typing.List[typing.Tuple[str, typing.Optional[str]]]
+    ) -> None:
+        self._open_tag(tag, attrs, void=tag in VOID_TAGS)
+        return None
+
+    def handle_startendtag(
+        self, tag: str, attrs: typing.List[typing.Tuple[str, typing.Optional[str]]]
+    ) -> None:
+        # Like `bs4`, `<br/>` closes the `<br>` opened before it, if any
+        self._open_tag(tag, attrs, void=False)
+        self.handle_endtag(tag)
+        return None
+
+    def handle_endtag(self, tag: str) -> None:
+        if tag in self._already_closed_void_tags:
+            self._already_closed_void_tags.remove(tag)
+            return None
+
+        self._end_data()
+        if not any(open_tag.name == tag for open_tag in self._stack):
+            return None
+        while self._stack:
+            open_tag = self._stack.pop()
+            self._close_tag(open_tag)
+            if open_tag.name == tag:
+                break
+        return None
+
+    def handle_data(self, data: str) -> None:
+        self._data.append(data)
+        self._data_length += len(data)
+        return None
+
+    def handle_charref(self, name: str) -> None:
+        code_point = int(name[1:], 16) if name[:1] in ("x", "X") else int(name)
+        data = None
+        if code_point < 256:
+            # Windows-1252 code points in numeric references, as `bs4` reads them
+            try:
+                data = bytes([code_point]).decode("windows-1252")
+            except UnicodeDecodeError:
+                pass
+        if not data:
+            try:
+                data = chr(code_point)
+            except (ValueError, OverflowError):
+                pass
+        self.handle_data(data or "\N{REPLACEMENT CHARACTER}")
+        return None
+
+    def handle_entityref(self, name: str) -> None:
+        character = bs4.dammit.EntitySubstitution.HTML_ENTITY_TO_CHARACTER.get(name)
+        self.handle_data(character if character is not None else f"&{name}")
+        return None
+
+    def handle_comment(self, data: str) -> None:
+        self._end_data()
+        return None
+
+    def handle_decl(self, decl: str) -> None:
+        self._end_data()
+        self._write_raw_node(
+            bs4.Doctype.PREFIX + decl[len("DOCTYPE ") :] + bs4.Doctype.SUFFIX
+        )
+        return None
+
+    def unknown_decl(self, data: str) -> None:
+        self._end_data()
+        if data.upper().startswith("CDATA["):
+            data = bs4.CData.PREFIX + data[len("CDATA[") :] + bs4.CData.SUFFIX
+        else:
+            data = bs4.Declaration.PREFIX + data + bs4.Declaration.SUFFIX
+        self._write_raw_node(data)
+        return None
+
+    def handle_pi(self, data: str) -> None:
+        self._end_data()
+        self._write_raw_node(
+            bs4.ProcessingInstruction.PREFIX + data + bs4.ProcessingInstruction.SUFFIX
+        )
+        return None
+
+    @property
+    def _visible(self) -> bool:
+        return self._stack[-1].visible if self._stack else True
+
+    def _open_tag(
+        self,
+        tag: str,
+        attrs: typing.List[typing.Tuple[str, typing.Optional[str]]],
+        *,
+        void: bool,
+    ) -> None:
+        self._end_data()
+        visible = self._visible and tag in self.keep_tags
+        start_tag = ""
+        if visible:
+            self._write_content()
+            start_tag = self._format_start_tag(tag, attrs)
+
+        if void:
+            self._already_closed_void_tags.append(tag)
+            if visible:
+                self._write(
+                    start_tag[:-1] + self.formatter.void_element_close_prefix + ">"
+                )
+            return None
+
+        if visible and tag not in VOID_TAGS:
+            self._write(start_tag)
+            start_tag = ""
+        self._stack.append(_OpenTag(tag, visible, start_tag))
+        return None
+
+    def _close_tag(self, open_tag: _OpenTag) -> None:
+        if not open_tag.visible:
+            return None
+        if open_tag.start_tag:
+            # A void element that got no content, such as `<br/>`
+            self._write(
+                open_tag.start_tag[:-1] + self.formatter.void_element_close_prefix + ">"
+            )
+        else:
+            self._write(f"</{open_tag.name}>")
+        return None
+
+    def _format_start_tag(
+        self, tag: str, attrs: typing.List[typing.Tuple[str, typing.Optional[str]]]
+    ) -> str:
+        values: typing.Dict[str, str] = {}
+        for key, value in attrs:
+            if key in self.keep_attributes:
+                values[key] = "" if value is None else value
+
+        multi_valued = MULTI_VALUED_ATTRIBUTES["*"] | MULTI_VALUED_ATTRIBUTES.get(
+            tag, set()
+        )
+        formatted: typing.List[str] = []
+        for key, value in sorted(values.items()):
+            if key in multi_valued:
+                values_list = value.split()
+                value = " ".join(values_list[:1] if key == "class" else values_list)
+            formatted.append(
+                f"{key}="
+                + self.formatter.quoted_attribute_value(
+                    self.formatter.attribute_value(value)
+                )
+            )
+        return f"<{tag}{''.join(' ' + a for a in formatted)}>"
+
+    def _end_data(self) -> None:
+        if not self._data:
+            return None
+        data = "".join(self._data)
+        self._data.clear()
+        self._data_length = 0
+        if not self._visible:
+            return None
+
+        preserve = any(t.name in PRESERVE_WHITESPACE_TAGS for t in self._stack)
+        if not preserve and all(c in ASCII_SPACES for c in data):
+            data = "\n" if "\n" in data else " "
+        self._write_node(self.formatter.substitute(data))
+        return None
+
+    def _write_node(self, data: str) -> None:
+        """Write a text or declaration node of the current element."""
+        if self._visible:
+            self._write_content()
+            self._write(data)
+        return None
+
+    def _write_raw_node(self, data: str) -> None:
+        """Write a declaration, its text is not escaped and may hold tags."""
+        self._write_node(compact_html(data))
+        return None
+
+    def _write_content(self) -> None:
+        """The current element has content, write a pending void start tag."""
+        if self._stack and self._stack[-1].start_tag:
+            open_tag = self._stack.pop()
+            self._write(open_tag.start_tag)
+            self._stack.append(open_tag._replace(start_tag=""))
+        return None
+
+    def _write(self, data: str) -> None:
+        """Append output, dropping whitespace between tags as `compact_html`.
+
+        Whitespace at either end of `data` is held until the next character
+        written is known.
+        """
+        core = data.strip()
+        if not core:
+            self._pending_space += data
+            return None
+
+        if leading_space := data[: len(data) - len(data.lstrip())]:
+            self._pending_space += leading_space
+        if self._pending_space:
+            if not (self._last_char == ">" and core[0] == "<"):
+                self._output.append(self._pending_space)
+            self._pending_space = ""
+        self._output.append(core)
+        self._last_char = core[-1]
+        self._pending_space = data[len(data.rstrip()) :]
+        return None
+
+
+def iter_clean_html(
+    chunks: typing.Iterable[str], **cleaner_kwargs: typing.Any
+) -> typing.Iterator[str]:
+    """Cleaned, compacted HTML of the `chunks` of a page, chunk by chunk."""
+    cleaner = StreamingHTMLCleaner(**cleaner_kwargs)
+    for chunk in chunks:
+        cleaner.feed(chunk)
+        if output := cleaner.drain():
+            yield output
+    cleaner.close()
+    if output := cleaner.drain():
+        yield output
+    return None
+
+
+def clean_html_streaming(
+    html: str, *, chunk_size: int = DEFAULT_CHUNK_SIZE, **cleaner_kwargs: typing.Any
+) -> str:
+    """Same as `BeautifulSoupBackend.clean_html`, in bounded extra memory."""
+    chunks = (html[i : i + chunk_size] for i in range(0, len(html), chunk_size))
+    return "".join(iter_clean_html(chunks, **cleaner_kwargs))
@@ -1,11 +1,21 @@
+import logging
 import typing
 
 import bs4
 import html_to_markdown
 
+from web_queue.utils.tree_to_markdown import UnsupportedMarkup, tree_to_markdown
+
+logger = logging.getLogger(__name__)
+
 
 def html_to_str(html: bs4.BeautifulSoup | bs4.Tag | str) -> str:
-    html = bs4.BeautifulSoup(html, "html.parser") if isinstance(html, str) else html
+    if isinstance(html, bs4.Tag) and not isinstance(html, bs4.BeautifulSoup):
+        # Walk the parsed tag instead of serializing it for a re-parse
+        try:
+            return tree_to_markdown(html)
+        except UnsupportedMarkup as e:
+            logger.debug(f"Converting <{html.name}> through HTML: {e}")
     content = html_to_markdown.convert(str(html)).strip()
     return "\n".join(line.rstrip() for line in content.splitlines())
 
@@ -0,0 +1,106 @@
+import collections
+import threading
+import time
+import typing
+
+from web_queue.types.memory_cache_stats import MemoryCacheStats
+
+T = typing.TypeVar("T")
+
+
+class MemoryCache(typing.Generic[T]):
+    """Thread-safe in-process LRU cache bounded by approximate byte size.
+
+    Holds decoded objects in front of a disk or Redis cache, so hot keys
+    skip I/O and decompression. Entries expire after `ttl` seconds to pick
+    up writes from other workers, `ttl < 0` never expires them.
+    `max_bytes <= 0` or `ttl == 0` disables the cache.
+    """
+
+    def __init__(self, *, max_bytes: int, ttl: float):
+        self.max_bytes = max_bytes
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._entries: collections.OrderedDict[
+            typing.Hashable, typing.Tuple[T, int, float]
+        ] = collections.OrderedDict()
+        self._size_bytes = 0
+        self._stats = MemoryCacheStats(max_bytes=max_bytes)
+
+    @property
+    def enabled(self) -> bool:
+        return self.max_bytes > 0 and self.ttl != 0
+
+    def get(self, key: typing.Hashable) -> typing.Optional[T]:
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            item = self._entries.get(key)
+            if item is None:
+                self._stats.misses += 1
+                return None
+
+            value, size, expires_at = item
+            if time.monotonic() >= expires_at:
+                self._remove(key)
+                self._stats.expirations += 1
+                self._stats.misses += 1
+                return None
+
+            self._entries.move_to_end(key)
+            self._stats.hits += 1
+            return value
+
+    def set(
+        self,
+        key: typing.Hashable,
+        value: T,
+        *,
+        size: int,
+        ttl: typing.Optional[float] = None,
+    ) -> None:
+        """Store `value`, `size` is its approximate footprint in bytes."""
+        if not self.enabled:
+            return None
+
+        with self._lock:
+            self._remove(key)
+            if size > self.max_bytes:
+                return None  # Would evict everything else
+
+            # Never outlive the backing entry, `ttl < 0` means no expiry
+            ttls = [t for t in (self.ttl, ttl) if t is not None and t > 0]
+            expires_at = time.monotonic() + min(ttls) if ttls else float("inf")
+            self._entries[key] = (value, size, expires_at)
+            self._size_bytes += size
+
+            while self._size_bytes > self.max_bytes:
+                oldest_key = next(iter(self._entries))
+                self._remove(oldest_key)
+                self._stats.evictions += 1
+        return None
+
+    def delete(self, key: typing.Hashable) -> None:
+        with self._lock:
+            self._remove(key)
+        return None
+
+    def clear(self) -> None:
+        with self._lock:
+            self._entries.clear()
+            self._size_bytes = 0
+        return None
+
+    @property
+    def stats(self) -> MemoryCacheStats:
+        with self._lock:
+            return self._stats.model_copy(
+                update={"entries": len(self._entries), "size_bytes": self._size_bytes}
+            )
+
+    def _remove(self, key: typing.Hashable) -> None:
+        item = self._entries.pop(key, None)
+        if item is not None:
+            self._size_bytes -= item[1]
+        return None
@@ -0,0 +1,124 @@
+import asyncio
+import logging
+import time
+
+import playwright.async_api
+
+from web_queue.utils.human_delay import human_delay
+
+logger = logging.getLogger(__name__)
+
+MUTATION_OBSERVER_SCRIPT = """
+(() => {
+    window.__wqLastMutationAt = performance.now();
+    new MutationObserver(() => {
+        window.__wqLastMutationAt = performance.now();
+    }).observe(document, {
+        attributes: true, characterData: true, childList: true, subtree: true
+    });
+})();
+"""
+PAGE_STATE_SCRIPT = """
+() => [
+    performance.now() - (window.__wqLastMutationAt || 0),
+    document.body ? document.body.textContent.length : 0,
+]
+"""
+# Long-lived requests that would keep the network busy until the deadline
+LONG_LIVED_RESOURCE_TYPES = ("eventsource", "websocket")
+
+
+class PageReadiness:
+    """Ends waits early once the page has settled.
+
+    A page is settled when no request is in flight, the network and the DOM
+    have been quiet for `quiet_seconds`, and the text length has stopped
+    changing. Each wait is bounded by the base delay of the `human_delay` it
+    replaces, a page that never settles costs no more than it on average.
+    Event streams and websockets are not counted as in flight.
+    """
+
+    def __init__(
+        self,
+        page: playwright.async_api.Page,
+        *,
+        adaptive: bool = True,
+        quiet_seconds: float = 0.5,
+        poll_interval: float = 0.1,
+        jitter_ratio: tuple[float, float] = (0.5, 1.5),
+    ):
+        self.page = page
+        self.adaptive = adaptive
+        self.quiet_seconds = quiet_seconds
+        self.poll_interval = poll_interval
+        self.jitter_ratio = jitter_ratio
+        self.waited_seconds = 0.0
+        self._inflight_requests = 0
+        self._last_network_at = time.monotonic()
+
+    async def attach(self) -> "PageReadiness":
+        """Start watching the page, call before navigating."""
+        if not self.adaptive:
+            return self
+        await self.page.add_init_script(MUTATION_OBSERVER_SCRIPT)
+        self.page.on("request", self._on_request_started)
+        self.page.on("requestfinished", self._on_request_done)
+        self.page.on("requestfailed", self._on_request_done)
+        return self
+
+    async def wait(self, base_delay: float) -> float:
+        """Wait until the page settles, at most `base_delay` seconds."""
+        started_at = time.monotonic()
+        if self.adaptive:
+            await self._wait_until_settled(base_delay)
+        else:
+            await human_delay(base_delay, jitter_ratio=self.jitter_ratio)
+
+        waited = time.monotonic() - started_at
+        self.waited_seconds += waited
+        return waited
+
+    async def _wait_until_settled(self, max_seconds: float) -> None:
+        deadline = time.monotonic() + max_seconds
+        last_text_length: int | None = None
+        text_stable_since = time.monotonic()
+
+        while (now := time.monotonic()) < deadline:
+            try:
+                mutation_idle_ms, text_length = await self.page.evaluate(
+                    PAGE_STATE_SCRIPT
+                )
+            except playwright.async_api.Error as e:
+                # Execution context is being replaced, e.g. during navigation
+                logger.debug(f"Page state unavailable, retrying: {e}")
+                mutation_idle_ms, text_length = 0, None
+
+            if text_length != last_text_length:
+                last_text_length = text_length
+                text_stable_since = now
+
+            if (
+                self._inflight_requests <= 0
+                and now - self._last_network_at >= self.quiet_seconds
+                and mutation_idle_ms / 1000 >= self.quiet_seconds
+                and now - text_stable_since >= self.quiet_seconds
+            ):
+                return None
+
+            await asyncio.sleep(min(self.poll_interval, max(deadline - now, 0)))
+
+        return None
+
+    def _on_request_started(self, request: playwright.async_api.Request) -> None:
+        if request.resource_type in LONG_LIVED_RESOURCE_TYPES:
+            return None
+        self._inflight_requests += 1
+        self._last_network_at = time.monotonic()
+        return None
+
+    def _on_request_done(self, request: playwright.async_api.Request) -> None:
+        if request.resource_type in LONG_LIVED_RESOURCE_TYPES:
+            return None
+        self._inflight_requests -= 1
+        self._last_network_at = time.monotonic()
+        return None
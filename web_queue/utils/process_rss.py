@@ -0,0 +1,77 @@
+import os
+import pathlib
+import typing
+
+PROC_PATH = pathlib.Path("/proc")
+
+
+def find_pid_by_arg(arg: str) -> typing.Optional[int]:
+    """Return the topmost process started with `arg` on its command line.
+
+    Children inheriting the argument are skipped for their parent. Reads
+    `/proc` directly, returns None on platforms without procfs or no match.
+    """
+    if not PROC_PATH.is_dir():
+        return None
+
+    matches: typing.Dict[int, int] = {}  # pid -> parent pid
+    encoded_arg = arg.encode("utf-8")
+    for proc_dir in PROC_PATH.iterdir():
+        if not proc_dir.name.isdigit():
+            continue
+        try:
+            if encoded_arg not in proc_dir.joinpath("cmdline").read_bytes().split(
+                b"\0"
+            ):
+                continue
+            matches[int(proc_dir.name)] = _get_parent_pid(proc_dir)
+        except OSError:
+            continue  # Process exited while scanning
+
+    for pid, parent_pid in matches.items():
+        if parent_pid not in matches:
+            return pid
+    return None
+
+
+def get_process_tree_rss(pid: int) -> typing.Optional[int]:
+    """Return the total RSS in bytes of a process and all its descendants.
+
+    Reads `/proc` directly, returns None on platforms without procfs or when
+    the process has exited.
+    """
+    if not PROC_PATH.is_dir():
+        return None
+
+    page_size = os.sysconf("SC_PAGE_SIZE")
+
+    # Build parent -> children map
+    children: typing.Dict[int, typing.List[int]] = {}
+    for proc_dir in PROC_PATH.iterdir():
+        if not proc_dir.name.isdigit():
+            continue
+        try:
+            children.setdefault(_get_parent_pid(proc_dir), []).append(
+                int(proc_dir.name)
+            )
+        except OSError:
+            continue  # Process exited while scanning
+
+    total_rss: typing.Optional[int] = None
+    stack = [pid]
+    while stack:
+        tree_pid = stack.pop()
+        stack.extend(children.get(tree_pid, []))
+        try:
+            statm = PROC_PATH.joinpath(str(tree_pid), "statm").read_text().split()
+        except OSError:
+            continue
+        total_rss = (total_rss or 0) + int(statm[1]) * page_size
+
+    return total_rss
+
+
+def _get_parent_pid(proc_dir: pathlib.Path) -> int:
+    stat = proc_dir.joinpath("stat").read_text()
+    # The command name may contain spaces, fields start after the last ')'
+    return int(stat[stat.rfind(")") + 2 :].split()[1])
@@ -0,0 +1,72 @@
+import logging
+import typing
+
+import playwright.async_api
+import yarl
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BLOCKED_RESOURCE_TYPES: typing.Tuple[typing.Text, ...] = (
+    "font",
+    "image",
+    "media",
+)
+DEFAULT_BLOCKED_DOMAINS: typing.Tuple[typing.Text, ...] = (
+    "doubleclick.net",
+    "facebook.net",
+    "google-analytics.com",
+    "googleadservices.com",
+    "googlesyndication.com",
+    "googletagmanager.com",
+    "googletagservices.com",
+    "hotjar.com",
+    "scorecardresearch.com",
+)
+
+
+class ResourcePolicy:
+    """Playwright route handler blocking subresources by type and domain.
+
+    The main frame navigation is never blocked.
+    """
+
+    def __init__(
+        self,
+        *,
+        blocked_resource_types: typing.Iterable[typing.Text] = (),
+        blocked_domains: typing.Iterable[typing.Text] = (),
+    ):
+        self.blocked_resource_types = frozenset(blocked_resource_types)
+        self.blocked_domains = frozenset(d.lower().strip(".") for d in blocked_domains)
+        self.blocked_count = 0
+        self.allowed_count = 0
+
+    @property
+    def is_noop(self) -> bool:
+        return not self.blocked_resource_types and not self.blocked_domains
+
+    def should_block(self, resource_type: typing.Text, url: typing.Text) -> bool:
+        if resource_type in self.blocked_resource_types:
+            return True
+
+        if self.blocked_domains:
+            host = (yarl.URL(url).host or "").lower()
+            while host:
+                if host in self.blocked_domains:
+                    return True
+                _, _, host = host.partition(".")
+
+        return False
+
+    async def handle_route(self, route: playwright.async_api.Route) -> None:
+        request = route.request
+        if not (
+            request.is_navigation_request() and request.frame.parent_frame is None
+        ) and self.should_block(request.resource_type, request.url):
+            self.blocked_count += 1
+            await route.abort()
+            return None
+
+        self.allowed_count += 1
+        await route.continue_()
+        return None
@@ -0,0 +1,299 @@
+import functools
+import hashlib
+import json
+import logging
+import os
+import pathlib
+import secrets
+import time
+import typing
+
+import cachetic
+import diskcache
+import redis
+import redis.exceptions
+
+logger = logging.getLogger(__name__)
+
+T = typing.TypeVar("T")
+
+INLINE_MARKER = b"\x00"
+MANIFEST_MARKER = b"\x01"
+
+
+class SharedCachetic(cachetic.Cachetic[T]):
+    """Cachetic over any `CacheProtocol` backend, such as `ReadThroughCache`."""
+
+    backend: typing.Any = None
+
+    @functools.cached_property
+    def cache(self) -> typing.Any:  # type: ignore[override]
+        return self.backend
+
+
+class ChunkedRedisCache:
+    """Redis backend that splits large values into chunks.
+
+    Small values are stored inline. Large values are stored as chunks under a
+    per-write version, then a manifest pointing at them, so readers never see
+    a torn value while another node overwrites it.
+    """
+
+    def __init__(self, redis_client: redis.Redis, *, namespace: str, chunk_bytes: int):
+        self.redis_client = redis_client
+        self.namespace = namespace
+        self.chunk_bytes = max(chunk_bytes, 1024)
+
+    def get(self, name: str, *args, **kwargs) -> typing.Optional[bytes]:
+        value = self.redis_client.get(self._key(name))
+        if value is None:
+            return None
+        if value.startswith(INLINE_MARKER):
+            return value[1:]
+
+        manifest = json.loads(value[1:])
+        chunks = self.redis_client.mget(manifest["chunks"])
+        if any(chunk is None for chunk in chunks):
+            return None  # Chunks expired before the manifest
+        return b"".join(chunks)
+
+    def set(
+        self, name: str, value: bytes, ex: typing.Optional[int] = None, *args, **kwargs
+    ) -> None:
+        if len(value) <= self.chunk_bytes:
+            self.redis_client.set(self._key(name), INLINE_MARKER + value, ex=ex)
+            return None
+
+        version = secrets.token_hex(8)
+        chunk_keys: typing.List[str] = []
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for index, start in enumerate(range(0, len(value), self.chunk_bytes)):
+                chunk_key = f"{self.namespace}:chunk:{version}:{index}:{name}"
+                chunk_keys.append(chunk_key)
+                # Chunks outlive the manifest a little for in-progress readers
+                pipe.set(
+                    chunk_key,
+                    value[start : start + self.chunk_bytes],
+                    ex=(ex + 60) if ex else None,
+                )
+            pipe.execute()
+
+        manifest = json.dumps({"chunks": chunk_keys, "size": len(value)})
+        previous = self.redis_client.set(
+            self._key(name), MANIFEST_MARKER + manifest.encode(), ex=ex, get=True
+        )
+        self._expire_chunks_of(previous)
+        return None
+
+    def delete(self, name: str, *args, **kwargs) -> None:
+        previous = self.redis_client.getdel(self._key(name))
+        self._expire_chunks_of(previous)
+        return None
+
+    def iterkeys(self) -> typing.Iterator[str]:
+        prefix = f"{self.namespace}:key:"
+        for key in self.redis_client.scan_iter(match=f"{prefix}*"):
+            yield key.decode("utf-8")[len(prefix) :]
+
+    def get_ttl(self, name: str) -> typing.Optional[int]:
+        """Seconds until `name` expires, None if it does not expire."""
+        ttl = self.redis_client.ttl(self._key(name))
+        return None if ttl < 0 else ttl
+
+    def _key(self, name: str) -> str:
+        return f"{self.namespace}:key:{name}"
+
+    def _expire_chunks_of(self, previous: typing.Optional[bytes]) -> None:
+        if not previous or not previous.startswith(MANIFEST_MARKER):
+            return None
+        with self.redis_client.pipeline(transaction=False) as pipe:
+            for chunk_key in json.loads(previous[1:])["chunks"]:
+                pipe.expire(chunk_key, 60)
+            pipe.execute()
+        return None
+
+
+class ContentAddressedDirectoryCache:
+    """Object store on a shared directory, such as NFS or a mounted bucket.
+
+    Values are split into chunks stored once under their SHA-256, pages that
+    share chunks or are rewritten unchanged cost no extra space. A small
+    index file per key lists its chunks and expiry. Files are written to a
+    temporary name and renamed, so readers on other nodes see whole files.
+    Run `prune()` periodically to drop expired keys and orphaned chunks.
+    """
+
+    def __init__(self, root: pathlib.Path, *, chunk_bytes: int):
+        self.root = root
+        self.chunk_bytes = max(chunk_bytes, 1024)
+        self.objects_path.mkdir(parents=True, exist_ok=True)
+        self.index_path.mkdir(parents=True, exist_ok=True)
+
+    @property
+    def objects_path(self) -> pathlib.Path:
+        return self.root / "objects"
+
+    @property
+    def index_path(self) -> pathlib.Path:
+        return self.root / "index"
+
+    def get(self, name: str, *args, **kwargs) -> typing.Optional[bytes]:
+        index = self._read_index(self._index_file(name))
+        if index is None:
+            return None
+
+        chunks: typing.List[bytes] = []
+        for digest in index["chunks"]:
+            try:
+                chunks.append(self._object_file(digest).read_bytes())
+            except FileNotFoundError:
+                return None
+        return b"".join(chunks)
+
+    def set(
+        self, name: str, value: bytes, ex: typing.Optional[int] = None, *args, **kwargs
+    ) -> None:
+        digests: typing.List[str] = []
+        for start in range(0, max(len(value), 1), self.chunk_bytes):
+            chunk = value[start : start + self.chunk_bytes]
+            digest = hashlib.sha256(chunk).hexdigest()
+            object_file = self._object_file(digest)
+            try:
+                os.utime(object_file)  # Already stored, keep it alive for `prune`
+            except FileNotFoundError:
+                self._write_atomic(object_file, chunk)
+            digests.append(digest)
+
+        index = {
+            "key": name,
+            "chunks": digests,
+            "size": len(value),
+            "expires_at": (time.time() + ex) if ex else None,
+        }
+        self._write_atomic(self._index_file(name), json.dumps(index).encode())
+        return None
+
+    def delete(self, name: str, *args, **kwargs) -> None:
+        self._index_file(name).unlink(missing_ok=True)
+        return None
+
+    def iterkeys(self) -> typing.Iterator[str]:
+        for index_file in self.index_path.glob("*/*.json"):
+            index = self._read_index(index_file)
+            if index is not None:
+                yield index["key"]
+
+    def get_ttl(self, name: str) -> typing.Optional[int]:
+        """Seconds until `name` expires, None if it does not expire."""
+        index = self._read_index(self._index_file(name))
+        if index is None or index["expires_at"] is None:
+            return None
+        return max(int(index["expires_at"] - time.time()), 1)
+
+    def prune(self, *, grace_seconds: float = 60 * 60) -> int:
+        """Delete expired keys and chunks no key refers to, returns files removed.
+
+        Chunks younger than `grace_seconds` are kept, their key may still be
+        being written.
+        """
+        removed = 0
+        referenced: typing.Set[str] = set()
+        for index_file in self.index_path.glob("*/*.json"):
+            index = self._read_index(index_file)
+            if index is None:
+                removed += 1
+            else:
+                referenced.update(index["chunks"])
+
+        threshold = time.time() - grace_seconds
+        for object_file in self.objects_path.glob("*/*"):
+            if object_file.name in referenced or object_file.suffix == ".tmp":
+                continue
+            try:
+                if object_file.stat().st_mtime < threshold:
+                    object_file.unlink()
+                    removed += 1
+            except FileNotFoundError:
+                pass
+        return removed
+
+    def _read_index(self, index_file: pathlib.Path) -> typing.Optional[dict]:
+        try:
+            index = json.loads(index_file.read_bytes())
+        except FileNotFoundError:
+            return None
+        if index["expires_at"] is not None and index["expires_at"] <= time.time():
+            index_file.unlink(missing_ok=True)
+            return None
+        return index
+
+    def _index_file(self, name: str) -> pathlib.Path:
+        digest = hashlib.sha256(name.encode("utf-8")).hexdigest()
+        return self.index_path / digest[:2] / f"{digest}.json"
+
+    def _object_file(self, digest: str) -> pathlib.Path:
+        return self.objects_path / digest[:2] / digest
+
+    def _write_atomic(self, path: pathlib.Path, data: bytes) -> None:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp_path = path.with_name(f"{path.name}.{secrets.token_hex(4)}.tmp")
+        tmp_path.write_bytes(data)
+        os.replace(tmp_path, path)
+        return None
+
+
+class ReadThroughCache:
+    """A shared backend with a local disk copy in front of it.
+
+    Reads try the local copy first and keep what they fetch from the shared
+    backend for `local_ttl` seconds. Writes go to both. When the shared
+    backend fails, the node keeps working from its local copy.
+    """
+
+    def __init__(
+        self,
+        *,
+        local: diskcache.Cache,
+        shared: typing.Union[ChunkedRedisCache, ContentAddressedDirectoryCache],
+        local_ttl: int,
+    ):
+        self.local = local
+        self.shared = shared
+        self.local_ttl = local_ttl
+
+    def get(self, name: str, *args, **kwargs) -> typing.Optional[bytes]:
+        value = self.local.get(name)
+        if value is not None:
+            return value
+
+        try:
+            value = self.shared.get(name)
+        except (redis.exceptions.RedisError, OSError) as e:
+            logger.warning(f"Shared cache unavailable, reading '{name}' failed: {e}")
+            return None
+        if value is not None:
+            self.local.set(name, value, expire=self.local_ttl)
+        return value
+
+    def set(
+        self, name: str, value: bytes, ex: typing.Optional[int] = None, *args, **kwargs
+    ) -> None:
+        try:
+            self.shared.set(name, value, ex)
+        except (redis.exceptions.RedisError, OSError) as e:
+            logger.warning(f"Shared cache unavailable, writing '{name}' failed: {e}")
+        self.local.set(
+            name, value, expire=min(ex, self.local_ttl) if ex else self.local_ttl
+        )
+        return None
+
+    def delete(self, name: str, *args, **kwargs) -> None:
+        try:
+            self.shared.delete(name)
+        except (redis.exceptions.RedisError, OSError) as e:
+            logger.warning(f"Shared cache unavailable, deleting '{name}' failed: {e}")
+        self.local.delete(name)
+        return None
+
+    def iterkeys(self) -> typing.Iterator[str]:
+        return self.shared.iterkeys()
@@ -0,0 +1,269 @@
+import datetime
+import re
+import typing
+import zoneinfo
+
+import bs4
+import yarl
+
+from web_queue.types.html_metadata_response import HTMLMetadataResponse
+from web_queue.types.site_template import SiteTemplate, SiteTemplateField
+
+DATE_FIELDS = ("created_date", "updated_date")
+TEMPLATE_FIELDS = ("title", "author", "chapter_id", "chapter_number", *DATE_FIELDS)
+URL_FIELDS = ("chapter_id", "chapter_number")  # Looked up in the URL first
+MAX_FIELD_LENGTH = 256
+DATE_TIMEZONE = zoneinfo.ZoneInfo("Asia/Taipei")  # As the AI is asked to give
+
+SPACE_RE = re.compile(r"\s+")
+DIGITS_RE = re.compile(r"\d+")
+# 2025-10-12, 2025/10/12 14:30 or 2025年10月12日 14:30:05, no group captures
+DATE_PATTERN = (
+    r"\d{4}\s*[-/.年]\s*\d{1,2}\s*[-/.月]\s*\d{1,2}\s*日?"
+    + r"(?:\s*T?\s*\d{1,2}:\d{2}(?::\d{2})?)?"
+)
+DATE_RE = re.compile(DATE_PATTERN)
+CSS_IDENTIFIER_RE = re.compile(r"-?[A-Za-z_][\w-]*")
+
+
+def normalize_text(text: str) -> str:
+    return SPACE_RE.sub(" ", text).strip()
+
+
+def get_url_pattern(url: typing.Text | yarl.URL) -> typing.Tuple[str, str]:
+    """The domain and path pattern of a URL, segments with digits are `*`.
+
+    `https://www.example.com/n1234/5/` gives `("example.com", "/*/*/")`.
+    """
+    url = yarl.URL(str(url))
+    domain = (url.host or "").lower().removeprefix("www.")
+    segments = [
+        "*" if DIGITS_RE.search(segment) else segment for segment in url.path.split("/")
+    ]
+    return domain, "/".join(segments)
+
+
+def get_url_segments(url: typing.Text | yarl.URL) -> typing.List[str]:
+    return [segment for segment in yarl.URL(str(url)).path.split("/") if segment]
+
+
+def parse_date(text: str) -> typing.Optional[datetime.datetime]:
+    """The first date in `text`, in `DATE_TIMEZONE`."""
+    if (match := DATE_RE.search(text)) is None:
+        return None
+    numbers = [int(number) for number in DIGITS_RE.findall(match.group(0))]
+    try:
+        return datetime.datetime(*numbers, tzinfo=DATE_TIMEZONE)  # type: ignore[misc]
+    except ValueError:
+        return None
+
+
+def extract_field(
+    field: SiteTemplateField, text: typing.Optional[str], url_segments: typing.List[str]
+) -> typing.Optional[str]:
+    """The field's value from its selection's text or the URL, None if unfit."""
+    if field.url_segment is not None:
+        if field.url_segment >= len(url_segments):
+            return None
+        value = url_segments[field.url_segment]
+    else:
+        if text is None:
+            return None
+        match = re.search(field.pattern, normalize_text(text))
+        if match is None:
+            return None
+        value = match.group(1).strip()
+    return value if 0 < len(value) <= MAX_FIELD_LENGTH else None
+
+
+def get_css_selectors(template: SiteTemplate) -> typing.List[str]:
+    """The selectors whose text `apply_site_template` needs."""
+    css_selectors = [template.content_body_css_selector]
+    for name in TEMPLATE_FIELDS:
+        field: typing.Optional[SiteTemplateField] = getattr(template, name)
+        if field is not None and field.css_selector:
+            css_selectors.append(field.css_selector)
+    return css_selectors
+
+
+def apply_site_template(
+    template: SiteTemplate,
+    texts: typing.Dict[str, typing.List[str]],
+    url: typing.Optional[typing.Text] = None,
+    *,
+    min_body_length: int = 0,
+) -> typing.Optional[HTMLMetadataResponse]:
+    """Metadata from the `texts` of the template's selectors, None if unfit.
+
+    The content body must have `min_body_length` characters of text and
+    every learned field a value.
+    """
+    body_texts = texts.get(template.content_body_css_selector) or []
+    body_length = sum(len(normalize_text(text)) for text in body_texts)
+    if not body_texts or body_length < min_body_length:
+        return None
+
+    url_segments = get_url_segments(url) if url else []
+    values: typing.Dict[str, str] = {}
+    for name in TEMPLATE_FIELDS:
+        field: typing.Optional[SiteTemplateField] = getattr(template, name)
+        if field is None:
+            continue
+        field_texts = texts.get(field.css_selector) or [None]
+        value = extract_field(field, field_texts[0], url_segments)
+        if value is not None and name in DATE_FIELDS:
+            date = parse_date(value)
+            value = date.isoformat() if date is not None else None
+        if value is None:
+            return None
+        values[name] = value
+
+    return HTMLMetadataResponse(
+        content_body_css_selector=template.content_body_css_selector, **values
+    )
+
+
+def learn_site_template(
+    cleaned_html: str,
+    url: typing.Optional[typing.Text],
+    metadata: HTMLMetadataResponse,
+) -> typing.Optional[SiteTemplate]:
+    """Selectors of the page's metadata values, None if any cannot be found.
+
+    A value is located in the URL path, for chapter fields, or in the
+    shortest text containing it. Its selector is the element's tag with a
+    digit-free id or class, prefixed by ancestors until the element is the
+    first match. The text around the value becomes a pattern with digits
+    generalized, so the same label finds the next page's value. Dates are
+    found by their value in any of the `DATE_RE` formats, relative dates
+    such as "2 days ago" are not learned. Without a `url` the template has
+    no domain and URL pattern and reads nothing from the URL.
+    """
+    if not metadata.content_body_css_selector:
+        return None
+
+    soup = bs4.BeautifulSoup(cleaned_html, "html.parser")
+    url_segments = get_url_segments(url) if url else []
+    domain, url_pattern = get_url_pattern(url) if url else ("", "")
+    fields: typing.Dict[str, SiteTemplateField] = {}
+    for name in TEMPLATE_FIELDS:
+        value = normalize_text(getattr(metadata, name))
+        if not value:
+            continue
+        if name in URL_FIELDS and value in url_segments:
+            fields[name] = SiteTemplateField(url_segment=url_segments.index(value))
+            continue
+        field = (
+            _learn_date_field(soup, value)
+            if name in DATE_FIELDS
+            else _learn_field(soup, value)
+        )
+        if field is None:
+            return None
+        fields[name] = field
+
+    return SiteTemplate(
+        domain=domain,
+        url_pattern=url_pattern,
+        content_body_css_selector=metadata.content_body_css_selector,
+        **fields,
+    )
+
+
+def _learn_field(
+    soup: bs4.BeautifulSoup, value: str
+) -> typing.Optional[SiteTemplateField]:
+    element: typing.Optional[bs4.Tag] = None
+    element_text = ""
+    for string in soup.find_all(string=True):
+        if value not in normalize_text(string) or not isinstance(
+            string.parent, bs4.Tag
+        ):
+            continue
+        text = normalize_text(string.parent.get_text(" "))
+        if element is None or len(text) < len(element_text):
+            element, element_text = string.parent, text
+    if element is None:
+        return None
+
+    css_selector = _get_css_selector(soup, element)
+    if not css_selector:
+        return None
+
+    index = element_text.index(value)
+    prefix, suffix = element_text[:index], element_text[index + len(value) :]
+    suffix_head = suffix.split(" ", 1)[0] if suffix.strip() else ""
+    pattern = "^" + _generalize(prefix)
+    pattern += f"(.+?){_generalize(suffix_head)}" if suffix_head else "(.+)$"
+    field = SiteTemplateField(css_selector=css_selector, pattern=pattern)
+    if extract_field(field, element_text, []) != value:
+        return None
+    return field
+
+
+def _learn_date_field(
+    soup: bs4.BeautifulSoup, value: str
+) -> typing.Optional[SiteTemplateField]:
+    try:
+        date = datetime.datetime.fromisoformat(value)
+    except ValueError:
+        return None
+    if date.tzinfo is None:
+        date = date.replace(tzinfo=DATE_TIMEZONE)
+
+    for string in soup.find_all(string=DATE_RE):
+        if not isinstance(string.parent, bs4.Tag) or not any(
+            parse_date(match.group(0)) == date for match in DATE_RE.finditer(string)
+        ):
+            continue
+        # The first date of the element, a later one would need its position
+        field = SiteTemplateField(
+            css_selector=_get_css_selector(soup, string.parent),
+            pattern=f"({DATE_PATTERN})",
+        )
+        if (
+            field.css_selector
+            and parse_date(normalize_text(string.parent.get_text(" "))) == date
+        ):
+            return field
+    return None
+
+
+def _generalize(text: str) -> str:
+    """A regex of `text` with any number in place of its numbers."""
+    return DIGITS_RE.sub(r"\\d+", re.escape(text))
+
+
+def _get_css_selector(soup: bs4.BeautifulSoup, element: bs4.Tag) -> str:
+    """A selector whose first match is `element`, empty if none is found.
+
+    Bare tag names match whatever comes first on the next page, the selector
+    includes an id or class where the element or an ancestor has one.
+    """
+    parts: typing.List[str] = []
+    node: typing.Optional[bs4.Tag] = element
+    while isinstance(node, bs4.Tag) and not isinstance(node, bs4.BeautifulSoup):
+        part = _get_simple_selector(node)
+        parts.insert(0, part)
+        at_root = node.parent is None or isinstance(node.parent, bs4.BeautifulSoup)
+        if part != node.name or at_root:
+            css_selector = " > ".join(parts)
+            if soup.select_one(css_selector) is element:
+                return css_selector
+        node = node.parent
+    return ""
+
+
+def _get_simple_selector(tag: bs4.Tag) -> str:
+    tag_id = tag.get("id")
+    if isinstance(tag_id, str) and _is_stable_identifier(tag_id):
+        return f"{tag.name}#{tag_id}"
+    for class_name in tag.get("class") or []:
+        if _is_stable_identifier(class_name):
+            return f"{tag.name}.{class_name}"
+    return tag.name
+
+
+def _is_stable_identifier(name: str) -> bool:
+    """Valid in a selector without escaping, and not a per-page number."""
+    return bool(CSS_IDENTIFIER_RE.fullmatch(name)) and not DIGITS_RE.search(name)
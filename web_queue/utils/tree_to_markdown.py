@@ -0,0 +1,377 @@
+import re
+import typing
+
+import bs4
+
+# Whitespace but line breaks, `\v`, `\f` and separators, runs collapse to a space
+HORIZONTAL_SPACE = "\t\r\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000"
+# Single spaces, most of a text, are left alone
+HORIZONTAL_SPACE_RE = re.compile(
+    f"[{HORIZONTAL_SPACE}][ {HORIZONTAL_SPACE}]*| [ {HORIZONTAL_SPACE}]+"
+)
+HEADING_TAGS = frozenset(("h1", "h2", "h3", "h4", "h5", "h6"))
+LIST_TAGS = frozenset(("ol", "ul"))
+# Elements an HTML5 parser closes an open `<p>` for
+PARAGRAPH_CLOSING_TAGS = (
+    frozenset(("article", "div", "hr", "main", "p", "section", "table"))
+    | HEADING_TAGS
+    | LIST_TAGS
+)
+# Transparent elements whose text keeps its newlines
+RAW_NEWLINE_TAGS = frozenset(("body", "html", "main", "section", "tbody", "tr"))
+# Table parts outside a table, which an HTML5 parser drops
+TABLE_PART_TAGS = frozenset(("tbody", "td", "th", "tr"))
+INLINE_TAGS = frozenset(("a",)) | TABLE_PART_TAGS | RAW_NEWLINE_TAGS
+LIST_ITEM_BLOCK_TAGS = frozenset(("div", "p"))
+UNORDERED_LIST_BULLETS = "-*+"
+
+
+class UnsupportedMarkup(ValueError):
+    """The tree holds markup `tree_to_markdown` does not reproduce."""
+
+
+def _tag_name(node: typing.Optional[bs4.PageElement]) -> typing.Optional[str]:
+    return node.name if isinstance(node, bs4.Tag) else None
+
+
+class _MarkdownWriter:
+    """Writes the markdown of a `bs4` subtree into one buffer.
+
+    Follows the block spacing and whitespace rules of `html_to_markdown`
+    for the elements `HTMLCleaner` keeps. Markup outside them, or that an
+    HTML5 parser would restructure, raises UnsupportedMarkup.
+    """
+
+    def __init__(
+        self,
+        *,
+        in_heading: bool = False,
+        in_list_item: bool = False,
+        in_table_cell: bool = False,
+    ):
+        self.parts: typing.List[str] = []
+        self.in_heading = in_heading
+        self.in_list_item = in_list_item
+        self.in_table_cell = in_table_cell
+        self.in_paragraph = False
+        self.in_link = False
+        self._text_end = 0
+
+    @property
+    def text(self) -> str:
+        return "".join(self.parts)
+
+    def tail(self, n: int) -> str:
+        tail = ""
+        for part in reversed(self.parts):
+            tail = part + tail
+            if len(tail) >= n:
+                break
+        return tail[-n:]
+
+    def write_children(self, tag: bs4.Tag) -> None:
+        self.write_nodes(tag.children)
+        return None
+
+    def write_nodes(self, nodes: typing.Iterable[bs4.PageElement]) -> None:
+        # Adjacent strings, as left by removed tags, are one text once parsed
+        texts: typing.List[bs4.NavigableString] = []
+        for node in nodes:
+            if type(node) is bs4.NavigableString:
+                texts.append(node)
+                continue
+            if texts:
+                self._write_text(texts)
+                texts = []
+            if isinstance(node, bs4.Tag):
+                self._write_tag(node)
+            elif not isinstance(node, bs4.Comment):
+                raise UnsupportedMarkup(type(node).__name__)
+        if texts:
+            self._write_text(texts)
+        return None
+
+    def _write_tag(self, tag: bs4.Tag) -> None:
+        name = tag.name
+        if name in PARAGRAPH_CLOSING_TAGS and (
+            self.in_paragraph
+            or self.in_heading
+            or self.in_list_item
+            or self.in_table_cell
+        ):
+            raise UnsupportedMarkup(f"<{name}> in phrasing content")
+
+        if self.in_table_cell and name in TABLE_PART_TAGS:
+            raise UnsupportedMarkup(f"<{name}> in a table cell")
+
+        if name == "p":
+            self._write_paragraph(tag)
+        elif name == "div":
+            self._ensure_blank_line()
+            self.write_children(tag)
+            if self.parts:
+                self._pad_blank_line()
+        elif name == "article":
+            writer = _MarkdownWriter()
+            writer.write_children(tag)
+            content = writer.text
+            if content.strip():
+                self._ensure_blank_line()
+                self.parts.append(content)
+                self._pad_blank_line(rstrip=False)
+        elif name in HEADING_TAGS:
+            writer = _MarkdownWriter(in_heading=True)
+            writer.write_children(tag)
+            if content := writer.text.strip():
+                if self.parts:
+                    self._pad_blank_line(rstrip=False)
+                self.parts.append("#" * int(name[1]) + " " + content + "\n\n")
+        elif name in LIST_TAGS:
+            self._ensure_blank_line()
+            self._write_list(tag, indent="", bullet_depth=0)
+        elif name == "table":
+            self._write_table(tag)
+        elif name == "hr":
+            tail = self.tail(3)
+            if tail and not (
+                (tail[-1] not in " \n-")
+                or (tail[0] not in " \n-" and tail[1:] == "\n\n")
+            ):
+                raise UnsupportedMarkup("<hr> after a line break or rule")
+            self._rstrip("\n")
+            self.parts.append("\n---\n" if self.parts else "---\n")
+        elif name == "br":
+            if self.in_table_cell:
+                raise UnsupportedMarkup("<br> in a table cell")
+            if self.in_heading:
+                self._rstrip(" ")
+                self.parts.append("  ")
+            else:
+                self.parts.append("  \n")
+        elif name == "a":
+            if self.in_link or "href" in tag.attrs:
+                raise UnsupportedMarkup("<a> with a link or in a link")
+            self.in_link = True
+            self.write_children(tag)
+            self.in_link = False
+        elif name in INLINE_TAGS:
+            self.write_children(tag)
+        else:
+            raise UnsupportedMarkup(f"<{name}>")
+        return None
+
+    def _write_paragraph(self, tag: bs4.Tag) -> None:
+        at_blank_line = not self.parts or self.tail(2) == "\n\n"
+        self._ensure_blank_line()
+        start = len(self.parts)
+        self.in_paragraph = True
+        self.write_children(tag)
+        self.in_paragraph = False
+        # An empty paragraph at a blank line writes nothing
+        if not at_blank_line or len(self.parts) > start:
+            self.parts.append("\n\n")
+        return None
+
+    def _write_list(self, tag: bs4.Tag, *, indent: str, bullet_depth: int) -> None:
+        if tag.attrs.get("start") is not None:
+            raise UnsupportedMarkup("<ol> with a start")
+        items: typing.List[bs4.Tag] = []
+        for child in tag.children:
+            if _tag_name(child) == "li":
+                items.append(typing.cast(bs4.Tag, child))
+            elif type(child) is not bs4.Comment and (
+                type(child) is not bs4.NavigableString or child.strip()
+            ):
+                raise UnsupportedMarkup("content outside <li> in a list")
+
+        # A list with a paragraph in any item is loose, blank lines between
+        loose = any(
+            _tag_name(n) in LIST_ITEM_BLOCK_TAGS
+            for item in items
+            for n in item.children
+        )
+        if tag.name == "ul":
+            markers = [UNORDERED_LIST_BULLETS[bullet_depth % 3]] * len(items)
+            bullet_depth += 1
+        else:
+            markers = [f"{number}." for number in range(1, len(items) + 1)]
+        for item, marker in zip(items, markers):
+            self._write_list_item(
+                item,
+                indent=indent,
+                marker=marker,
+                loose=loose,
+                bullet_depth=bullet_depth,
+            )
+        return None
+
+    def _write_list_item(
+        self,
+        tag: bs4.Tag,
+        *,
+        indent: str,
+        marker: str,
+        loose: bool,
+        bullet_depth: int,
+    ) -> None:
+        content: typing.List[bs4.PageElement] = []
+        sublists: typing.List[bs4.Tag] = []
+        for child in tag.children:
+            if type(child) is bs4.Comment:
+                continue
+            if _tag_name(child) in LIST_TAGS:
+                sublists.append(typing.cast(bs4.Tag, child))
+            elif sublists:
+                raise UnsupportedMarkup("content after a nested list")
+            else:
+                content.append(child)
+
+        paragraphs = [
+            typing.cast(bs4.Tag, n)
+            for n in content
+            if _tag_name(n) in LIST_ITEM_BLOCK_TAGS
+        ]
+        if paragraphs:
+            if len(paragraphs) < len(
+                [n for n in content if type(n) is not bs4.NavigableString or n.strip()]
+            ):
+                raise UnsupportedMarkup("paragraphs mixed into a list item")
+            texts = [self._list_item_text(p.children) for p in paragraphs]
+            if any(not t for t, p in zip(texts, paragraphs) if p.name == "div"):
+                raise UnsupportedMarkup("empty <div> in a list item")
+            text = ("\n\n" + indent + "  ").join(t for t in texts if t)
+        else:
+            text = self._list_item_text(content)
+        if loose and "\n" in text.replace("\n\n" + indent + "  ", ""):
+            raise UnsupportedMarkup("line break in a loose list item")
+        if sublists and (loose or not text):
+            raise UnsupportedMarkup("nested list in a loose or empty list item")
+        line = f"{indent}{marker} {text}" if text else f"{indent}{marker}"
+        if loose:
+            line += "\n\n"
+        elif line[-1] != "\n":
+            line += "\n"
+        self.parts.append(line)
+        for sublist in sublists:
+            self._write_list(sublist, indent=indent + "  ", bullet_depth=bullet_depth)
+        return None
+
+    def _write_table(self, tag: bs4.Tag) -> None:
+        rows: typing.List[typing.List[str]] = []
+        for row in self._table_children(tag, ("tbody", "tr")):
+            if row.name == "tbody":
+                rows.extend(
+                    self._table_row(r) for r in self._table_children(row, ("tr",))
+                )
+            else:
+                rows.append(self._table_row(row))
+        if not rows:
+            raise UnsupportedMarkup("<table> without rows")
+
+        lines = ["| " + " | ".join(cells) + " |" for cells in rows]
+        lines.insert(1, "| " + " | ".join("---" for _ in rows[0]) + " |")
+        self._pad_blank_line(rstrip=False)
+        self.parts.append("\n".join(lines) + "\n\n")
+        return None
+
+    def _table_row(self, tag: bs4.Tag) -> typing.List[str]:
+        cells: typing.List[str] = []
+        for cell in self._table_children(tag, ("td", "th")):
+            writer = _MarkdownWriter(in_table_cell=True)
+            writer.write_children(cell)
+            cells.append(writer.text.strip())
+        if not cells:
+            raise UnsupportedMarkup("<tr> without cells")
+        return cells
+
+    def _table_children(
+        self, tag: bs4.Tag, names: typing.Tuple[str, ...]
+    ) -> typing.Iterator[bs4.Tag]:
+        for child in tag.children:
+            if _tag_name(child) in names:
+                yield typing.cast(bs4.Tag, child)
+            elif type(child) is not bs4.Comment and (
+                type(child) is not bs4.NavigableString or child.strip()
+            ):
+                raise UnsupportedMarkup(f"content outside {names} in <{tag.name}>")
+        return None
+
+    def _list_item_text(self, nodes: typing.Iterable[bs4.PageElement]) -> str:
+        writer = _MarkdownWriter(in_list_item=True)
+        writer.write_nodes(nodes)
+        return writer.text.rstrip(" ")
+
+    def _write_text(self, nodes: typing.List[bs4.NavigableString]) -> None:
+        text = "".join(nodes)
+        if "\n" in text or "\r" in text:
+            if (self.in_list_item or self.in_table_cell) and text.strip():
+                raise UnsupportedMarkup("newline in a list item or table cell")
+            if (
+                _tag_name(nodes[0].parent) in RAW_NEWLINE_TAGS
+                or _tag_name(nodes[0].previous_sibling) in RAW_NEWLINE_TAGS
+                or _tag_name(nodes[-1].next_sibling) in RAW_NEWLINE_TAGS
+            ):
+                raise UnsupportedMarkup("newline next to a section")
+
+        text = text.replace("\r\n", "\n").replace("\r", "\n")
+        text = HORIZONTAL_SPACE_RE.sub(" ", text)
+        if not text.strip():
+            text = "" if "\n" in text else " "
+        elif text.rstrip(" ").endswith("\n\n"):
+            raise UnsupportedMarkup("blank line at the end of a text")
+
+        if text[:1] in (" ", "\n"):
+            if self._after_space:
+                raise UnsupportedMarkup("spaces at both ends of adjacent texts")
+            if self.tail(2) == "\n\n" or (self.in_list_item and not self.parts):
+                text = text.lstrip()
+            else:
+                text = " " + text.lstrip()
+        if text[-1:] == "\n":
+            text = text.rstrip()
+        elif text[-1:] == " ":
+            text = text.rstrip() + " "
+
+        if text:
+            self.parts.append(text)
+            self._text_end = len(self.parts)
+        return None
+
+    @property
+    def _after_space(self) -> bool:
+        """Whether the output ends with text ending in a space."""
+        return self._text_end == len(self.parts) > 0 and self.parts[-1][-1] == " "
+
+    def _rstrip(self, chars: str) -> None:
+        while self.parts and not self.parts[-1].rstrip(chars):
+            self.parts.pop()
+        if self.parts:
+            self.parts[-1] = self.parts[-1].rstrip(chars)
+        return None
+
+    def _ensure_blank_line(self) -> None:
+        """Start a block after a blank line, unless at the start."""
+        if self.parts and self.tail(2) != "\n\n":
+            self.parts.append("\n\n")
+        return None
+
+    def _pad_blank_line(self, *, rstrip: bool = True) -> None:
+        """End a block, padding a trailing newline to a blank line."""
+        if rstrip:
+            self._rstrip(" ")
+        tail = self.tail(2)
+        if tail != "\n\n":
+            self.parts.append("\n" if tail[-1:] == "\n" else "\n\n")
+        return None
+
+
+def tree_to_markdown(tag: bs4.Tag) -> str:
+    """`html_to_str` of `tag` without serializing and re-parsing it.
+
+    Raises UnsupportedMarkup for markup whose conversion it does not
+    reproduce, such as links or blocks an HTML5 parser would move.
+    """
+    writer = _MarkdownWriter()
+    writer.write_nodes([tag])
+    content = writer.text.strip()
+    return "\n".join(line.rstrip() for line in content.splitlines())
@@ -0,0 +1,67 @@
+import json
+import typing
+
+import zstandard
+
+from web_queue.types.web_cache_entry import WebCacheEntry
+from web_queue.utils.compression import (
+    ZSTD_MAGIC_NUMBER,
+    compress_bytes,
+    decompress,
+)
+
+
+def encode_web_cache_entry(
+    cache_entry: WebCacheEntry,
+    *,
+    level: int = 9,
+    dictionary: typing.Optional[zstandard.ZstdCompressionDict] = None,
+) -> bytes:
+    """Encode as one zstd frame, the frame header records the dictionary ID."""
+    return encode_web_cache_entry_json(
+        cache_entry.model_dump_json().encode("utf-8"),
+        level=level,
+        dictionary_data=dictionary.as_bytes() if dictionary is not None else None,
+    )
+
+
+def encode_web_cache_entry_json(
+    cache_entry_json: bytes,
+    *,
+    level: int = 9,
+    dictionary_data: typing.Optional[bytes] = None,
+) -> bytes:
+    """`encode_web_cache_entry` of serialized input, picklable for a worker."""
+    if dictionary_data is None:
+        return compress_bytes(cache_entry_json, level=level)
+    dictionary = zstandard.ZstdCompressionDict(dictionary_data)
+    compressor = zstandard.ZstdCompressor(level=level, dict_data=dictionary)
+    return compressor.compress(cache_entry_json)
+
+
+def decode_web_cache_entry(
+    data: bytes,
+    *,
+    get_dictionary: typing.Optional[
+        typing.Callable[[int], typing.Optional[zstandard.ZstdCompressionDict]]
+    ] = None,
+) -> WebCacheEntry:
+    """Decode a web cache value, including the legacy text formats.
+
+    Current values are one zstd frame of the entry JSON, compressed with the
+    dictionary named in the frame header if any. Legacy values are a JSON
+    string of the base64 compressed HTML.
+    """
+    if data.startswith(ZSTD_MAGIC_NUMBER):
+        dict_id = zstandard.get_frame_parameters(data).dict_id
+        if not dict_id:
+            return WebCacheEntry.model_validate_json(zstandard.decompress(data))
+
+        dictionary = get_dictionary(dict_id) if get_dictionary else None
+        if dictionary is None:
+            raise ValueError(f"Missing zstd dictionary {dict_id}")
+        decompressor = zstandard.ZstdDecompressor(dict_data=dictionary)
+        return WebCacheEntry.model_validate_json(decompressor.decompress(data))
+
+    legacy_value: str = json.loads(data)
+    return WebCacheEntry(html=decompress(legacy_value, format="zstd"))